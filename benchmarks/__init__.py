@@ -0,0 +1,3 @@
+"""
+性能基准 - 每次调用都会执行的纯 CPU 路径
+"""
@@ -0,0 +1,279 @@
+"""
+CPU 热路径基准
+
+覆盖每次调用都会执行的纯计算路径：请求签名、密码加密、SN 解密、
+设备列表解析以及各控制器的控制命令构建。不访问网络，结果以 JSON 输出，
+便于在版本之间比较。
+
+用法（在插件的上级目录执行）:
+    python -m nekro_midea_plugin.benchmarks.hotpaths --output result.json
+    python -m nekro_midea_plugin.benchmarks.hotpaths --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad
+
+from ..constants import CLOUD_CONFIG
+from ..midea import ApiResult, MeijuCloud, MeijuCloudSecurity
+
+# 设备列表规模：家庭中的房间数与每个房间的设备数
+ROOMS = 6
+APPLIANCES_PER_ROOM = 5
+
+_AES_KEY = bytes(range(16))
+
+
+def _security() -> MeijuCloudSecurity:
+    security = MeijuCloudSecurity(
+        login_key=CLOUD_CONFIG["login_key"],
+        iot_key=CLOUD_CONFIG["iot_key"],
+        hmac_key=CLOUD_CONFIG["hmac_key"],
+    )
+    security.set_aes_keys(_AES_KEY)
+    return security
+
+
+def _encrypt_sn(sn: str) -> str:
+    return AES.new(_AES_KEY, AES.MODE_ECB).encrypt(pad(sn.encode("ascii"), 16)).hex()
+
+
+def build_appliance_list_response() -> dict:
+    """构造与 /v1/appliance/home/list/get 结构一致的响应数据"""
+    types = ["0xAC", "0xFA", "0xA1", "0xFD", "0xE2", "0x40", "0xB6", "0xDC"]
+    rooms = []
+    code = 100000000000000
+    for r in range(ROOMS):
+        appliances = []
+        for a in range(APPLIANCES_PER_ROOM):
+            code += 1
+            appliances.append({
+                "applianceCode": str(code),
+                "name": f"设备{r}-{a}",
+                "type": types[(r * APPLIANCES_PER_ROOM + a) % len(types)],
+                "sn": _encrypt_sn(f"0000{types[a % len(types)][2:]}31171234567890{code % 100000:05d}"),
+                "sn8": "12345678",
+                "productModel": "KFR-35GW",
+                "onlineStatus": "1" if a % 3 else "0",
+            })
+        rooms.append({"name": f"房间{r}", "applianceList": appliances})
+    return {"homeList": [{"homegroupId": "1", "roomList": rooms}]}
+
+
+def _bench_sync(func, min_time: float, repeat: int) -> list[float]:
+    """多轮计时，返回每轮的单次耗时（秒）"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 10:
+            break
+        number *= 2
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return samples
+
+
+def _bench_async(loop: asyncio.AbstractEventLoop, factory, min_time: float, repeat: int) -> list[float]:
+    """异步版本：在同一事件循环内连续 await，避免把循环启动开销计入结果"""
+
+    async def run(number: int) -> float:
+        start = time.perf_counter()
+        for _ in range(number):
+            await factory()
+        return time.perf_counter() - start
+
+    number = 1
+    while (elapsed := loop.run_until_complete(run(number))) < min_time / 10:
+        number *= 2
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    return [loop.run_until_complete(run(number)) / number for _ in range(repeat)]
+
+
+@contextmanager
+def _stub_controller_io(module, sent: list):
+    """替换控制器模块中的权限检查、会话与下发函数，只保留控制命令构建"""
+
+    async def allow(_ctx):
+        return True, ""
+
+    async def client():
+        return object()
+
+    async def send(_cloud, _device_id, control):
+        sent.append(control)
+        return True, "ok"
+
+    names = ("check_permission", "get_cloud_client", "send_device_control_with_retry")
+    originals = {name: getattr(module, name) for name in names}
+    module.check_permission, module.get_cloud_client, module.send_device_control_with_retry = allow, client, send
+    try:
+        yield
+    finally:
+        for name, value in originals.items():
+            setattr(module, name, value)
+
+
+def _controller_cases() -> list[tuple[str, object, object, dict]]:
+    """(名称, 模块, 控制函数, 参数)"""
+    from ..controllers import ac, dehumidifier, fan, humidifier, light, water_heater
+
+    return [
+        ("controller.ac", ac, ac.control_midea_ac, {
+            "power": 1, "temperature": 26.5, "mode": 2, "fan_speed": 3,
+            "swing_ud": 1, "swing_lr": 0, "preset_mode": "eco",
+        }),
+        ("controller.fan", fan, fan.control_midea_fan, {
+            "power": 1, "fan_speed": 50, "oscillate": 1, "mode": "natural", "swing_direction": "both",
+        }),
+        ("controller.dehumidifier", dehumidifier, dehumidifier.control_midea_dehumidifier, {
+            "power": 1, "target_humidity": 50, "mode": "auto", "fan_speed": "high",
+        }),
+        ("controller.humidifier", humidifier, humidifier.control_midea_humidifier, {
+            "power": 1, "target_humidity": 55, "mode": "manual", "wind_gear": "medium",
+        }),
+        ("controller.light", light, light.control_midea_light, {
+            "power": 1, "brightness": 80, "color_temp": 20, "rgb_color": "255,128,0",
+        }),
+        ("controller.water_heater", water_heater, water_heater.control_midea_water_heater, {
+            "power": 1, "target_temperature": 50, "operation_mode": "eco",
+        }),
+    ]
+
+
+def run_benchmarks(min_time: float = 0.2, repeat: int = 5, include_controllers: bool = True) -> dict:
+    """执行全部基准
+
+    Returns:
+        {基准名称: {"mean_us", "median_us", "min_us", "stdev_us", "ops_per_sec"}}
+    """
+    security = _security()
+    payload = json.dumps({"reqId": "0" * 32, "stamp": "20240101000000", "homegroupId": "1"})
+    response = build_appliance_list_response()
+    encrypted_sns = [
+        appliance["sn"]
+        for room in response["homeList"][0]["roomList"]
+        for appliance in room["applianceList"]
+    ]
+
+    cloud = MeijuCloud(account="bench@example.com", password="password")
+    cloud._security.set_aes_keys(_AES_KEY)
+
+    async def fake_request(*_args, **_kwargs):
+        return ApiResult(success=True, data=response)
+
+    cloud._api_request = fake_request
+
+    sync_cases = {
+        "security.sign": lambda: security.sign(payload, "a" * 32),
+        "security.encrypt_password": lambda: security.encrypt_password("login-id-123456", "password"),
+        "security.encrypt_iam_password": lambda: security.encrypt_iam_password("login-id-123456", "password"),
+        f"security.aes_decrypt[{len(encrypted_sns)}]": lambda: [security.aes_decrypt(sn) for sn in encrypted_sns],
+        f"security.aes_decrypt_many[{len(encrypted_sns)}]": lambda: security.aes_decrypt_many(encrypted_sns),
+    }
+
+    samples = {name: _bench_sync(func, min_time, repeat) for name, func in sync_cases.items()}
+
+    loop = asyncio.new_event_loop()
+    try:
+        samples[f"client.list_appliances[{len(encrypted_sns)}]"] = _bench_async(
+            loop, lambda: cloud.list_appliances(1), min_time, repeat
+        )
+        if include_controllers:
+            for name, module, func, kwargs in _controller_cases():
+                sent = []
+                with _stub_controller_io(module, sent):
+                    result = loop.run_until_complete(func(None, 12345678, **kwargs))
+                    if result != "ok" or not sent:
+                        raise RuntimeError(f"{name} 基准参数无效: {result}")
+                    samples[name] = _bench_async(
+                        loop, lambda f=func, kw=kwargs: f(None, 12345678, **kw), min_time, repeat
+                    )
+    finally:
+        loop.close()
+
+    return {
+        name: {
+            "mean_us": statistics.fmean(values) * 1e6,
+            "median_us": statistics.median(values) * 1e6,
+            "min_us": min(values) * 1e6,
+            "stdev_us": (statistics.stdev(values) if len(values) > 1 else 0.0) * 1e6,
+            "ops_per_sec": 1 / min(values),
+        }
+        for name, values in samples.items()
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """与基线比较，返回变慢超过阈值的基准名称"""
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            print(f"{name:40s} {result['min_us']:10.2f} us  (新增)")
+            continue
+        ratio = result["min_us"] / base["min_us"] if base["min_us"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  ⚠ 变慢"
+            regressions.append(name)
+        print(f"{name:40s} {result['min_us']:10.2f} us  基线 {base['min_us']:10.2f} us  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="美的插件 CPU 热路径基准")
+    parser.add_argument("--output", "-o", help="结果 JSON 输出路径，默认输出到标准输出")
+    parser.add_argument("--compare", "-c", help="基线结果 JSON，变慢超过阈值时返回非零退出码")
+    parser.add_argument("--threshold", type=float, default=0.10, help="回归阈值（相对变慢比例），默认 0.10")
+    parser.add_argument("--min-time", type=float, default=0.2, help="每轮最少计时秒数")
+    parser.add_argument("--repeat", type=int, default=5, help="计时轮数")
+    parser.add_argument("--no-controllers", action="store_true", help="跳过控制器基准")
+    args = parser.parse_args(argv)
+
+    from ..plugin import plugin
+
+    report = {
+        "plugin_version": getattr(plugin, "version", None),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "min_time": args.min_time,
+        "repeat": args.repeat,
+        "results": run_benchmarks(args.min_time, args.repeat, not args.no_controllers),
+    }
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    elif not args.compare:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        return 1 if compare(report, baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,9 @@
 
 # KV 存储键名
 STORE_KEY_CREDENTIALS = "midea_credentials"
+STORE_KEY_SCENES = "midea_scenes"
+STORE_KEY_LAN_ADDRESSES = "midea_lan_addresses"
+STORE_KEY_SNAPSHOT = "midea_snapshot"
 
 # 云服务配置
 CLOUD_CONFIG = {
@@ -6,6 +6,7 @@ from .base import (
     get_cloud_client,
     get_midea_devices,
     control_midea_device,
+    control_midea_devices,
     get_midea_device_status,
 )
 from .ac import (
@@ -18,11 +19,13 @@ from .dehumidifier import control_midea_dehumidifier
 from .humidifier import control_midea_humidifier
 from .light import control_midea_light
 from .water_heater import control_midea_water_heater
+from .scene import run_midea_scene, inject_scene_hint
 
 __all__ = [
     "get_cloud_client",
     "get_midea_devices",
     "control_midea_device",
+    "control_midea_devices",
     "get_midea_device_status",
     "control_midea_ac",
     "get_midea_ac_status",
@@ -32,4 +35,6 @@ __all__ = [
     "control_midea_humidifier",
     "control_midea_light",
     "control_midea_water_heater",
+    "run_midea_scene",
+    "inject_scene_hint",
 ]
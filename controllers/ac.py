@@ -6,7 +6,9 @@ from nekro_agent.api.plugin import SandboxMethodType
 from nekro_agent.api.schemas import AgentCtx
 
 from ..plugin import plugin
-from .base import get_cloud_client, send_device_control_with_retry, get_device_status_with_retry, check_permission
+from ..midea import ERROR_CODE_DEADLINE_EXCEEDED
+from ..services import device_resolver
+from .base import get_cloud_client, get_device_status, send_device_control_with_retry, check_permission, traced
 
 
 @plugin.mount_sandbox_method(
@@ -14,9 +16,10 @@ from .base import get_cloud_client, send_device_control_with_retry, get_device_s
     name="控制美的空调",
     description="控制美的空调的开关、温度、模式、风速、摆风、预设模式等"
 )
+@traced
 async def control_midea_ac(
     _ctx: AgentCtx,
-    device_id: int,
+    device_id: int | str,
     power: int | None = None,
     temperature: float | None = None,
     mode: int | None = None,
@@ -31,10 +34,10 @@ async def control_midea_ac(
     """控制美的空调设备
 
     可以控制空调的电源开关、设定温度、运行模式、风速、摆风、预设模式、电辅热、干燥、防直吹等。
-    必须先通过 get_midea_devices() 获取设备ID。
+    设备可用 get_midea_devices() 中的设备ID指定，也可直接使用设备名称或"房间+类型"（如 "客厅空调"）。
 
     Args:
-        device_id (int): 空调设备的ID，可通过 get_midea_devices() 获取
+        device_id (int | str): 空调设备的ID，或设备名称/房间+类型（如 "客厅空调"）
         power (int | None): 电源状态，1=开机，0=关机，None=不改变
         temperature (float | None): 设定温度，范围16-30度，支持0.5度步进，None=不改变
         mode (int | None): 运行模式，1=自动 2=制冷 3=除湿 4=送风 5=制热，None=不改变
@@ -58,6 +61,10 @@ async def control_midea_ac(
     if not cloud:
         return "error:not_logged_in"
     
+    device_id, error = await device_resolver.resolve(cloud, device_id, 0xAC)
+    if device_id is None:
+        return error
+    
     # 构建控制命令（使用小写参数名和字符串值，与 midea_auto_cloud 一致）
     control = {}
     
@@ -158,13 +165,14 @@ async def inject_ac_params_hint(_ctx: AgentCtx) -> str:
     name="获取美的空调状态",
     description="获取美的空调的当前运行状态，包括温度、模式、摆风、预设模式等"
 )
-async def get_midea_ac_status(_ctx: AgentCtx, device_id: int) -> str:
+@traced
+async def get_midea_ac_status(_ctx: AgentCtx, device_id: int | str) -> str:
     """获取美的空调的当前运行状态
 
     查询指定空调设备的当前状态，包括电源、温度、模式、风速、摆风、预设模式、电辅热、干燥、防直吹等信息。
 
     Args:
-        device_id (int): 空调设备的ID，可通过 get_midea_devices() 获取
+        device_id (int | str): 空调设备的ID，或设备名称/房间+类型（如 "客厅空调"）
 
     Returns:
         str: 空调状态的文本描述
@@ -178,11 +186,17 @@ async def get_midea_ac_status(_ctx: AgentCtx, device_id: int) -> str:
     if not cloud:
         return "错误：美的账号未登录，请先在插件管理页面登录美的账号"
     
+    device_id, error = await device_resolver.resolve(cloud, device_id, 0xAC)
+    if device_id is None:
+        return error
+    
     try:
         # 使用空查询获取所有状态
         query = {}
         
-        result = await get_device_status_with_retry(cloud, device_id, query)
+        result, age = await get_device_status(cloud, device_id, query)
+        if result.error_code == ERROR_CODE_DEADLINE_EXCEEDED:
+            return f"获取设备 {device_id} 状态超时，请稍后重试"
         if not result.success or not result.data:
             return f"获取设备 {device_id} 状态失败，设备可能离线"
         
@@ -251,6 +265,10 @@ async def get_midea_ac_status(_ctx: AgentCtx, device_id: int) -> str:
         if indoor_humidity is not None:
             result_lines.insert(5, f"室内湿度: {indoor_humidity}%")
         
+        if age >= 1:
+            suffix = "（正在刷新）" if result.stale else ""
+            result_lines.append(f"数据更新于: {int(age)}秒前{suffix}")
+        
         return "\n".join(result_lines)
     except Exception as e:
         return f"获取空调状态失败: {e}"
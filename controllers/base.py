@@ -2,14 +2,74 @@
 基础控制器 - 通用方法
 """
 
-import json
+import asyncio
+import functools
+import random
+import time
 from nekro_agent.api.plugin import SandboxMethodType
 from nekro_agent.api.schemas import AgentCtx
 from nekro_agent.api.core import logger
 
-from ..constants import STORE_KEY_CREDENTIALS, get_device_type_name
-from ..midea import MeijuCloud, ApiResult
+from ..constants import get_device_type_name
+from ..midea import MeijuCloud, ApiResult, ERROR_CODE_DEADLINE_EXCEEDED, deadline_remaining, request_deadline, tracer
+from ..midea import json_codec
+from ..midea.metrics import CONTROL_COMMANDS, CONTROL_LATENCY, CONTROL_RETRIES
 from ..plugin import plugin, config
+from ..services import (
+    cloud_session,
+    inventory_cache,
+    status_cache,
+    status_poller,
+    control_coalescer,
+    device_breaker,
+    device_resolver,
+    lan_control,
+)
+
+# 网络错误重试的初始退避（秒）
+NETWORK_RETRY_BASE_DELAY = 0.5
+
+# 必须一起下发的控制参数组（如温度整数与小数部分、RGB 三通道），
+# 去除重复命令时只有整组都已满足才会去掉
+LINKED_CONTROL_KEYS = (
+    ("temperature", "small_temperature"),
+    ("r", "g", "b"),
+)
+
+
+def _values_equal(current, wanted) -> bool:
+    """比较状态值与控制值（兼容数字与字符串形式）"""
+    return current == wanted or str(current) == str(wanted)
+
+
+def strip_satisfied_controls(device_id: int, control: dict) -> dict:
+    """去掉设备当前状态已满足的控制参数
+    
+    仅在存在新鲜期内的缓存状态时比较，否则原样返回。
+    
+    Args:
+        device_id: 设备 ID
+        control: 控制命令字典
+        
+    Returns:
+        仍需下发的控制命令字典（可能为空）
+    """
+    entry = status_cache.peek(device_id)
+    if entry is None or entry.restored or entry.age >= config.status_cache_fresh:
+        return control
+    status = entry.data.get("status", entry.data)
+    if not isinstance(status, dict):
+        return control
+    
+    satisfied = {
+        key for key, value in control.items()
+        if key in status and _values_equal(status[key], value)
+    }
+    for group in LINKED_CONTROL_KEYS:
+        present = [key for key in group if key in control]
+        if present and not all(key in satisfied for key in present):
+            satisfied.difference_update(present)
+    return {key: value for key, value in control.items() if key not in satisfied}
 
 
 def extract_qq_number(chat_key: str) -> str:
@@ -43,71 +103,40 @@ async def check_permission(_ctx: AgentCtx) -> tuple[bool, str]:
         - (True, "") 表示有权限
         - (False, "error:permission_denied") 表示无权限
     """
-    allowed = config.allowed_users.strip()
-    if not allowed:
-        return True, ""  # 留空=允许所有人
+    with tracer.span("check_permission"):
+        allowed = config.allowed_users.strip()
+        if not allowed:
+            return True, ""  # 留空=允许所有人
     
-    user_list = [u.strip() for u in allowed.split(",") if u.strip()]
-    user_qq = extract_qq_number(_ctx.from_chat_key)
+        user_list = [u.strip() for u in allowed.split(",") if u.strip()]
+        user_qq = extract_qq_number(_ctx.from_chat_key)
     
-    if user_qq and user_qq in user_list:
-        return True, ""
+        if user_qq and user_qq in user_list:
+            return True, ""
     
-    return False, "error:permission_denied"
+        return False, "error:permission_denied"
 
 
 async def get_cloud_client() -> MeijuCloud | None:
-    """获取已登录的云客户端，支持加载密码用于自动刷新"""
-    creds_json = await plugin.store.get(store_key=STORE_KEY_CREDENTIALS)
-    if not creds_json:
-        return None
-    
-    creds = json.loads(creds_json)
-    if not creds.get("access_token"):
-        return None
-    
-    cloud = MeijuCloud(
-        account=creds.get("account", ""), 
-        password=creds.get("password", "")  # 加载密码用于自动刷新
-    )
-    cloud.load_credentials(creds)
-    return cloud
+    """获取已登录的云客户端（进程内共享会话，支持自动刷新）"""
+    with tracer.span("get_cloud_client"):
+        return await cloud_session.get_client()
 
 
-async def _refresh_credentials(cloud: MeijuCloud) -> bool:
-    """刷新凭证
-    
-    当检测到登录状态失效时，使用保存的账号密码重新登录
-    
-    Returns:
-        刷新成功返回 True，失败返回 False
-    """
-    # 检查是否有密码
-    if not cloud._password:
-        logger.warning("无法自动刷新凭证：未保存密码")
-        return False
-    
-    logger.info(f"正在自动刷新美的账号 {cloud._account} 的凭证...")
-    success, message = await cloud.login()
-    
-    if success:
-        # 保存新凭证
-        creds = cloud.get_credentials()
-        await plugin.store.set(
-            store_key=STORE_KEY_CREDENTIALS,
-            value=json.dumps(creds)
-        )
-        logger.info("凭证刷新成功")
-        return True
-    else:
-        logger.error(f"凭证刷新失败: {message}")
-        return False
+def traced(func):
+    """记录沙箱方法的调用追踪（按会话 chat_key 关联，追踪关闭时直接调用）"""
+    @functools.wraps(func)
+    async def wrapper(_ctx: AgentCtx, *args, **kwargs):
+        with tracer.trace(func.__name__, chat_key=getattr(_ctx, "from_chat_key", None)):
+            return await func(_ctx, *args, **kwargs)
+    return wrapper
 
 
 async def send_device_control_with_retry(
     cloud: MeijuCloud, 
     device_id: int, 
-    control: dict
+    control: dict,
+    deadline: float | None = None
 ) -> tuple[bool, str]:
     """带自动刷新的设备控制
     
@@ -117,56 +146,169 @@ async def send_device_control_with_retry(
         cloud: 美的云客户端
         device_id: 设备 ID
         control: 控制命令字典
+        deadline: 整体截止时间（秒），覆盖刷新与重试的全过程；None 使用配置值
         
     Returns:
         (成功标志, 错误消息或 "ok")
     """
-    result = await cloud.send_device_control(device_id, control)
+    if deadline is None:
+        deadline = config.control_deadline
+    expires_at = time.monotonic() + deadline if deadline and deadline > 0 else None
+    
+    # 开启合并窗口时，同一设备的短时间连续命令会合并为一次请求
+    started = time.monotonic()
+    with tracer.span("control", device_id=device_id) as span:
+        success, error = await control_coalescer.submit(
+            device_id,
+            control,
+            lambda merged, merged_expires_at: _send_device_control(cloud, device_id, merged, merged_expires_at),
+            expires_at,
+        )
+        span.set(result=error)
+    CONTROL_LATENCY.observe(time.monotonic() - started)
+    CONTROL_COMMANDS.inc("ok" if success else error.split(":")[1] if error.startswith("error:") else "error")
+    return success, error
+
+
+async def get_device_status(
+    cloud: MeijuCloud,
+    device_id: int,
+    query: dict,
+    deadline: float | None = None
+) -> tuple[ApiResult, float]:
+    """读取设备状态（经状态缓存）
+
+    Args:
+        deadline: 等待云端的截止时间（秒）；None 使用配置值
+
+    Returns:
+        (ApiResult, 数据已存在的秒数)，超时时 error_code 为 ERROR_CODE_DEADLINE_EXCEEDED
+    """
+    if deadline is None:
+        deadline = config.status_deadline
+    with request_deadline(deadline if deadline and deadline > 0 else None):
+        return await status_cache.get(cloud, device_id, query)
+
+
+async def _send_device_control(
+    cloud: MeijuCloud,
+    device_id: int,
+    control: dict,
+    expires_at: float | None = None
+) -> tuple[bool, str]:
+    """在截止时间内发送设备控制命令"""
+    remaining = None if expires_at is None else expires_at - time.monotonic()
+    with request_deadline(remaining):
+        return await _send_device_control_once(cloud, device_id, control)
+
+
+async def _send_device_control_once(
+    cloud: MeijuCloud,
+    device_id: int,
+    control: dict
+) -> tuple[bool, str]:
+    """发送设备控制命令
+    
+    - token 过期时刷新凭证并重试
+    - 网络错误(-1)或响应解析失败(-2)时指数退避重试
+    - 设备持续离线或无法送达时由熔断器快速失败，其他云端错误不计入熔断
+    - 开启重复命令跳过时，已满足的参数不再下发
+    """
+    # 去掉设备已满足的参数，全部满足时无需请求云端
+    if config.skip_redundant_commands:
+        control = strip_satisfied_controls(device_id, control)
+        if not control:
+            return True, "ok"
+    
+    # 熔断中的设备直接返回离线，不请求云端
+    if not device_breaker.allow(device_id):
+        return False, "error:device_offline"
+    
+    token = cloud.access_token
+    result = await lan_control.send_device_control(cloud, device_id, control)
     
     # 如果是 token 错误，尝试刷新并重试
     if result.is_token_error:
         logger.debug(f"检测到 token 错误 (code={result.error_code})，尝试刷新凭证...")
-        if await _refresh_credentials(cloud):
-            result = await cloud.send_device_control(device_id, control)
+        if await cloud_session.refresh_credentials(cloud, token):
+            CONTROL_RETRIES.inc("token")
+            with tracer.span("retry", reason="token"):
+                result = await lan_control.send_device_control(cloud, device_id, control)
+    
+    # 网络错误或 JSON 解析失败，指数退避重试
+    attempt = 0
+    while result.error_code in (-1, -2) and attempt < config.network_retry_count:
+        delay = NETWORK_RETRY_BASE_DELAY * (2 ** attempt) * random.uniform(0.8, 1.2)
+        remaining = deadline_remaining()
+        if remaining is not None and remaining <= delay:
+            break
+        logger.debug(f"设备 {device_id} 控制请求失败 (code={result.error_code})，{delay:.1f} 秒后重试...")
+        await asyncio.sleep(delay)
+        attempt += 1
+        CONTROL_RETRIES.inc("network")
+        with tracer.span("retry", reason="network", attempt=attempt):
+            result = await lan_control.send_device_control(cloud, device_id, control)
     
     if result.success:
+        device_breaker.record_success(device_id)
+        # 设备状态已改变，丢弃缓存的旧状态
+        status_cache.invalidate(device_id)
+        status_poller.mark_active(device_id)
         return True, "ok"
     else:
         # 区分不同类型的错误
         if result.is_token_error:
+            device_breaker.release(device_id)
             return False, "error:token_expired"
+        elif result.error_code == ERROR_CODE_DEADLINE_EXCEEDED:
+            device_breaker.release(device_id)
+            return False, "error:timeout"
         elif result.error_code == -1:
+            # 重试后仍无法送达，计入熔断
+            device_breaker.record_failure(device_id)
             return False, f"error:network:{result.error_message}"
-        else:
+        elif result.error_code == -2:
+            device_breaker.release(device_id)
+            return False, f"error:network:{result.error_message}"
+        elif result.is_device_offline or _known_offline(cloud, device_id):
+            device_breaker.record_failure(device_id)
             return False, "error:device_offline"
+        else:
+            # 参数校验等云端业务错误与设备在线状态无关，不计入熔断
+            device_breaker.release(device_id)
+            return False, f"error:cloud:{result.error_code}:{result.error_message}"
 
 
-async def get_device_status_with_retry(
-    cloud: MeijuCloud,
-    device_id: int,
-    query: dict
-) -> ApiResult:
-    """带自动刷新的设备状态获取
+def _known_offline(cloud: MeijuCloud, device_id: int) -> bool:
+    """设备列表缓存中该设备是否标记为离线"""
+    appliance = inventory_cache.find_device(cloud._account, device_id)
+    return appliance is not None and not appliance.online
+
+
+async def run_device_controls(cloud: MeijuCloud, controls: dict[int, dict]) -> dict[str, str]:
+    """并发控制多个设备
     
-    当检测到 token 过期时，自动刷新凭证并重试
+    以配置的并发上限同时发送各设备的控制命令，单个设备失败不影响其他设备
     
     Args:
         cloud: 美的云客户端
-        device_id: 设备 ID
-        query: 查询参数字典
+        controls: {设备ID: 控制命令字典}
         
     Returns:
-        ApiResult 对象
+        {设备ID字符串: "ok" 或 "error:xxx"}，顺序与 controls 一致
     """
-    result = await cloud.get_device_status(device_id, query)
+    semaphore = asyncio.Semaphore(max(1, config.batch_control_concurrency))
     
-    # 如果是 token 错误，尝试刷新并重试
-    if result.is_token_error:
-        logger.debug(f"检测到 token 错误 (code={result.error_code})，尝试刷新凭证...")
-        if await _refresh_credentials(cloud):
-            result = await cloud.get_device_status(device_id, query)
+    async def run(device_id: int, control: dict) -> str:
+        async with semaphore:
+            try:
+                success, error = await send_device_control_with_retry(cloud, device_id, control)
+                return "ok" if success else error
+            except Exception as e:
+                return f"error:exception:{e}"
     
-    return result
+    results = await asyncio.gather(*(run(d, c) for d, c in controls.items()))
+    return dict(zip((str(d) for d in controls), results))
 
 
 @plugin.mount_sandbox_method(
@@ -174,6 +316,7 @@ async def get_device_status_with_retry(
     name="获取美的设备列表",
     description="获取美的智能家居的所有设备列表"
 )
+@traced
 async def get_midea_devices(_ctx: AgentCtx) -> str:
     """获取美的智能家居的所有设备列表
 
@@ -197,13 +340,8 @@ async def get_midea_devices(_ctx: AgentCtx) -> str:
         return "错误：美的账号未登录，请先在插件管理页面登录美的账号"
     
     try:
-        # 获取家庭列表
-        result = await cloud.list_home()
-        
-        # 如果是 token 错误，尝试刷新并重试
-        if result.is_token_error:
-            if await _refresh_credentials(cloud):
-                result = await cloud.list_home()
+        # 获取家庭列表（带缓存）
+        result = await inventory_cache.get_homes(cloud)
         
         if not result.success or not result.data:
             return "获取家庭列表失败"
@@ -211,26 +349,24 @@ async def get_midea_devices(_ctx: AgentCtx) -> str:
         homes = result.data
         result_lines = ["📱 美的智能家居设备列表：", ""]
         
-        for home_id, home_name in homes.items():
-            result_lines.append(f"🏠 {home_name}:")
-            
-            app_result = await cloud.list_appliances(home_id)
-            
-            # 如果是 token 错误，尝试刷新并重试
-            if app_result.is_token_error:
-                if await _refresh_credentials(cloud):
-                    app_result = await cloud.list_appliances(home_id)
+        # 并发获取各家庭的设备列表，结果顺序与家庭列表一致
+        app_results = await inventory_cache.get_all_appliances(cloud, homes.keys())
+        if result.stale or any(r.stale for r in app_results):
+            result_lines.insert(1, "（启动快照数据，正在后台刷新）")
+        
+        for home, app_result in zip(homes.values(), app_results):
+            result_lines.append(f"🏠 {home.name}:")
             
             if not app_result.success or not app_result.data:
                 result_lines.append("  （无设备或获取失败）")
                 continue
             
             for device_id, info in app_result.data.items():
-                status = "🟢在线" if info["online"] else "🔴离线"
-                type_name = get_device_type_name(info["type"])
-                result_lines.append(f"  • {info['name']} ({type_name})")
+                status = "🟢在线" if info.online else "🔴离线"
+                type_name = get_device_type_name(info.type)
+                result_lines.append(f"  • {info.name} ({type_name})")
                 result_lines.append(f"    设备ID: {device_id}")
-                result_lines.append(f"    房间: {info['room']}")
+                result_lines.append(f"    房间: {info.room}")
                 result_lines.append(f"    状态: {status}")
                 result_lines.append("")
         
@@ -244,9 +380,10 @@ async def get_midea_devices(_ctx: AgentCtx) -> str:
     name="控制美的设备(通用)",
     description="通用的美的设备控制方法，可以发送任意控制参数"
 )
+@traced
 async def control_midea_device(
     _ctx: AgentCtx,
-    device_id: int,
+    device_id: int | str,
     control_params: str
 ) -> str:
     """通用的美的设备控制方法
@@ -255,7 +392,7 @@ async def control_midea_device(
     控制参数以JSON格式传入。
 
     Args:
-        device_id (int): 设备的ID
+        device_id (int | str): 设备的ID，或设备名称/房间+类型（如 "客厅空调"）
         control_params (str): JSON格式的控制参数，如 '{"Power": 1, "Mode": 2}'
 
     Returns:
@@ -274,9 +411,13 @@ async def control_midea_device(
     if not cloud:
         return "error:not_logged_in"
     
+    device_id, error = await device_resolver.resolve(cloud, device_id, None)
+    if device_id is None:
+        return error
+    
     try:
-        control = json.loads(control_params)
-    except json.JSONDecodeError as e:
+        control = json_codec.loads(control_params)
+    except json_codec.DECODE_ERRORS as e:
         return f"error:invalid_json:{e}"
     
     if not control or not isinstance(control, dict):
@@ -289,14 +430,89 @@ async def control_midea_device(
         return f"error:exception:{e}"
 
 
+@plugin.mount_sandbox_method(
+    SandboxMethodType.TOOL,
+    name="批量控制美的设备",
+    description="一次调用并发控制多个美的设备，返回每个设备的控制结果"
+)
+@traced
+async def control_midea_devices(
+    _ctx: AgentCtx,
+    controls: str
+) -> str:
+    """批量控制多个美的设备
+
+    一次调用同时向多个设备发送控制参数（并发执行），适用于"关闭所有设备"等场景。
+    同一设备出现多次时，其控制参数按顺序合并后只发送一次。
+
+    Args:
+        controls (str): JSON数组，每项包含 device_id（设备ID或设备名称）和 control，
+            如 '[{"device_id": 12345678, "control": {"power": "off"}}, {"device_id": 87654321, "control": {"power": "off"}}]'
+
+    Returns:
+        str: JSON对象，键为设备ID，值为该设备的控制结果（"ok" 或 "error:xxx"）；
+            无效或无法解析的项以其传入的 device_id（缺失时为 "#序号"）为键记录错误，其余设备照常执行
+
+    Example:
+        # 同时关闭两台设备
+        result = control_midea_devices(controls='[{"device_id": 12345678, "control": {"power": "off"}}, {"device_id": 87654321, "control": {"power": "off"}}]')
+    """
+    # 权限检查
+    has_perm, perm_error = await check_permission(_ctx)
+    if not has_perm:
+        return perm_error
+    
+    cloud = await get_cloud_client()
+    if not cloud:
+        return "error:not_logged_in"
+    
+    try:
+        items = json_codec.loads(controls)
+    except json_codec.DECODE_ERRORS as e:
+        return f"error:invalid_json:{e}"
+    
+    if not isinstance(items, list):
+        return "error:invalid_params"
+    
+    # 校验并按设备合并控制参数（保持首次出现的顺序）；
+    # 无效项的错误记录在该项的 device_id 下，不影响其他设备
+    errors: list[tuple[str, int, str]] = []
+    merged: dict[int, dict] = {}
+    for index, item in enumerate(items):
+        selector = item.get("device_id") if isinstance(item, dict) else None
+        key = str(selector) if isinstance(selector, (int, str)) else f"#{index}"
+        if not isinstance(item, dict):
+            errors.append((key, index, "error:invalid_params"))
+            continue
+        if not isinstance(selector, (int, str)):
+            errors.append((key, index, "error:invalid_device_id"))
+            continue
+        control = item.get("control")
+        if not control or not isinstance(control, dict):
+            errors.append((key, index, "error:invalid_params"))
+            continue
+        device_id, error = await device_resolver.resolve(cloud, selector)
+        if device_id is None:
+            errors.append((key, index, error))
+            continue
+        merged.setdefault(device_id, {}).update(control)
+    
+    results = await run_device_controls(cloud, merged) if merged else {}
+    for key, index, error in errors:
+        # 同一键已有结果时追加序号，避免覆盖
+        results[f"{key}#{index}" if key in results else key] = error
+    return json_codec.dumps(results)
+
+
 @plugin.mount_sandbox_method(
     SandboxMethodType.AGENT,
     name="获取美的设备状态(通用)",
     description="获取任意美的设备的状态"
 )
+@traced
 async def get_midea_device_status(
     _ctx: AgentCtx,
-    device_id: int,
+    device_id: int | str,
     query_params: str
 ) -> str:
     """获取任意美的设备的状态
@@ -305,11 +521,12 @@ async def get_midea_device_status(
     查询参数以JSON格式传入。
 
     Args:
-        device_id (int): 设备的ID
+        device_id (int | str): 设备的ID，或设备名称/房间+类型（如 "客厅空调"）
         query_params (str): JSON格式的查询参数，如 '{"Power": {}, "Mode": {}}'
 
     Returns:
-        str: 设备状态的JSON字符串
+        str: 设备状态的JSON字符串，data_age_seconds 字段为数据已缓存的秒数，
+            data_stale 为 true 时表示数据正在后台刷新
 
     Example:
         # 查询设备电源和模式状态
@@ -324,18 +541,30 @@ async def get_midea_device_status(
     if not cloud:
         return "错误：美的账号未登录"
     
+    device_id, error = await device_resolver.resolve(cloud, device_id, None)
+    if device_id is None:
+        return error
+    
     try:
-        query = json.loads(query_params)
-    except json.JSONDecodeError as e:
+        query = json_codec.loads(query_params)
+    except json_codec.DECODE_ERRORS as e:
         return f"错误：查询参数JSON格式错误: {e}"
     
     if not query or not isinstance(query, dict):
         return "错误：查询参数必须是非空的JSON对象"
     
     try:
-        result = await get_device_status_with_retry(cloud, device_id, query)
+        result, age = await get_device_status(cloud, device_id, query)
+        if result.error_code == ERROR_CODE_DEADLINE_EXCEEDED:
+            return f"获取设备 {device_id} 状态超时，请稍后重试"
         if result.success and result.data:
-            return json.dumps(result.data, ensure_ascii=False, indent=2)
+            data = result.data
+            if isinstance(data, dict):
+                # 附带数据时效，便于判断是否为缓存数据
+                data = {**data, "data_age_seconds": round(age, 1)}
+                if result.stale:
+                    data["data_stale"] = True
+            return json_codec.dumps(data, indent=True)
         else:
             return f"获取设备 {device_id} 状态失败，设备可能离线"
     except Exception as e:
@@ -6,7 +6,8 @@ from nekro_agent.api.plugin import SandboxMethodType
 from nekro_agent.api.schemas import AgentCtx
 
 from ..plugin import plugin
-from .base import get_cloud_client, send_device_control_with_retry, check_permission
+from ..services import device_resolver
+from .base import get_cloud_client, send_device_control_with_retry, check_permission, traced
 
 
 @plugin.mount_sandbox_method(
@@ -14,9 +15,10 @@ from .base import get_cloud_client, send_device_control_with_retry, check_permis
     name="控制美的除湿机",
     description="控制美的除湿机的开关、湿度、模式、风速、负离子、童锁、摆风等"
 )
+@traced
 async def control_midea_dehumidifier(
     _ctx: AgentCtx,
-    device_id: int,
+    device_id: int | str,
     power: int | None = None,
     target_humidity: int | None = None,
     mode: str | None = None,
@@ -30,7 +32,7 @@ async def control_midea_dehumidifier(
     可以控制除湿机的电源开关、目标湿度、模式、风速、负离子、童锁、上下摆风等。
 
     Args:
-        device_id (int): 除湿机设备的ID，可通过 get_midea_devices() 获取
+        device_id (int | str): 除湿机设备的ID，或设备名称/房间+类型（如 "客厅除湿机"）
         power (int | None): 电源状态，1=开机，0=关机
         target_humidity (int | None): 目标湿度，范围35-85%
         mode (str | None): 模式，"continuity"=连续 "auto"=智能 "fan"=送风 "dry_shoes"=干鞋 "dry_clothes"=干衣
@@ -61,6 +63,10 @@ async def control_midea_dehumidifier(
     if not cloud:
         return "error:not_logged_in"
     
+    device_id, error = await device_resolver.resolve(cloud, device_id, 0xA1)
+    if device_id is None:
+        return error
+    
     control = {}
     
     if power is not None:
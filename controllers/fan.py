@@ -6,7 +6,8 @@ from nekro_agent.api.plugin import SandboxMethodType
 from nekro_agent.api.schemas import AgentCtx
 
 from ..plugin import plugin
-from .base import get_cloud_client, send_device_control_with_retry, check_permission
+from ..services import device_resolver
+from .base import get_cloud_client, send_device_control_with_retry, check_permission, traced
 
 
 @plugin.mount_sandbox_method(
@@ -14,9 +15,10 @@ from .base import get_cloud_client, send_device_control_with_retry, check_permis
     name="控制美的风扇",
     description="控制美的风扇的开关、风速、摇头、模式、负离子、显示等"
 )
+@traced
 async def control_midea_fan(
     _ctx: AgentCtx,
-    device_id: int,
+    device_id: int | str,
     power: int | None = None,
     fan_speed: int | None = None,
     oscillate: int | None = None,
@@ -30,7 +32,7 @@ async def control_midea_fan(
     可以控制风扇的电源开关、风速、摇头、模式、负离子、显示、摆风方向等。
 
     Args:
-        device_id (int): 风扇设备的ID，可通过 get_midea_devices() 获取
+        device_id (int | str): 风扇设备的ID，或设备名称/房间+类型（如 "客厅风扇"）
         power (int | None): 电源状态，1=开机，0=关机
         fan_speed (int | None): 风速，1-100档（不同型号档位范围不同）
         oscillate (int | None): 摇头，1=开启，0=关闭
@@ -61,6 +63,10 @@ async def control_midea_fan(
     if not cloud:
         return "error:not_logged_in"
     
+    device_id, error = await device_resolver.resolve(cloud, device_id, 0xFA)
+    if device_id is None:
+        return error
+    
     control = {}
     
     if power is not None:
@@ -6,7 +6,8 @@ from nekro_agent.api.plugin import SandboxMethodType
 from nekro_agent.api.schemas import AgentCtx
 
 from ..plugin import plugin
-from .base import get_cloud_client, send_device_control_with_retry, check_permission
+from ..services import device_resolver
+from .base import get_cloud_client, send_device_control_with_retry, check_permission, traced
 
 
 @plugin.mount_sandbox_method(
@@ -14,9 +15,10 @@ from .base import get_cloud_client, send_device_control_with_retry, check_permis
     name="控制美的加湿器",
     description="控制美的加湿器的开关、湿度、模式、风档、净离子、风干等"
 )
+@traced
 async def control_midea_humidifier(
     _ctx: AgentCtx,
-    device_id: int,
+    device_id: int | str,
     power: int | None = None,
     target_humidity: int | None = None,
     mode: str | None = None,
@@ -30,7 +32,7 @@ async def control_midea_humidifier(
     可以控制加湿器的电源开关、目标湿度、模式、风档、净离子、风干、蜂鸣器等。
 
     Args:
-        device_id (int): 加湿器设备的ID，可通过 get_midea_devices() 获取
+        device_id (int | str): 加湿器设备的ID，或设备名称/房间+类型（如 "客厅加湿器"）
         power (int | None): 电源状态，1=开机，0=关机
         target_humidity (int | None): 目标湿度，范围30-80%
         mode (str | None): 模式，"manual"=手动 "moist_skin"=润肤 "sleep"=睡眠
@@ -61,6 +63,10 @@ async def control_midea_humidifier(
     if not cloud:
         return "error:not_logged_in"
     
+    device_id, error = await device_resolver.resolve(cloud, device_id, 0xFD)
+    if device_id is None:
+        return error
+    
     control = {}
     
     if power is not None:
@@ -6,7 +6,8 @@ from nekro_agent.api.plugin import SandboxMethodType
 from nekro_agent.api.schemas import AgentCtx
 
 from ..plugin import plugin
-from .base import get_cloud_client, send_device_control_with_retry, check_permission
+from ..services import device_resolver
+from .base import get_cloud_client, send_device_control_with_retry, check_permission, traced
 
 
 @plugin.mount_sandbox_method(
@@ -14,9 +15,10 @@ from .base import get_cloud_client, send_device_control_with_retry, check_permis
     name="控制美的灯",
     description="控制美的智能灯的开关、亮度、色温、灯效、颜色等"
 )
+@traced
 async def control_midea_light(
     _ctx: AgentCtx,
-    device_id: int,
+    device_id: int | str,
     power: int | None = None,
     brightness: int | None = None,
     color_temp: int | None = None,
@@ -28,7 +30,7 @@ async def control_midea_light(
     可以控制灯的电源开关、亮度、色温、灯效模式、RGB颜色等。
 
     Args:
-        device_id (int): 灯设备的ID，可通过 get_midea_devices() 获取
+        device_id (int | str): 灯设备的ID，或设备名称/房间+类型（如 "客厅灯"）
         power (int | None): 电源状态，1=开，0=关
         brightness (int | None): 亮度，范围1-100%
         color_temp (int | None): 色温，范围0-100（0=暖光/2700K，100=冷光/6500K）
@@ -60,6 +62,10 @@ async def control_midea_light(
     if not cloud:
         return "error:not_logged_in"
     
+    device_id, error = await device_resolver.resolve(cloud, device_id, 0xE2)
+    if device_id is None:
+        return error
+    
     control = {}
     
     if power is not None:
@@ -0,0 +1,63 @@
+"""
+场景控制器
+"""
+
+from nekro_agent.api.plugin import SandboxMethodType
+from nekro_agent.api.schemas import AgentCtx
+
+from ..midea import json_codec
+from ..plugin import plugin
+from ..services import scene_store
+from .base import get_cloud_client, run_device_controls, check_permission, traced
+
+
+@plugin.mount_sandbox_method(
+    SandboxMethodType.TOOL,
+    name="执行美的场景",
+    description="执行预设的美的智能家居场景（如睡眠、离家），同时控制场景内的所有设备"
+)
+@traced
+async def run_midea_scene(_ctx: AgentCtx, name: str) -> str:
+    """执行预设场景
+
+    场景在插件管理页面中配置，执行时场景内所有设备的控制命令并发发送。
+
+    Args:
+        name (str): 场景名称，如 "睡眠"、"离家"
+
+    Returns:
+        str: JSON对象，键为设备ID，值为该设备的控制结果（"ok" 或 "error:xxx"）；
+            场景不存在时返回 "error:scene_not_found"
+
+    Example:
+        # 执行睡眠场景
+        result = run_midea_scene(name="睡眠")
+    """
+    # 权限检查
+    has_perm, perm_error = await check_permission(_ctx)
+    if not has_perm:
+        return perm_error
+    
+    cloud = await get_cloud_client()
+    if not cloud:
+        return "error:not_logged_in"
+    
+    scene = await scene_store.get(name)
+    if scene is None:
+        return "error:scene_not_found"
+    
+    results = await run_device_controls(cloud, scene.controls)
+    return json_codec.dumps(results)
+
+
+@plugin.mount_prompt_inject_method(
+    name="midea_scene_hint",
+    description="可用的美的场景列表"
+)
+async def inject_scene_hint(_ctx: AgentCtx) -> str:
+    """注入可用场景名称"""
+    scenes = await scene_store.list_scenes()
+    if not scenes:
+        return ""
+    names = "、".join(scene.name for scene in scenes)
+    return f"【美的场景】可用 run_midea_scene(name=...) 执行: {names}"
@@ -6,7 +6,8 @@ from nekro_agent.api.plugin import SandboxMethodType
 from nekro_agent.api.schemas import AgentCtx
 
 from ..plugin import plugin
-from .base import get_cloud_client, send_device_control_with_retry, check_permission
+from ..services import device_resolver
+from .base import get_cloud_client, send_device_control_with_retry, check_permission, traced
 
 
 @plugin.mount_sandbox_method(
@@ -14,9 +15,10 @@ from .base import get_cloud_client, send_device_control_with_retry, check_permis
     name="控制美的热水器",
     description="控制美的热水器的开关、温度、运行模式等"
 )
+@traced
 async def control_midea_water_heater(
     _ctx: AgentCtx,
-    device_id: int,
+    device_id: int | str,
     power: int | None = None,
     target_temperature: int | None = None,
     operation_mode: str | None = None
@@ -26,7 +28,7 @@ async def control_midea_water_heater(
     可以控制热水器的电源开关、目标温度和运行模式。
 
     Args:
-        device_id (int): 热水器设备的ID，可通过 get_midea_devices() 获取
+        device_id (int | str): 热水器设备的ID，或设备名称/房间+类型（如 "客厅热水器"）
         power (int | None): 电源状态，1=开机，0=关机
         target_temperature (int | None): 目标温度，范围35-75°C
         operation_mode (str | None): 运行模式，"normal"=正常 "eco"=节能 "boost"=速热 "vacation"=假期
@@ -53,6 +55,10 @@ async def control_midea_water_heater(
     if not cloud:
         return "error:not_logged_in"
     
+    device_id, error = await device_resolver.resolve(cloud, device_id, 0x40)
+    if device_id is None:
+        return error
+    
     control = {}
     
     if power is not None:
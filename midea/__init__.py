@@ -2,7 +2,54 @@
 美的云模块
 """
 
+from . import json_codec
 from .client import MeijuCloud, ApiResult
+from .models import Appliance, Home
+from .metrics import MetricsRegistry, metrics
+from .tracing import Tracer, tracer
 from .security import MeijuCloudSecurity
+from .transport import SharedTransport, shared_transport
+from .ratelimit import RateLimiterRegistry, background_requests, foreground_requests, rate_limiters
+from .lan import LanDevice, LanError, LanSecurity, get_udpid
+from .discovery import DiscoveredDevice, discover
+from .lan_codec import LAN_CODECS, LanCodec, LanUnsupported
+from .timeouts import (
+    ERROR_CODE_DEADLINE_EXCEEDED,
+    AdaptiveTimeouts,
+    adaptive_timeouts,
+    deadline_remaining,
+    request_deadline,
+)
 
-__all__ = ["MeijuCloud", "MeijuCloudSecurity", "ApiResult"]
+__all__ = [
+    "json_codec",
+    "MeijuCloud",
+    "MeijuCloudSecurity",
+    "ApiResult",
+    "Appliance",
+    "Home",
+    "MetricsRegistry",
+    "metrics",
+    "Tracer",
+    "tracer",
+    "SharedTransport",
+    "shared_transport",
+    "RateLimiterRegistry",
+    "background_requests",
+    "foreground_requests",
+    "rate_limiters",
+    "ERROR_CODE_DEADLINE_EXCEEDED",
+    "AdaptiveTimeouts",
+    "adaptive_timeouts",
+    "deadline_remaining",
+    "request_deadline",
+    "LanDevice",
+    "LanError",
+    "LanSecurity",
+    "get_udpid",
+    "LAN_CODECS",
+    "LanCodec",
+    "LanUnsupported",
+    "DiscoveredDevice",
+    "discover",
+]
@@ -2,17 +2,27 @@
 美的美居云 API 客户端
 """
 
+import asyncio
 import time
 import datetime
-import json
-import traceback
+import logging
 from dataclasses import dataclass
 from secrets import token_hex
 
 import httpx
 
 from ..constants import CLOUD_CONFIG
+from .json_codec import dumps_bytes, loads
+from .lan import get_udpid
+from .metrics import API_ERRORS, API_LATENCY, API_QUEUE_WAIT, API_REQUESTS
+from .models import Appliance, Home, SerialBatch
+from .ratelimit import RateLimiterRegistry, classify_endpoint, rate_limiters
 from .security import MeijuCloudSecurity
+from .timeouts import ERROR_CODE_DEADLINE_EXCEEDED, AdaptiveTimeouts, adaptive_timeouts, deadline_remaining
+from .tracing import tracer
+from .transport import SharedTransport, shared_transport
+
+_logger = logging.getLogger(__name__)
 
 
 # 美的 API 错误码
@@ -22,6 +32,17 @@ ERROR_CODE_TOKEN_INVALID = 40001  # token 无效
 ERROR_CODE_TOKEN_NOT_EXIST = 40002  # token 不存在
 ERROR_CODES_TOKEN_ISSUES = {ERROR_CODE_TOKEN_EXPIRED, ERROR_CODE_TOKEN_INVALID, ERROR_CODE_TOKEN_NOT_EXIST}
 
+# 云端未为设备离线提供固定错误码，按错误信息中的关键字识别
+DEVICE_OFFLINE_KEYWORDS = ("离线", "不在线", "offline")
+
+# 本地错误码对应的请求结果分类（用于指标）
+REQUEST_OUTCOMES = {
+    -1: "network",
+    -2: "parse",
+    ERROR_CODE_DEADLINE_EXCEEDED: "deadline",
+    **{code: "token" for code in ERROR_CODES_TOKEN_ISSUES},
+}
+
 
 @dataclass
 class ApiResult:
@@ -30,11 +51,19 @@ class ApiResult:
     data: dict | None = None
     error_code: int = 0
     error_message: str = ""
+    queue_wait: float = 0.0  # 限流排队等待秒数
+    stale: bool = False  # 数据来自快照或已过新鲜期，正在后台刷新
     
     @property
     def is_token_error(self) -> bool:
         """是否为 token 相关错误（需要刷新凭证）"""
         return self.error_code in ERROR_CODES_TOKEN_ISSUES
+    
+    @property
+    def is_device_offline(self) -> bool:
+        """云端是否报告设备离线"""
+        message = self.error_message.lower()
+        return self.error_code > 0 and any(keyword in message for keyword in DEVICE_OFFLINE_KEYWORDS)
 
 
 class MeijuCloud:
@@ -43,13 +72,23 @@ class MeijuCloud:
     APP_ID = "900"
     APP_VERSION = "8.20.0.2"
 
-    def __init__(self, account: str, password: str):
+    def __init__(
+        self,
+        account: str,
+        password: str,
+        transport: SharedTransport | None = None,
+        limiters: RateLimiterRegistry | None = None,
+        timeouts: AdaptiveTimeouts | None = None,
+    ):
         """
         初始化美的美居云客户端
         
         Args:
             account: 美的账号（手机号或邮箱）
             password: 密码
+            transport: HTTP 传输层（可选），默认使用进程共享连接池
+            limiters: 限流器注册表（可选），默认使用进程共享的账号级限流
+            timeouts: 自适应超时（可选），默认使用进程共享的按接口延迟统计
         """
         self._security = MeijuCloudSecurity(
             login_key=CLOUD_CONFIG["login_key"],
@@ -60,12 +99,28 @@ class MeijuCloud:
         self._account = account
         self._password = password
         self._api_url = CLOUD_CONFIG["api_url"]
+        self._transport = transport or shared_transport
+        self._limiter = (limiters or rate_limiters).get(account)
+        self._timeouts = timeouts or adaptive_timeouts
         
         self._device_id = self._security.get_deviceid(account)
         self._access_token = None
         self._login_id = None
         self._homegroup_id = None
         self._aes_key = None  # 保存用于序列化
+        self._issued_at = 0.0  # token 签发时间（Unix 时间戳）
+
+    @property
+    def access_token(self) -> str | None:
+        """当前访问令牌"""
+        return self._access_token
+
+    @property
+    def token_age(self) -> float:
+        """当前 token 已使用时长（秒），签发时间未知时视为无限大"""
+        if not self._issued_at:
+            return float("inf")
+        return max(0.0, time.time() - self._issued_at)
 
     def get_credentials(self) -> dict | None:
         """获取当前凭证用于存储"""
@@ -76,6 +131,7 @@ class MeijuCloud:
             "aes_key": self._aes_key,
             "account": self._account,
             "password": self._password,  # 保存密码用于自动刷新
+            "issued_at": self._issued_at,
         }
 
     def load_credentials(self, creds: dict) -> bool:
@@ -84,6 +140,7 @@ class MeijuCloud:
             return False
         self._access_token = creds.get("access_token")
         self._aes_key = creds.get("aes_key")
+        self._issued_at = float(creds.get("issued_at") or 0)
         if creds.get("password"):
             self._password = creds.get("password")
         if self._aes_key:
@@ -91,11 +148,51 @@ class MeijuCloud:
         return bool(self._access_token)
 
     async def _api_request(self, endpoint: str, data: dict, header=None, method="POST") -> ApiResult:
-        """发送 API 请求
+        """发送 API 请求（经过账号级限流）
         
         Returns:
             ApiResult: 包含成功状态、数据、错误码等信息
         """
+        remaining = deadline_remaining()
+        if remaining is not None and remaining <= 0:
+            return self._record(endpoint, self._deadline_exceeded())
+        queue_wait = 0.0
+        if self._limiter is not None:
+            try:
+                with tracer.span("rate_limit", endpoint=endpoint):
+                    queue_wait = await asyncio.wait_for(
+                        self._limiter.acquire(classify_endpoint(endpoint)), remaining
+                    )
+            except asyncio.TimeoutError:
+                return self._record(endpoint, self._deadline_exceeded())
+            API_QUEUE_WAIT.observe(queue_wait, endpoint)
+        started = time.monotonic()
+        result = await self._send_request(endpoint, data, header, method)
+        API_LATENCY.observe(time.monotonic() - started, endpoint)
+        result.queue_wait = queue_wait
+        return self._record(endpoint, result)
+
+    @staticmethod
+    def _record(endpoint: str, result: ApiResult) -> ApiResult:
+        """记录请求结果指标"""
+        if result.success:
+            outcome = "ok"
+        else:
+            outcome = REQUEST_OUTCOMES.get(result.error_code, "error")
+            API_ERRORS.inc(endpoint, str(result.error_code))
+        API_REQUESTS.inc(endpoint, outcome)
+        return result
+
+    @staticmethod
+    def _deadline_exceeded() -> ApiResult:
+        return ApiResult(
+            success=False,
+            error_code=ERROR_CODE_DEADLINE_EXCEEDED,
+            error_message="请求超出调用截止时间"
+        )
+
+    async def _send_request(self, endpoint: str, data: dict, header=None, method="POST") -> ApiResult:
+        """签名并发送 API 请求"""
         header = header or {}
         if not data.get("reqId"):
             data["reqId"] = token_hex(16)
@@ -104,8 +201,9 @@ class MeijuCloud:
         
         random = str(int(time.time()))
         url = self._api_url + endpoint
-        dump_data = json.dumps(data)
-        sign = self._security.sign(dump_data, random)
+        with tracer.span("sign", endpoint=endpoint):
+            dump_data = dumps_bytes(data)
+            sign = self._security.sign(dump_data, random)
         
         header.update({
             "content-type": "application/json; charset=utf-8",
@@ -117,21 +215,39 @@ class MeijuCloud:
             header["accesstoken"] = self._access_token
 
         try:
-            import logging
-            logging.debug(f"正在请求 {url}")
-            async with httpx.AsyncClient(timeout=30) as client:
-                r = await client.request(method, url, headers=header, content=dump_data)
-                logging.debug(f"API 响应状态码: {r.status_code}")
-                try:
-                    response = r.json()
-                except Exception as json_err:
-                    return ApiResult(
-                        success=False, 
-                        error_code=-2, 
-                        error_message=f"JSON解析失败 (status={r.status_code}): {json_err}"
-                    )
+            _logger.debug("正在请求 %s", url)
+            client = self._transport.get_client()
+            started = time.monotonic()
+            timeout = self._timeouts.timeout_for(endpoint)
+            request = client.request(
+                method, url, headers=header, content=dump_data,
+                timeout=timeout,
+            )
+            remaining = deadline_remaining()
+            with tracer.span("http", endpoint=endpoint) as span:
+                r = await (request if remaining is None else asyncio.wait_for(request, max(0.001, remaining)))
+                span.set(status=r.status_code)
+            self._timeouts.observe(endpoint, time.monotonic() - started)
+            _logger.debug("API 响应状态码: %s", r.status_code)
+            try:
+                response = loads(r.content)
+            except Exception as json_err:
+                return ApiResult(
+                    success=False, 
+                    error_code=-2, 
+                    error_message=f"JSON解析失败 (status={r.status_code}): {json_err}"
+                )
+        except (asyncio.TimeoutError, httpx.TimeoutException) as e:
+            remaining = deadline_remaining()
+            if remaining is not None and remaining <= 0.05:
+                return self._deadline_exceeded()
+            if isinstance(e, httpx.ReadTimeout):
+                # 等待响应超时：计入延迟统计，使读超时能随云端变慢而放宽；
+                # 连接、连接池等阶段的超时与接口延迟无关，不计入
+                self._timeouts.observe_timeout(endpoint, timeout.read)
+            return ApiResult(success=False, error_code=-1, error_message=f"请求超时: {e!r}")
         except Exception as e:
-            traceback.print_exc()
+            _logger.debug("请求 %s 失败", url, exc_info=True)
             return ApiResult(success=False, error_code=-1, error_message=str(e))
 
         code = int(response.get("code", -1))
@@ -191,6 +307,7 @@ class MeijuCloud:
         if result.success and result.data:
             try:
                 self._access_token = result.data["mdata"]["accessToken"]
+                self._issued_at = time.time()
                 self._aes_key = self._security.aes_decrypt_with_fixed_key(result.data["key"])
                 self._security.set_aes_keys(self._aes_key, None)
                 return True, "登录成功"
@@ -202,13 +319,14 @@ class MeijuCloud:
         """获取家庭列表
         
         Returns:
-            ApiResult: 成功时 data 包含 {home_id: home_name} 字典
+            ApiResult: 成功时 data 包含 {home_id: Home} 字典
         """
         result = await self._api_request("/v1/homegroup/list/get", {})
         if result.success and result.data:
             homes = {}
             for home in result.data.get("homeList", []):
-                homes[int(home["homegroupId"])] = home["name"]
+                home_id = int(home["homegroupId"])
+                homes[home_id] = Home(home_id, home["name"])
             return ApiResult(success=True, data=homes)
         return result
 
@@ -216,34 +334,21 @@ class MeijuCloud:
         """获取设备列表
         
         Returns:
-            ApiResult: 成功时 data 包含设备字典 {device_id: device_info}
+            ApiResult: 成功时 data 包含设备字典 {device_id: Appliance}
         """
         self._homegroup_id = str(home_id)
         result = await self._api_request("/v1/appliance/home/list/get", {"homegroupId": home_id})
         
         if result.success and result.data:
+            # SN 在首次访问时整批解密
+            serials = SerialBatch(self._security, *self._security.aes_keys)
             appliances = {}
             for home in result.data.get("homeList") or []:
                 for room in home.get("roomList") or []:
+                    room_name = room.get("name", "未知房间")
                     for appliance in room.get("applianceList") or []:
-                        try:
-                            sn = ""
-                            if appliance.get("sn"):
-                                sn = self._security.aes_decrypt(appliance.get("sn"))
-                        except:
-                            sn = ""
-                        
-                        device_info = {
-                            "name": appliance.get("name"),
-                            "type": int(appliance.get("type"), 16),
-                            "type_hex": appliance.get("type"),
-                            "sn": sn,
-                            "sn8": appliance.get("sn8", "00000000") or "00000000",
-                            "model": appliance.get("productModel") or appliance.get("sn8", ""),
-                            "online": appliance.get("onlineStatus") == "1",
-                            "room": room.get("name", "未知房间"),
-                        }
-                        appliances[int(appliance["applianceCode"])] = device_info
+                        record = Appliance.from_response(appliance, room_name, serials)
+                        appliances[record.device_id] = record
             return ApiResult(success=True, data=appliances)
         return result
 
@@ -287,3 +392,30 @@ class MeijuCloud:
         if status and isinstance(status, dict):
             data["command"]["status"] = status
         return await self._api_request("/mjl/v1/device/lua/control", data)
+
+    async def get_lan_keys(self, appliance_code: int) -> ApiResult:
+        """
+        获取设备局域网 (V3) 通信所需的 token 与 key
+        
+        Args:
+            appliance_code: 设备 ID
+            
+        Returns:
+            ApiResult: 成功时 data 为 {"token": bytes, "key": bytes}
+        """
+        result = ApiResult(success=False, error_code=-1, error_message="未找到设备密钥")
+        # 不同固件的 udpid 字节序不同，依次尝试
+        for byteorder in ("big", "little"):
+            udpid = get_udpid(appliance_code, byteorder)
+            result = await self._api_request("/v1/iot/secure/getToken", {"udpid": udpid})
+            if not result.success or not result.data:
+                continue
+            for item in result.data.get("tokenlist") or []:
+                if item.get("udpId") == udpid:
+                    return ApiResult(success=True, data={
+                        "token": bytes.fromhex(item["token"]),
+                        "key": bytes.fromhex(item["key"]),
+                    })
+        if result.success:
+            return ApiResult(success=False, error_code=-1, error_message="未找到设备密钥")
+        return result
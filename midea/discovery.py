@@ -0,0 +1,150 @@
+"""
+美的设备局域网发现 - UDP 广播探测
+"""
+
+import asyncio
+import socket
+from dataclasses import dataclass
+from hashlib import md5
+
+from .lan import LAN_PORT, SIGN_KEY, local_decrypt, local_encrypt
+
+# 设备监听的发现端口
+DISCOVERY_PORTS = (6445, 20086)
+
+# 发现请求报文
+DISCOVERY_MSG = bytes([
+    0x5A, 0x5A, 0x01, 0x11, 0x48, 0x00, 0x92, 0x00,
+    0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
+    0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
+    0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
+    0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
+    0x7F, 0x75, 0xBD, 0x6B, 0x3E, 0x4F, 0x8B, 0x76,
+    0x2E, 0x84, 0x9C, 0x6E, 0x57, 0x8D, 0x65, 0x90,
+    0x03, 0x6E, 0x9D, 0x43, 0x42, 0xA5, 0x0F, 0x1F,
+    0x56, 0x9E, 0xB8, 0xEC, 0x91, 0x8E, 0x92, 0xE5,
+])
+
+
+@dataclass
+class DiscoveredDevice:
+    """发现响应中的设备信息"""
+
+    device_id: int
+    host: str
+    port: int
+    sn: str
+    device_type: int | None
+    protocol: int
+
+
+def parse_discovery_response(data: bytes, host: str) -> DiscoveredDevice | None:
+    """解析设备的发现响应，无法识别时返回 None
+
+    Args:
+        data: UDP 响应数据
+        host: 响应来源地址（优先于报文中的 IP，避免 NAT/多网卡导致的错误地址）
+    """
+    protocol = 2
+    if data[:2] == b"\x83\x70":
+        protocol = 3
+        data = data[8:-16]
+    if data[:2] != b"\x5a\x5a" or len(data) <= 56:
+        return None
+    try:
+        reply = local_decrypt(data[40:-16])
+    except ValueError:
+        return None
+    if len(reply) < 41:
+        return None
+
+    ssid = reply[41:41 + reply[40]].decode("utf-8", errors="ignore")
+    device_type = None
+    parts = ssid.split("_")
+    if len(parts) > 1:
+        try:
+            device_type = int(parts[1], 16)
+        except ValueError:
+            pass
+
+    return DiscoveredDevice(
+        device_id=int.from_bytes(data[20:26], "little"),
+        host=host,
+        port=int.from_bytes(reply[4:8], "little") or LAN_PORT,
+        sn=reply[8:40].decode("utf-8", errors="ignore").strip("\x00"),
+        device_type=device_type,
+        protocol=protocol,
+    )
+
+
+def build_discovery_response(
+    device_id: int,
+    host: str,
+    sn: str,
+    device_type: int,
+    port: int = LAN_PORT,
+    protocol: int = 3,
+) -> bytes:
+    """生成发现响应（模拟设备使用）"""
+    ssid = f"midea_{device_type:02x}_{int(device_id) % 10000:04d}".encode()
+    reply = bytearray(bytes(int(x) for x in reversed(host.split("."))))
+    reply += port.to_bytes(4, "little")
+    reply += sn.encode().ljust(32, b"\x00")[:32]
+    reply += bytes([len(ssid)]) + ssid
+    packet = bytearray(40)
+    packet[0:4] = b"\x5a\x5a\x01\x11"
+    packet[20:26] = int(device_id).to_bytes(6, "little")
+    packet += local_encrypt(bytes(reply))
+    packet[4:6] = (len(packet) + 16).to_bytes(2, "little")
+    packet += md5(bytes(packet) + SIGN_KEY).digest()
+    if protocol == 3:
+        return b"\x83\x70" + len(packet).to_bytes(2, "big") + b"\x20\x00\x00\x00" + bytes(packet) + bytes(16)
+    return bytes(packet)
+
+
+class _DiscoveryProtocol(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.devices: dict[int, DiscoveredDevice] = {}
+
+    def datagram_received(self, data: bytes, addr):
+        device = parse_discovery_response(data, addr[0])
+        if device is not None:
+            self.devices[device.device_id] = device
+
+
+async def discover(
+    targets: tuple[str, ...] | list[str] = ("255.255.255.255",),
+    ports: tuple[int, ...] | list[int] = DISCOVERY_PORTS,
+    timeout: float = 3.0,
+    count: int = 2,
+) -> dict[int, DiscoveredDevice]:
+    """向目标地址发送发现请求并收集响应
+
+    Args:
+        targets: 广播地址或单个设备 IP
+        ports: 发现端口
+        timeout: 等待响应的总时长
+        count: 每个目标的发送次数（UDP 可能丢包）
+
+    Returns:
+        {设备ID: DiscoveredDevice}
+    """
+    loop = asyncio.get_running_loop()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    sock.setblocking(False)
+    sock.bind(("0.0.0.0", 0))
+    transport, protocol = await loop.create_datagram_endpoint(_DiscoveryProtocol, sock=sock)
+    try:
+        interval = timeout / max(1, count)
+        for _ in range(max(1, count)):
+            for target in targets:
+                for port in ports:
+                    try:
+                        transport.sendto(DISCOVERY_MSG, (target, port))
+                    except OSError:
+                        pass
+            await asyncio.sleep(interval)
+    finally:
+        transport.close()
+    return protocol.devices
@@ -0,0 +1,65 @@
+"""
+JSON 编解码 - 优先使用 orjson / msgspec，未安装时回退标准库 json
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - 可选依赖
+    msgspec = None
+
+if orjson is not None:
+    JSON_BACKEND = "orjson"
+    DECODE_ERRORS: tuple[type[Exception], ...] = (orjson.JSONDecodeError,)
+
+    def dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def dumps(obj, indent: bool = False) -> str:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=option).decode()
+
+    def loads(data: bytes | str):
+        return orjson.loads(data)
+
+elif msgspec is not None:
+    JSON_BACKEND = "msgspec"
+    DECODE_ERRORS = (msgspec.DecodeError, ValueError)
+    _encoder = msgspec.json.Encoder()
+    _decoder = msgspec.json.Decoder()
+
+    def dumps_bytes(obj) -> bytes:
+        return _encoder.encode(obj)
+
+    def dumps(obj, indent: bool = False) -> str:
+        data = _encoder.encode(obj)
+        if indent:
+            data = msgspec.json.format(data, indent=2)
+        return data.decode()
+
+    def loads(data: bytes | str):
+        return _decoder.decode(data)
+
+else:
+    JSON_BACKEND = "json"
+    DECODE_ERRORS = (ValueError,)
+
+    def dumps_bytes(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+    def dumps(obj, indent: bool = False) -> str:
+        return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None)
+
+    def loads(data: bytes | str):
+        return json.loads(data)
+
+
+dumps_bytes.__doc__ = "序列化为 UTF-8 字节（用于请求体与签名）"
+dumps.__doc__ = "序列化为字符串（非 ASCII 字符原样输出），indent=True 时缩进 2 格"
+loads.__doc__ = "反序列化，失败时抛出 DECODE_ERRORS 中的异常"
@@ -0,0 +1,335 @@
+"""
+美的设备局域网协议 - V3 (8370) 加密帧与 TCP 连接
+"""
+
+import asyncio
+import datetime
+from hashlib import md5, sha256
+
+from Crypto.Cipher import AES
+from Crypto.Random import get_random_bytes
+from Crypto.Util.Padding import pad, unpad
+from Crypto.Util.strxor import strxor
+
+from .tracing import tracer
+
+# 默认局域网端口
+LAN_PORT = 6444
+
+# 8370 消息类型
+MSGTYPE_HANDSHAKE_REQUEST = 0x0
+MSGTYPE_HANDSHAKE_RESPONSE = 0x1
+MSGTYPE_ENCRYPTED_RESPONSE = 0x3
+MSGTYPE_ENCRYPTED_REQUEST = 0x6
+
+# AA 帧消息类型
+FRAME_TYPE_SET = 0x02
+FRAME_TYPE_QUERY = 0x03
+
+# 局域网本地加密/签名密钥
+SIGN_KEY = "xhdiwjnchekd4d512chdjx5d8e4c394D2D7S".encode("ascii")
+LOCAL_AES_KEY = md5(SIGN_KEY).digest()
+
+_ZERO_IV = bytes(16)
+_PACKET_HEADER_SIZE = 40
+_PACKET_SIGN_SIZE = 16
+
+
+class LanError(Exception):
+    """局域网通信失败"""
+
+
+def get_udpid(appliance_code: int, byteorder: str = "big") -> str:
+    """计算设备的 udpid（用于向云端换取局域网 token/key）"""
+    digest = bytearray(sha256(int(appliance_code).to_bytes(6, byteorder)).digest())
+    for i in range(16):
+        digest[i] ^= digest[i + 16]
+    return digest[:16].hex()
+
+
+def local_encrypt(data: bytes) -> bytes:
+    """使用本地固定密钥加密（AES-ECB + PKCS7）"""
+    return AES.new(LOCAL_AES_KEY, AES.MODE_ECB).encrypt(pad(data, 16))
+
+
+def local_decrypt(data: bytes) -> bytes:
+    """使用本地固定密钥解密"""
+    return unpad(AES.new(LOCAL_AES_KEY, AES.MODE_ECB).decrypt(data), 16)
+
+
+def frame_checksum(data: bytes) -> int:
+    """AA 帧校验和"""
+    return (~sum(data) + 1) & 0xFF
+
+
+def build_frame(device_type: int, message_type: int, body: bytes, protocol_version: int = 0) -> bytes:
+    """构建 AA 帧
+
+    结构: 0xAA | 长度 | 设备类型 | 5 字节保留 | 协议版本 | 消息类型 | 消息体 | 校验和
+    """
+    frame = bytearray([
+        0xAA, len(body) + 10, device_type & 0xFF,
+        0x00, 0x00, 0x00, 0x00, 0x00,
+        protocol_version, message_type,
+    ])
+    frame.extend(body)
+    frame.append(frame_checksum(frame[1:]))
+    return bytes(frame)
+
+
+def parse_frame(frame: bytes) -> tuple[int, int, bytes]:
+    """解析 AA 帧
+
+    Returns:
+        (设备类型, 消息类型, 消息体)
+
+    Raises:
+        LanError: 帧格式或校验和错误
+    """
+    if len(frame) < 11 or frame[0] != 0xAA:
+        raise LanError("不是有效的 AA 帧")
+    if frame_checksum(frame[1:-1]) != frame[-1]:
+        raise LanError("AA 帧校验和错误")
+    return frame[2], frame[9], bytes(frame[10:-1])
+
+
+def _packet_time() -> bytes:
+    """V2 数据包时间戳（按两位十进制倒序）"""
+    t = datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")[:16]
+    return bytes(int(t[i:i + 2]) for i in range(len(t) - 2, -1, -2))
+
+
+def build_packet(device_id: int, frame: bytes) -> bytes:
+    """将 AA 帧封装为 0x5A5A 数据包（本地加密 + MD5 签名）"""
+    packet = bytearray(_PACKET_HEADER_SIZE)
+    packet[0:2] = b"\x5a\x5a"
+    packet[2:4] = b"\x01\x11"
+    packet[6:8] = b"\x20\x00"
+    packet[12:20] = _packet_time()
+    packet[20:28] = int(device_id).to_bytes(8, "little")
+    packet.extend(local_encrypt(frame))
+    packet[4:6] = (len(packet) + _PACKET_SIGN_SIZE).to_bytes(2, "little")
+    packet.extend(md5(bytes(packet) + SIGN_KEY).digest())
+    return bytes(packet)
+
+
+def parse_packet(packet: bytes) -> bytes | None:
+    """从 0x5A5A 数据包中取出 AA 帧，心跳等不含帧的数据包返回 None"""
+    if len(packet) <= _PACKET_HEADER_SIZE + _PACKET_SIGN_SIZE or packet[:2] != b"\x5a\x5a":
+        return None
+    payload = packet[_PACKET_HEADER_SIZE:-_PACKET_SIGN_SIZE]
+    if len(payload) % 16:
+        return None
+    return local_decrypt(payload)
+
+
+class LanSecurity:
+    """V3 (8370) 协议的会话加密
+
+    握手后由设备返回的数据与设备 key 计算出会话 tcp_key，
+    之后的请求使用 AES-CBC(tcp_key) 加密并附带 SHA256 签名。
+    编码与解码对称，既可用于客户端也可用于模拟设备。
+    """
+
+    def __init__(self):
+        self._tcp_key: bytes | None = None
+        self._request_count = 0
+
+    @property
+    def tcp_key(self) -> bytes | None:
+        return self._tcp_key
+
+    @tcp_key.setter
+    def tcp_key(self, key: bytes):
+        self._tcp_key = key
+        self._request_count = 0
+
+    @staticmethod
+    def _encrypt(data: bytes, key: bytes) -> bytes:
+        return AES.new(key, AES.MODE_CBC, iv=_ZERO_IV).encrypt(data)
+
+    @staticmethod
+    def _decrypt(data: bytes, key: bytes) -> bytes:
+        return AES.new(key, AES.MODE_CBC, iv=_ZERO_IV).decrypt(data)
+
+    def derive_tcp_key(self, response: bytes, key: bytes) -> bytes:
+        """根据握手响应计算会话密钥
+
+        Args:
+            response: 握手响应负载（64 字节：32 字节密文 + 32 字节签名）
+            key: 从云端获取的设备 key
+
+        Raises:
+            LanError: 认证失败
+        """
+        if response == b"ERROR":
+            raise LanError("设备拒绝认证")
+        if len(response) != 64:
+            raise LanError("握手响应长度错误")
+        plain = self._decrypt(response[:32], key)
+        if sha256(plain).digest() != response[32:]:
+            raise LanError("握手响应签名错误")
+        self.tcp_key = strxor(plain, key)
+        return self._tcp_key
+
+    @staticmethod
+    def handshake_response(key: bytes, tcp_key: bytes) -> bytes:
+        """生成握手响应负载（模拟设备使用）"""
+        plain = strxor(tcp_key, key)
+        return LanSecurity._encrypt(plain, key) + sha256(plain).digest()
+
+    def encode_8370(self, data: bytes, msgtype: int) -> bytes:
+        """编码 8370 帧"""
+        header = bytearray([0x83, 0x70])
+        size, padding = len(data), 0
+        encrypted = msgtype in (MSGTYPE_ENCRYPTED_REQUEST, MSGTYPE_ENCRYPTED_RESPONSE)
+        if encrypted:
+            if (size + 2) % 16:
+                padding = 16 - ((size + 2) & 0xF)
+                data += get_random_bytes(padding)
+            size += padding + 32
+        header += size.to_bytes(2, "big")
+        header += bytes([0x20, (padding << 4) | msgtype])
+        data = self._request_count.to_bytes(2, "big") + data
+        self._request_count = (self._request_count + 1) % 0xFFFF
+        if encrypted:
+            if self._tcp_key is None:
+                raise LanError("尚未完成握手")
+            sign = sha256(bytes(header) + data).digest()
+            data = self._encrypt(data, self._tcp_key) + sign
+        return bytes(header) + data
+
+    def decode_8370(self, data: bytes) -> tuple[list[tuple[int, bytes]], bytes]:
+        """解码 8370 数据流
+
+        Returns:
+            ([(消息类型, 负载), ...], 未完整接收的剩余数据)
+
+        Raises:
+            LanError: 帧格式或签名错误
+        """
+        messages = []
+        while len(data) >= 6:
+            if data[0] != 0x83 or data[1] != 0x70:
+                raise LanError("不是有效的 8370 帧")
+            size = int.from_bytes(data[2:4], "big") + 8
+            if len(data) < size:
+                break
+            header, body, data = data[:6], data[6:size], data[size:]
+            if header[4] != 0x20:
+                raise LanError("8370 帧头错误")
+            padding = header[5] >> 4
+            msgtype = header[5] & 0xF
+            if msgtype in (MSGTYPE_ENCRYPTED_REQUEST, MSGTYPE_ENCRYPTED_RESPONSE):
+                if self._tcp_key is None:
+                    raise LanError("尚未完成握手")
+                sign, body = body[-32:], self._decrypt(body[:-32], self._tcp_key)
+                if sha256(header + body).digest() != sign:
+                    raise LanError("8370 帧签名错误")
+                if padding:
+                    body = body[:-padding]
+            messages.append((msgtype, body[2:]))
+        return messages, data
+
+
+class LanDevice:
+    """单个设备的局域网 V3 连接
+
+    首次请求时建立 TCP 连接并完成握手；连接出错时关闭，下次请求自动重连。
+    同一设备的请求串行执行。
+    """
+
+    def __init__(
+        self,
+        device_id: int,
+        host: str,
+        token: bytes,
+        key: bytes,
+        port: int = LAN_PORT,
+        timeout: float = 3.0,
+    ):
+        self.device_id = int(device_id)
+        self.host = host
+        self.port = port
+        self._token = token
+        self._key = key
+        self._timeout = timeout
+        self._security = LanSecurity()
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._buffer = b""
+        self._lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def _connect(self):
+        """建立连接并握手"""
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self._timeout
+        )
+        self._buffer = b""
+        self._security = LanSecurity()
+        self._writer.write(self._security.encode_8370(self._token, MSGTYPE_HANDSHAKE_REQUEST))
+        await self._writer.drain()
+        response = await asyncio.wait_for(self._reader.read(512), self._timeout)
+        if response == b"ERROR":
+            raise LanError("设备拒绝认证")
+        self._security.derive_tcp_key(response[8:72], self._key)
+
+    async def close(self):
+        """关闭连接"""
+        writer, self._writer, self._reader = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def request(self, frame: bytes, response_body_type: int | None = None) -> bytes:
+        """发送 AA 帧并等待响应
+
+        Args:
+            frame: 请求 AA 帧
+            response_body_type: 期望的响应消息体类型（消息体首字节），None 表示接受任意响应
+
+        Returns:
+            响应 AA 帧的消息体
+
+        Raises:
+            LanError: 连接、认证或响应解析失败
+        """
+        async with self._lock:
+            with tracer.span("lan", device_id=self.device_id):
+                try:
+                    if not self.connected:
+                        await self._connect()
+                    packet = build_packet(self.device_id, frame)
+                    self._writer.write(self._security.encode_8370(packet, MSGTYPE_ENCRYPTED_REQUEST))
+                    await self._writer.drain()
+                    return await asyncio.wait_for(self._read_response(response_body_type), self._timeout)
+                except LanError:
+                    await self.close()
+                    raise
+                except (OSError, asyncio.TimeoutError, ValueError) as e:
+                    await self.close()
+                    raise LanError(f"局域网通信失败: {e!r}") from e
+
+    async def _read_response(self, response_body_type: int | None) -> bytes:
+        """读取直到收到匹配的响应帧（忽略心跳和设备主动上报）"""
+        while True:
+            chunk = await self._reader.read(1024)
+            if not chunk:
+                raise LanError("连接已被设备关闭")
+            messages, self._buffer = self._security.decode_8370(self._buffer + chunk)
+            for _, payload in messages:
+                if payload == b"ERROR":
+                    raise LanError("设备返回错误")
+                frame = parse_packet(payload)
+                if frame is None:
+                    continue
+                _, _, body = parse_frame(frame)
+                if response_body_type is None or (body and body[0] == response_body_type):
+                    return body
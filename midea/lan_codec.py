@@ -0,0 +1,166 @@
+"""
+局域网消息编解码 - 控制字典与设备二进制消息体互转
+
+控制字典沿用云端 lua 接口的参数名（如 power、mode、wind_speed），
+与 controllers/ 中构建的控制命令一致，因此本地与云端路径可以互换。
+"""
+
+from .lan import FRAME_TYPE_QUERY, FRAME_TYPE_SET, build_frame
+
+
+class LanUnsupported(Exception):
+    """控制参数无法通过局域网下发（应回退云端）"""
+
+
+def _crc8(data: bytes) -> int:
+    """美的消息体 CRC8（Dallas/Maxim, 反射多项式 0x8C）"""
+    crc = 0
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x8C if crc & 1 else crc >> 1
+    return crc
+
+
+def _on(value) -> bool:
+    return value == "on" or value == 1 or value is True
+
+
+def _on_off(flag: bool) -> str:
+    return "on" if flag else "off"
+
+
+class LanCodec:
+    """设备类型编解码器基类"""
+
+    device_type: int = 0
+
+    def query_frame(self) -> tuple[bytes, int]:
+        """生成状态查询帧
+
+        Returns:
+            (AA 帧, 期望的响应消息体类型)
+        """
+        raise NotImplementedError
+
+    def control_frame(self, control: dict, status: dict) -> tuple[bytes, int]:
+        """生成控制帧
+
+        Args:
+            control: 控制命令字典
+            status: 设备当前状态（由 decode_status 得到），用于补全未修改的字段
+
+        Raises:
+            LanUnsupported: 包含无法本地下发的参数
+        """
+        raise NotImplementedError
+
+    def decode_status(self, body: bytes) -> dict:
+        """将响应消息体解码为状态字典"""
+        raise NotImplementedError
+
+
+class ACCodec(LanCodec):
+    """空调 (0xAC) 编解码器"""
+
+    device_type = 0xAC
+
+    QUERY_BODY_TYPE = 0x41
+    SET_BODY_TYPE = 0x40
+    STATUS_BODY_TYPE = 0xC0
+
+    MODES = {"auto": 1, "cool": 2, "dry": 3, "heat": 4, "fan": 5}
+    MODE_NAMES = {v: k for k, v in MODES.items()}
+
+    # 可通过通用设置消息下发的参数
+    SUPPORTED_KEYS = frozenset({
+        "power", "mode", "temperature", "small_temperature", "wind_speed",
+        "wind_swing_ud", "wind_swing_lr", "eco", "strong_wind",
+        "comfort_power_save", "ptc", "dry",
+    })
+
+    def __init__(self):
+        self._message_id = 0
+
+    def _body(self, body_type: int, payload: bytes) -> bytes:
+        """补全消息体类型、消息序号与 CRC"""
+        self._message_id = self._message_id % 254 + 1
+        body = bytearray([body_type]) + payload + bytearray([self._message_id])
+        body.append(_crc8(body))
+        return bytes(body)
+
+    def query_frame(self) -> tuple[bytes, int]:
+        payload = bytes([0x81, 0x00, 0xFF]) + bytes(17)
+        body = self._body(self.QUERY_BODY_TYPE, payload)
+        return build_frame(self.device_type, FRAME_TYPE_QUERY, body), self.STATUS_BODY_TYPE
+
+    def control_frame(self, control: dict, status: dict) -> tuple[bytes, int]:
+        unsupported = set(control) - self.SUPPORTED_KEYS
+        if unsupported:
+            raise LanUnsupported(f"不支持本地下发的参数: {', '.join(sorted(unsupported))}")
+        state = {**status, **control}
+
+        mode = self.MODES.get(state.get("mode"), 1)
+        temperature = int(state.get("temperature", 26))
+        half = 0x10 if state.get("small_temperature") else 0
+        boost = _on(state.get("strong_wind"))
+
+        payload = bytes([
+            (0x01 if _on(state.get("power")) else 0) | 0x40,  # 电源 | 提示音
+            ((mode << 5) & 0xE0) | ((temperature - 16) & 0x0F) | half,
+            int(state.get("wind_speed", 102)) & 0x7F,
+            0x00, 0x00, 0x00,
+            0x30 | (0x0C if _on(state.get("wind_swing_ud")) else 0) | (0x03 if _on(state.get("wind_swing_lr")) else 0),
+            0x20 if boost else 0,
+            (0x04 if _on(state.get("dry")) else 0) | (0x08 if _on(state.get("ptc")) else 0) | (0x80 if _on(state.get("eco")) else 0),
+            0x02 if boost else 0,
+            0x00, 0x00, 0x00, 0x00,
+            0x00, 0x00,
+            0x00,
+            0x00, 0x00, 0x00,
+            0x00,
+            0x01 if _on(state.get("comfort_power_save")) else 0,
+        ])
+        body = self._body(self.SET_BODY_TYPE, payload)
+        return build_frame(self.device_type, FRAME_TYPE_SET, body), self.STATUS_BODY_TYPE
+
+    @staticmethod
+    def _temperature(raw: int, decimal: int) -> float | None:
+        if raw == 0xFF:
+            return None
+        integer = int((raw - 50) / 2)
+        return integer + decimal * 0.1 if raw > 49 else integer - decimal * 0.1
+
+    def decode_status(self, body: bytes) -> dict:
+        if len(body) < 16 or body[0] != self.STATUS_BODY_TYPE:
+            raise ValueError("不是空调状态消息")
+        status = {
+            "power": _on_off(body[1] & 0x01),
+            "mode": self.MODE_NAMES.get((body[2] & 0xE0) >> 5, "auto"),
+            "temperature": (body[2] & 0x0F) + 16,
+            "small_temperature": 5 if body[2] & 0x10 else 0,
+            "wind_speed": body[3] & 0x7F,
+            "wind_swing_ud": _on_off(body[7] & 0x0C),
+            "wind_swing_lr": _on_off(body[7] & 0x03),
+            "strong_wind": _on_off((body[8] & 0x20) or (body[10] & 0x02)),
+            "dry": _on_off(body[9] & 0x04),
+            "ptc": _on_off(body[9] & 0x08),
+            "eco": _on_off(body[9] & 0x10),
+            "comfort_power_save": _on_off(len(body) >= 24 and body[22] & 0x01),
+        }
+        decimals = body[15] if len(body) > 20 else 0
+        indoor = self._temperature(body[11], decimals & 0x0F)
+        if indoor is not None:
+            status["indoor_temperature"] = indoor
+        outdoor = self._temperature(body[12], (decimals & 0xF0) >> 4)
+        if outdoor is not None:
+            status["outdoor_temperature"] = outdoor
+        return status
+
+
+# 支持局域网控制的设备类型，其余类型始终走云端。
+# 风扇 (0xFA)、除湿机 (0xA1)、加湿器 (0xFD)、灯 (0xE2) 与热水器 (0x40) 的编解码器
+# 需对照真机报文逐一验证后再加入，在此之前这些设备保持云端控制（待办见 README「局域网控制待办」）。
+LAN_CODECS: dict[int, type[LanCodec]] = {
+    ACCodec.device_type: ACCodec,
+}
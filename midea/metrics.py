@@ -0,0 +1,225 @@
+"""
+运行指标 - 计数器与延迟直方图，输出 Prometheus 文本格式
+"""
+
+import bisect
+
+# 默认延迟分桶（秒）
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """带标签的计数器"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0):
+        """计数加一（或 amount）"""
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0.0)
+
+    def total(self) -> float:
+        return sum(self._values.values())
+
+    def items(self) -> list[tuple[tuple, float]]:
+        return list(self._values.items())
+
+    def render(self) -> list[str]:
+        return [
+            f"{self.name}{_labels(self.label_names, labels)} {value:g}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+
+class Histogram:
+    """带标签的直方图"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.buckets = tuple(sorted(buckets))
+        # 标签 -> [各分桶计数..., 溢出计数, 总和]
+        self._values: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, *labels):
+        """记录一次观测值"""
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [0.0] * (len(self.buckets) + 2)
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def summary(self, *labels) -> dict:
+        """观测次数、平均值与分桶估算的 p50/p95"""
+        series = self._values.get(labels)
+        if not series:
+            return {"count": 0, "avg": 0.0, "p50": 0.0, "p95": 0.0}
+        count = sum(series[:-1])
+        return {
+            "count": int(count),
+            "avg": series[-1] / count,
+            "p50": self._quantile(series, count, 0.5),
+            "p95": self._quantile(series, count, 0.95),
+        }
+
+    def _quantile(self, series: list[float], count: float, q: float) -> float:
+        """取包含该分位数的分桶上界（溢出桶返回最大上界）"""
+        target = q * count
+        cumulative = 0.0
+        for bound, n in zip(self.buckets, series):
+            cumulative += n
+            if cumulative >= target:
+                return bound
+        return self.buckets[-1]
+
+    def label_values(self) -> list[tuple]:
+        return list(self._values)
+
+    def render(self) -> list[str]:
+        lines = []
+        for labels, series in sorted(self._values.items()):
+            cumulative = 0.0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                le = _labels(self.label_names, labels, 'le="%g"' % bound)
+                lines.append(f"{self.name}_bucket{le} {cumulative:g}")
+            cumulative += series[len(self.buckets)]
+            le = _labels(self.label_names, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {cumulative:g}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {series[-1]:g}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative:g}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表（同名指标只创建一次）"""
+
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram] = {}
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = Counter(name, help, labels)
+        return metric
+
+    def histogram(
+        self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = Histogram(name, help, labels, buckets)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus 文本格式"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# 全局指标注册表
+metrics = MetricsRegistry()
+
+# 云端接口
+API_REQUESTS = metrics.counter(
+    "midea_api_requests_total", "美的云接口请求数", ("endpoint", "result")
+)
+API_LATENCY = metrics.histogram(
+    "midea_api_request_duration_seconds", "美的云接口请求耗时（不含限流排队）", ("endpoint",)
+)
+API_ERRORS = metrics.counter(
+    "midea_api_errors_total", "美的云接口错误码计数", ("endpoint", "code")
+)
+API_QUEUE_WAIT = metrics.histogram(
+    "midea_api_queue_wait_seconds", "账号级限流排队耗时", ("endpoint",)
+)
+TOKEN_REFRESHES = metrics.counter(
+    "midea_token_refresh_total", "凭证刷新次数", ("result",)
+)
+
+# 设备控制
+CONTROL_COMMANDS = metrics.counter(
+    "midea_control_commands_total", "设备控制命令数", ("result",)
+)
+CONTROL_LATENCY = metrics.histogram(
+    "midea_control_duration_seconds", "设备控制总耗时（含合并、重试）"
+)
+CONTROL_RETRIES = metrics.counter(
+    "midea_control_retries_total", "设备控制重试次数", ("reason",)
+)
+BREAKER_EVENTS = metrics.counter(
+    "midea_breaker_events_total", "设备熔断器事件", ("event",)
+)
+
+# 缓存
+CACHE_LOOKUPS = metrics.counter(
+    "midea_cache_lookups_total", "缓存查询结果", ("cache", "result")
+)
+
+
+def summary() -> dict:
+    """Web 面板使用的指标摘要"""
+    endpoints = {}
+    for (endpoint, outcome), count in API_REQUESTS.items():
+        item = endpoints.setdefault(endpoint, {"endpoint": endpoint, "requests": 0, "errors": 0})
+        item["requests"] += int(count)
+        if outcome != "ok":
+            item["errors"] += int(count)
+    for endpoint, item in endpoints.items():
+        latency = API_LATENCY.summary(endpoint)
+        item.update(avg=latency["avg"], p95=latency["p95"])
+
+    caches = {}
+    for (cache, result), count in CACHE_LOOKUPS.items():
+        caches.setdefault(cache, {"hit": 0, "stale": 0, "miss": 0})[result] = int(count)
+    for item in caches.values():
+        total = item["hit"] + item["stale"] + item["miss"]
+        item["hit_ratio"] = (item["hit"] + item["stale"]) / total if total else 0.0
+
+    control_latency = CONTROL_LATENCY.summary()
+    return {
+        "endpoints": sorted(endpoints.values(), key=lambda i: i["endpoint"]),
+        "token_refresh": {"ok": int(TOKEN_REFRESHES.value("ok")), "failed": int(TOKEN_REFRESHES.value("failed"))},
+        "control": {
+            "total": int(CONTROL_COMMANDS.total()),
+            "ok": int(CONTROL_COMMANDS.value("ok")),
+            "avg": control_latency["avg"],
+            "p95": control_latency["p95"],
+            "results": {labels[0]: int(n) for labels, n in CONTROL_COMMANDS.items()},
+            "retries": {labels[0]: int(n) for labels, n in CONTROL_RETRIES.items()},
+        },
+        "breaker": {labels[0]: int(n) for labels, n in BREAKER_EVENTS.items()},
+        "caches": caches,
+    }
@@ -0,0 +1,136 @@
+"""
+设备清单记录 - 紧凑的家庭与设备类型
+"""
+
+import sys
+
+from .security import MeijuCloudSecurity
+
+
+def _intern(value) -> str:
+    """驻留常见的重复字符串（房间名、类型码、型号等）"""
+    return sys.intern(value) if isinstance(value, str) else ""
+
+
+class Home:
+    """家庭"""
+
+    __slots__ = ("home_id", "name")
+
+    def __init__(self, home_id: int, name: str):
+        self.home_id = home_id
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f"Home({self.home_id}, {self.name!r})"
+
+    def __str__(self) -> str:
+        return self.name
+
+    def to_dict(self) -> dict:
+        return {"id": self.home_id, "name": self.name}
+
+
+class SerialBatch:
+    """同一次设备列表响应中的加密 SN
+
+    首次读取任一设备的 SN 时整批解密（一次 AES 调用），之后直接返回结果。
+    解密密钥在创建时固定，不受之后重新登录的影响。
+    """
+
+    __slots__ = ("_security", "_key", "_iv", "_encrypted", "_decrypted")
+
+    def __init__(self, security: MeijuCloudSecurity, key, iv=None):
+        self._security = security
+        self._key = key
+        self._iv = iv
+        self._encrypted: list[str] = []
+        self._decrypted: list[str] | None = None
+
+    def add(self, encrypted: str) -> int:
+        """登记一个加密 SN，返回其序号"""
+        self._encrypted.append(encrypted)
+        return len(self._encrypted) - 1
+
+    def get(self, index: int) -> str:
+        if self._decrypted is None:
+            try:
+                decrypted = self._security.aes_decrypt_many(self._encrypted, self._key, self._iv)
+            except ValueError:
+                decrypted = [None] * len(self._encrypted)
+            self._decrypted = [sn or "" for sn in decrypted]
+            self._encrypted = []
+        return self._decrypted[index]
+
+
+class Appliance:
+    """设备记录
+
+    sn 在首次访问时才解密；其余字段在解析时确定。
+    """
+
+    __slots__ = ("device_id", "name", "type", "type_hex", "sn8", "model", "online", "room", "_serials", "_sn_index")
+
+    def __init__(
+        self,
+        device_id: int,
+        name: str,
+        type: int,
+        type_hex: str,
+        sn8: str,
+        model: str,
+        online: bool,
+        room: str,
+        serials: SerialBatch | None = None,
+        sn_index: int = -1,
+    ):
+        self.device_id = device_id
+        self.name = name
+        self.type = type
+        self.type_hex = type_hex
+        self.sn8 = sn8
+        self.model = model
+        self.online = online
+        self.room = room
+        self._serials = serials
+        self._sn_index = sn_index
+
+    @classmethod
+    def from_response(cls, appliance: dict, room_name: str, serials: SerialBatch) -> "Appliance":
+        """由 /v1/appliance/home/list/get 响应中的设备项创建"""
+        sn8 = appliance.get("sn8", "00000000") or "00000000"
+        sn_index = serials.add(appliance["sn"]) if appliance.get("sn") else -1
+        return cls(
+            device_id=int(appliance["applianceCode"]),
+            name=appliance.get("name"),
+            type=int(appliance.get("type"), 16),
+            type_hex=_intern(appliance.get("type")),
+            sn8=_intern(sn8),
+            model=_intern(appliance.get("productModel") or appliance.get("sn8", "")),
+            online=appliance.get("onlineStatus") == "1",
+            room=_intern(room_name),
+            serials=serials if sn_index >= 0 else None,
+            sn_index=sn_index,
+        )
+
+    @property
+    def sn(self) -> str:
+        """设备序列号（首次访问时解密，无法解密时为空字符串）"""
+        if self._serials is None:
+            return ""
+        return self._serials.get(self._sn_index)
+
+    def __repr__(self) -> str:
+        return f"Appliance({self.device_id}, {self.name!r}, type={self.type_hex})"
+
+    def to_dict(self) -> dict:
+        """转换为字典（不含 sn，避免不必要的解密）"""
+        return {
+            "id": self.device_id,
+            "name": self.name,
+            "type": self.type,
+            "type_hex": self.type_hex,
+            "model": self.model,
+            "online": self.online,
+            "room": self.room,
+        }
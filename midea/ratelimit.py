@@ -0,0 +1,232 @@
+"""
+美的云请求限流 - 账号级令牌桶与优先级调度
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+
+# 接口分类
+ENDPOINT_LOGIN = "login"
+ENDPOINT_LISTING = "listing"
+ENDPOINT_STATUS = "status"
+ENDPOINT_CONTROL = "control"
+ENDPOINT_OTHER = "other"
+
+ENDPOINT_CLASSES = {
+    "/v1/user/login/id/get": ENDPOINT_LOGIN,
+    "/mj/user/login": ENDPOINT_LOGIN,
+    "/v1/homegroup/list/get": ENDPOINT_LISTING,
+    "/v1/appliance/home/list/get": ENDPOINT_LISTING,
+    "/mjl/v1/device/status/lua/get": ENDPOINT_STATUS,
+    "/mjl/v1/device/lua/control": ENDPOINT_CONTROL,
+}
+
+# 各分类的 (每秒速率, 桶容量)
+CLASS_LIMITS = {
+    ENDPOINT_LOGIN: (0.2, 2),
+    ENDPOINT_LISTING: (2.0, 5),
+    ENDPOINT_STATUS: (5.0, 10),
+    ENDPOINT_CONTROL: (5.0, 10),
+    ENDPOINT_OTHER: (2.0, 5),
+}
+
+# 优先级：数值越小越先获得账号级令牌
+PRIORITY_CONTROL = 0
+PRIORITY_INTERACTIVE = 1
+PRIORITY_LISTING = 2
+# 后台任务（轮询、预热等）在默认优先级上追加的偏移
+PRIORITY_BACKGROUND_OFFSET = 10
+
+DEFAULT_PRIORITIES = {
+    ENDPOINT_LOGIN: PRIORITY_CONTROL,
+    ENDPOINT_CONTROL: PRIORITY_CONTROL,
+    ENDPOINT_STATUS: PRIORITY_INTERACTIVE,
+    ENDPOINT_LISTING: PRIORITY_LISTING,
+    ENDPOINT_OTHER: PRIORITY_LISTING,
+}
+
+_background: contextvars.ContextVar[bool] = contextvars.ContextVar("midea_background_request", default=False)
+
+
+@contextmanager
+def background_requests():
+    """将当前上下文中发起的请求标记为后台流量（让位于交互请求）"""
+    token = _background.set(True)
+    try:
+        yield
+    finally:
+        _background.reset(token)
+
+
+@contextmanager
+def foreground_requests():
+    """将当前上下文中发起的请求恢复为前台流量（如被交互请求等待的登录）"""
+    token = _background.set(False)
+    try:
+        yield
+    finally:
+        _background.reset(token)
+
+
+def classify_endpoint(endpoint: str) -> str:
+    """获取接口分类"""
+    return ENDPOINT_CLASSES.get(endpoint, ENDPOINT_OTHER)
+
+
+class TokenBucket:
+    """令牌桶"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self) -> float:
+        """获得一个令牌还需等待的秒数，0 表示可立即获取"""
+        self._refill()
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def consume(self):
+        """消耗一个令牌"""
+        self._tokens -= 1
+
+
+class _WaitStats:
+    """排队等待统计"""
+
+    __slots__ = ("count", "total", "max", "last")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def record(self, wait: float):
+        self.count += 1
+        self.total += wait
+        self.max = max(self.max, wait)
+        self.last = wait
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_wait": self.total / self.count if self.count else 0.0,
+            "max_wait": self.max,
+            "last_wait": self.last,
+        }
+
+
+class AccountRateLimiter:
+    """单个账号的限流器
+
+    请求先按接口分类通过各自的令牌桶，再进入账号级令牌桶的优先级队列：
+    控制命令优先于状态查询，状态查询优先于列表请求，后台流量排在最后。
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self._account_bucket = TokenBucket(rate, burst)
+        self._class_buckets = {cls: TokenBucket(r, c) for cls, (r, c) in CLASS_LIMITS.items()}
+        self._class_locks = {cls: asyncio.Lock() for cls in CLASS_LIMITS}
+        self._queue: list = []
+        self._seq = itertools.count()
+        self._stats = {cls: _WaitStats() for cls in CLASS_LIMITS}
+
+    async def acquire(self, endpoint_class: str) -> float:
+        """获取发送许可
+
+        Returns:
+            排队等待的秒数
+        """
+        start = time.monotonic()
+        priority = DEFAULT_PRIORITIES.get(endpoint_class, PRIORITY_LISTING)
+        if _background.get():
+            priority += PRIORITY_BACKGROUND_OFFSET
+
+        # 分类令牌桶（同分类内先到先得）
+        bucket = self._class_buckets[endpoint_class]
+        async with self._class_locks[endpoint_class]:
+            while (wait := bucket.wait_time()) > 0:
+                await asyncio.sleep(wait)
+            bucket.consume()
+
+        await self._acquire_account(priority)
+
+        waited = time.monotonic() - start
+        self._stats[endpoint_class].record(waited)
+        return waited
+
+    async def _acquire_account(self, priority: int):
+        """按优先级获取账号级令牌"""
+        entry = [priority, next(self._seq), asyncio.get_running_loop().create_future()]
+        heapq.heappush(self._queue, entry)
+        try:
+            while True:
+                if self._queue[0] is entry:
+                    wait = self._account_bucket.wait_time()
+                    if wait <= 0:
+                        self._account_bucket.consume()
+                        return
+                    await asyncio.sleep(wait)
+                else:
+                    await entry[2]
+                    entry[2] = asyncio.get_running_loop().create_future()
+        finally:
+            self._queue.remove(entry)
+            heapq.heapify(self._queue)
+            # 唤醒新的队首
+            if self._queue and not self._queue[0][2].done():
+                self._queue[0][2].set_result(None)
+
+    def stats(self) -> dict:
+        """各分类的排队等待统计"""
+        return {
+            "queued": len(self._queue),
+            "classes": {cls: s.to_dict() for cls, s in self._stats.items()},
+        }
+
+
+class RateLimiterRegistry:
+    """按账号管理限流器"""
+
+    def __init__(self, rate: float = 10.0, burst: float = 20.0):
+        self._limiters: dict[str, AccountRateLimiter] = {}
+        self.configure(rate, burst)
+
+    def configure(self, rate: float = 10.0, burst: float = 20.0):
+        """更新账号级速率，rate <= 0 表示不限流
+
+        仅对之后创建的限流器生效。
+        """
+        self._rate = rate
+        self._burst = max(1.0, burst)
+
+    def get(self, account: str) -> AccountRateLimiter | None:
+        """获取账号的限流器，未启用限流时返回 None"""
+        if self._rate <= 0:
+            return None
+        limiter = self._limiters.get(account)
+        if limiter is None:
+            limiter = AccountRateLimiter(self._rate, self._burst)
+            self._limiters[account] = limiter
+        return limiter
+
+    def stats(self) -> dict:
+        """所有账号的排队等待统计"""
+        return {account: limiter.stats() for account, limiter in self._limiters.items()}
+
+
+# 默认限流器注册表
+rate_limiters = RateLimiterRegistry()
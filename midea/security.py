@@ -20,11 +20,16 @@ class MeijuCloudSecurity:
         self._hmac_key = hmac_key
         self._aes_key = None
         self._aes_iv = None
+        self._ecb = None
+        # 预先计算已写入 iot_key 的 HMAC 状态，每次签名复制后继续写入
+        self._sign_hmac = hmac.new(hmac_key.encode("ascii"), iot_key.encode("ascii"), sha256)
 
-    def sign(self, data: str, random: str) -> str:
-        """生成 API 请求签名"""
-        msg = self._iot_key + data + random
-        return hmac.new(self._hmac_key.encode("ascii"), msg.encode("ascii"), sha256).hexdigest()
+    def sign(self, data: str | bytes, random: str) -> str:
+        """生成 API 请求签名（data 为请求体，可直接传入序列化后的字节）"""
+        h = self._sign_hmac.copy()
+        h.update(data if isinstance(data, bytes) else data.encode("ascii"))
+        h.update(random.encode("ascii"))
+        return h.hexdigest()
 
     def encrypt_password(self, login_id: str, password: str) -> str:
         """加密密码"""
@@ -56,12 +61,19 @@ class MeijuCloudSecurity:
             iv = iv.encode("ascii")
         self._aes_key = key
         self._aes_iv = iv
+        # ECB 无链式状态，同一密钥的解密上下文可重复使用
+        self._ecb = AES.new(key, AES.MODE_ECB) if key is not None and iv is None else None
+
+    @property
+    def aes_keys(self) -> tuple:
+        """当前的 (AES 密钥, IV)"""
+        return self._aes_key, self._aes_iv
 
     def aes_decrypt_with_fixed_key(self, data: str) -> str:
         """使用固定密钥解密"""
         if isinstance(data, str):
             data = bytes.fromhex(data)
-        return unpad(AES.new(self.FIXED_KEY, AES.MODE_ECB).decrypt(data), len(self.FIXED_KEY)).decode()
+        return unpad(_FIXED_ECB.decrypt(data), len(self.FIXED_KEY)).decode()
 
     def aes_decrypt(self, data, key=None, iv=None) -> str:
         """AES 解密"""
@@ -73,6 +85,53 @@ class MeijuCloudSecurity:
         if isinstance(data, str):
             data = bytes.fromhex(data)
         if aes_iv is None:
-            return unpad(AES.new(aes_key, AES.MODE_ECB).decrypt(data), len(aes_key)).decode()
+            cipher = self._ecb if key is None and self._ecb is not None else AES.new(aes_key, AES.MODE_ECB)
+            return unpad(cipher.decrypt(data), len(aes_key)).decode()
         else:
             return unpad(AES.new(aes_key, AES.MODE_CBC, iv=aes_iv).decrypt(data), len(aes_key)).decode()
+
+    def aes_decrypt_many(self, items, key=None, iv=None) -> list[str | None]:
+        """批量解密（如设备列表中的全部 SN），无法解密的项返回 None
+
+        使用 ECB 密钥时各项密文拼接后一次解密，再按原长度切分去除填充。
+        """
+        aes_key = key if key is not None else self._aes_key
+        aes_iv = iv if iv is not None else self._aes_iv
+        if aes_key is None:
+            raise ValueError("Decrypt needs a key")
+        if aes_iv is not None:
+            results = []
+            for item in items:
+                try:
+                    results.append(self.aes_decrypt(item, aes_key, aes_iv))
+                except (ValueError, UnicodeDecodeError):
+                    results.append(None)
+            return results
+        ecb = self._ecb if self._ecb is not None and aes_key == self._aes_key else AES.new(aes_key, AES.MODE_ECB)
+
+        chunks: list[bytes | None] = []
+        for item in items:
+            try:
+                data = bytes.fromhex(item) if isinstance(item, str) else bytes(item)
+            except (TypeError, ValueError):
+                data = None
+            chunks.append(data if data and len(data) % 16 == 0 else None)
+
+        plain = ecb.decrypt(b"".join(c for c in chunks if c is not None))
+        results = []
+        offset = 0
+        block_size = len(aes_key)
+        for chunk in chunks:
+            if chunk is None:
+                results.append(None)
+                continue
+            part = plain[offset:offset + len(chunk)]
+            offset += len(chunk)
+            try:
+                results.append(unpad(part, block_size).decode())
+            except (ValueError, UnicodeDecodeError):
+                results.append(None)
+        return results
+
+
+_FIXED_ECB = AES.new(MeijuCloudSecurity.FIXED_KEY, AES.MODE_ECB)
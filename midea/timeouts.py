@@ -0,0 +1,134 @@
+"""
+美的云请求超时 - 按接口自适应超时与调用截止时间
+"""
+
+import contextvars
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import httpx
+
+# 截止时间已过的错误码
+ERROR_CODE_DEADLINE_EXCEEDED = -3
+
+# 计算分位数所需的最少样本数，不足时使用最大读超时
+MIN_SAMPLES = 20
+# 每个接口保留的延迟样本数
+SAMPLE_SIZE = 200
+
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("midea_request_deadline", default=None)
+
+
+@contextmanager
+def request_deadline(seconds: float | None):
+    """为当前上下文中的所有云端请求设置整体截止时间
+
+    Args:
+        seconds: 从现在起的可用秒数，None 表示取消截止时间
+    """
+    token = _deadline.set(None if seconds is None else time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def deadline_remaining() -> float | None:
+    """当前截止时间的剩余秒数，未设置时返回 None"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+class AdaptiveTimeouts:
+    """按接口自适应的请求超时
+
+    连接超时固定；读超时取该接口近期延迟的高分位数乘以系数，
+    并限制在 [最小读超时, 最大读超时] 区间内。
+    存在调用截止时间时，超时不超过剩余时间。
+
+    超时的请求以所用的读超时作为延迟样本记录，并且连续超时时读超时逐次翻倍
+    （直到最大读超时），避免云端变慢后接口被锁定在过短的超时上。
+    """
+
+    def __init__(
+        self,
+        connect: float = 5.0,
+        read_min: float = 3.0,
+        read_max: float = 30.0,
+        multiplier: float = 3.0,
+        percentile: float = 0.99,
+    ):
+        self._samples: dict[str, deque] = {}
+        self._consecutive_timeouts: dict[str, int] = {}
+        self.configure(connect, read_min, read_max, multiplier, percentile)
+
+    def configure(
+        self,
+        connect: float = 5.0,
+        read_min: float = 3.0,
+        read_max: float = 30.0,
+        multiplier: float = 3.0,
+        percentile: float = 0.99,
+    ):
+        """更新超时参数"""
+        self._connect = connect
+        self._read_min = min(read_min, read_max)
+        self._read_max = read_max
+        self._multiplier = multiplier
+        self._percentile = percentile
+
+    def observe(self, endpoint: str, seconds: float):
+        """记录一次成功请求的耗时"""
+        samples = self._samples.get(endpoint)
+        if samples is None:
+            samples = self._samples[endpoint] = deque(maxlen=SAMPLE_SIZE)
+        samples.append(seconds)
+        self._consecutive_timeouts.pop(endpoint, None)
+
+    def observe_timeout(self, endpoint: str, timeout: float):
+        """记录一次超时的请求
+
+        Args:
+            timeout: 本次请求使用的读超时，作为延迟样本的下限记录
+        """
+        samples = self._samples.get(endpoint)
+        if samples is None:
+            samples = self._samples[endpoint] = deque(maxlen=SAMPLE_SIZE)
+        samples.append(timeout)
+        self._consecutive_timeouts[endpoint] = self._consecutive_timeouts.get(endpoint, 0) + 1
+
+    def percentile(self, endpoint: str, p: float) -> float | None:
+        """接口近期延迟的分位数，样本不足时返回 None"""
+        samples = self._samples.get(endpoint)
+        if not samples or len(samples) < MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    def read_timeout(self, endpoint: str) -> float:
+        """接口当前的读超时"""
+        p = self.percentile(endpoint, self._percentile)
+        if p is None:
+            return self._read_max
+        read = max(self._read_min, p * self._multiplier)
+        # 连续超时时逐次放宽
+        read *= 2 ** self._consecutive_timeouts.get(endpoint, 0)
+        return min(self._read_max, read)
+
+    def timeout_for(self, endpoint: str) -> httpx.Timeout:
+        """生成本次请求的超时设置（受调用截止时间约束）"""
+        connect = self._connect
+        read = self.read_timeout(endpoint)
+        remaining = deadline_remaining()
+        if remaining is not None:
+            remaining = max(0.001, remaining)
+            connect = min(connect, remaining)
+            read = min(read, remaining)
+        return httpx.Timeout(connect=connect, read=read, write=read, pool=connect)
+
+
+# 默认自适应超时实例
+adaptive_timeouts = AdaptiveTimeouts()
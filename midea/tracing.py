@@ -0,0 +1,182 @@
+"""
+调用追踪 - 沙箱调用各阶段的耗时 span，保存在有界环形缓冲中
+"""
+
+import contextvars
+import itertools
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# 单条追踪最多记录的 span 数
+MAX_SPANS_PER_TRACE = 200
+
+_current: contextvars.ContextVar["Trace | None"] = contextvars.ContextVar("midea_trace", default=None)
+_ids = itertools.count(1)
+
+
+class Trace:
+    """一次沙箱调用的追踪记录"""
+
+    __slots__ = ("trace_id", "name", "attrs", "started_at", "_start", "duration", "error", "spans")
+
+    def __init__(self, name: str, attrs: dict):
+        self.trace_id = next(_ids)
+        self.name = name
+        self.attrs = attrs
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration: float | None = None
+        self.error: str | None = None
+        self.spans: list[dict] = []
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            **self.attrs,
+            "started_at": self.started_at,
+            "duration_ms": None if self.duration is None else round(self.duration * 1000, 3),
+            "error": self.error,
+            "spans": list(self.spans),
+        }
+
+
+class _Span:
+    """正在计时的 span"""
+
+    __slots__ = ("_trace", "_name", "_attrs", "_start")
+
+    def __init__(self, trace: Trace, name: str, attrs: dict):
+        self._trace = trace
+        self._name = name
+        self._attrs = attrs
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        trace = self._trace
+        # 已结束的追踪不再追加（防止遗留的后台任务改写缓冲中的记录）
+        if trace.duration is None and len(trace.spans) < MAX_SPANS_PER_TRACE:
+            end = time.perf_counter()
+            record = {
+                "name": self._name,
+                "start_ms": round((self._start - trace._start) * 1000, 3),
+                "duration_ms": round((end - self._start) * 1000, 3),
+                **self._attrs,
+            }
+            if exc_type is not None:
+                record["error"] = exc_type.__name__
+            trace.spans.append(record)
+        return False
+
+    def set(self, **attrs):
+        """追加 span 属性"""
+        self._attrs.update(attrs)
+
+
+class _NoopSpan:
+    """追踪关闭或不在追踪上下文中时使用的空 span"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _TraceScope:
+    __slots__ = ("_tracer", "_trace", "_token")
+
+    def __init__(self, tracer: "Tracer", trace: Trace):
+        self._tracer = tracer
+        self._trace = trace
+
+    def __enter__(self) -> Trace:
+        self._token = _current.set(self._trace)
+        return self._trace
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        trace = self._trace
+        trace.duration = time.perf_counter() - trace._start
+        if exc_type is not None:
+            trace.error = exc_type.__name__
+        self._tracer._buffer.append(trace)
+        return False
+
+
+class Tracer:
+    """追踪器
+
+    关闭时 trace()/span() 只做一次标志或上下文变量检查并返回共享的空对象。
+    """
+
+    def __init__(self, enabled: bool = False, capacity: int = 200):
+        self._buffer: deque[Trace] = deque(maxlen=max(1, capacity))
+        self.configure(enabled, capacity)
+
+    def configure(self, enabled: bool = False, capacity: int = 200):
+        """更新开关与缓冲容量（容量变化时保留最近的记录）"""
+        self.enabled = bool(enabled)
+        capacity = max(1, capacity)
+        if self._buffer.maxlen != capacity:
+            self._buffer = deque(self._buffer, maxlen=capacity)
+
+    @property
+    def capacity(self) -> int:
+        return self._buffer.maxlen
+
+    def trace(self, name: str, **attrs):
+        """开始一次追踪（已在追踪中时复用外层追踪）"""
+        if not self.enabled or _current.get() is not None:
+            return _NOOP
+        return _TraceScope(self, Trace(name, attrs))
+
+    def span(self, name: str, **attrs):
+        """在当前追踪中记录一个阶段"""
+        trace = _current.get()
+        if trace is None:
+            return _NOOP
+        return _Span(trace, name, attrs)
+
+    def annotate(self, **attrs):
+        """为当前追踪补充关联属性（如解析后的设备 ID）"""
+        trace = _current.get()
+        if trace is not None and trace.duration is None:
+            trace.attrs.update(attrs)
+
+    @staticmethod
+    @contextmanager
+    def detached():
+        """在不属于任何追踪的上下文中执行
+
+        asyncio 任务创建时会复制当前上下文，在此上下文中创建的后台任务
+        不会把 span 记录到发起者的追踪中。
+        """
+        token = _current.set(None)
+        try:
+            yield
+        finally:
+            _current.reset(token)
+
+    def recent(self, limit: int = 50) -> list[dict]:
+        """最近的追踪记录（新的在前）"""
+        return [t.to_dict() for t in itertools.islice(reversed(self._buffer), max(0, limit))]
+
+    def clear(self):
+        self._buffer.clear()
+
+
+# 全局追踪器
+tracer = Tracer()
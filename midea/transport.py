@@ -0,0 +1,80 @@
+"""
+美的云 HTTP 传输层 - 复用连接池
+"""
+
+import importlib.util
+
+import httpx
+
+
+class SharedTransport:
+    """进程共享的 HTTP 连接池
+
+    所有 MeijuCloud 实例共用同一个 httpx.AsyncClient，
+    避免每次请求都重新进行 DNS 解析、TCP 握手和 TLS 协商。
+    生命周期由插件管理：首次请求时惰性创建，插件清理时关闭。
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 60.0,
+        http2: bool = False,
+        timeout: float = 30.0,
+    ):
+        self._client: httpx.AsyncClient | None = None
+        self.configure(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+            http2=http2,
+            timeout=timeout,
+        )
+
+    def configure(
+        self,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 60.0,
+        http2: bool = False,
+        timeout: float = 30.0,
+    ):
+        """更新连接池参数
+
+        仅对之后创建的客户端生效，已打开的连接池需先调用 aclose()。
+        """
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        # HTTP/2 需要可选依赖 h2，未安装时回退到 HTTP/1.1
+        self._http2 = bool(http2) and importlib.util.find_spec("h2") is not None
+        self._timeout = timeout
+
+    @property
+    def http2_enabled(self) -> bool:
+        """是否启用 HTTP/2 多路复用"""
+        return self._http2
+
+    def get_client(self) -> httpx.AsyncClient:
+        """获取共享客户端，不存在或已关闭时重新创建"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=self._limits,
+                timeout=self._timeout,
+                http2=self._http2,
+                headers={"accept-encoding": "gzip, deflate"},
+            )
+        return self._client
+
+    async def aclose(self):
+        """关闭连接池"""
+        client, self._client = self._client, None
+        if client is not None and not client.is_closed:
+            await client.aclose()
+
+
+# 默认共享传输实例
+shared_transport = SharedTransport()
@@ -6,6 +6,8 @@ from nekro_agent.api.plugin import NekroPlugin, ConfigBase, ExtraField
 from nekro_agent.api.schemas import AgentCtx
 from pydantic import Field
 
+from .midea import shared_transport, rate_limiters, adaptive_timeouts, tracer
+
 
 plugin = NekroPlugin(
     name="美的智能家居控制",
@@ -30,10 +32,247 @@ class MideaPluginConfig(ConfigBase):
         ).model_dump()
     )
 
+    http_max_connections: int = Field(
+        default=20,
+        title="HTTP 最大连接数",
+        description="访问美的云的连接池最大并发连接数",
+    )
+
+    http_max_keepalive_connections: int = Field(
+        default=10,
+        title="HTTP 保活连接数",
+        description="连接池中保持空闲复用的最大连接数",
+    )
+
+    http_keepalive_expiry: float = Field(
+        default=60.0,
+        title="HTTP 保活时长(秒)",
+        description="空闲连接保持的最长时间，超时后关闭",
+    )
+
+    http2_enabled: bool = Field(
+        default=False,
+        title="启用 HTTP/2",
+        description="启用 HTTP/2 多路复用（需要安装 h2 依赖，未安装时自动回退 HTTP/1.1）",
+    )
+
+    token_renew_enabled: bool = Field(
+        default=True,
+        title="后台自动续期凭证",
+        description="在 token 过期前于后台主动重新登录，避免请求因 token 过期失败",
+    )
+
+    token_renew_hours: float = Field(
+        default=12.0,
+        title="凭证续期间隔(小时)",
+        description="token 签发超过该时长后在后台续期（实际时间带少量随机抖动）",
+    )
+
+    inventory_cache_ttl: int = Field(
+        default=3600,
+        title="设备清单缓存时长(秒)",
+        description="家庭和设备列表的缓存有效期，可在管理页面手动刷新",
+    )
+
+    inventory_concurrency: int = Field(
+        default=4,
+        title="设备列表并发数",
+        description="获取多个家庭设备列表时同时进行的最大请求数",
+    )
+
+    status_cache_fresh: float = Field(
+        default=10.0,
+        title="设备状态新鲜期(秒)",
+        description="该时间内重复查询同一设备状态直接返回缓存，设为 0 关闭缓存",
+    )
+
+    status_cache_max_stale: float = Field(
+        default=60.0,
+        title="设备状态最大陈旧时长(秒)",
+        description="超过新鲜期但未超过该时长时先返回旧状态并在后台刷新，超过后重新请求云端",
+    )
+
+    snapshot_enabled: bool = Field(
+        default=True,
+        title="启用启动快照",
+        description="将设备清单和最近状态保存到 KV 存储，重启后先返回快照数据并在后台刷新",
+    )
+
+    snapshot_max_age: float = Field(
+        default=86400.0,
+        title="启动快照最长有效期(秒)",
+        description="超过该时长的快照在启动时不再加载，快照中的设备状态超过该时长后也不再返回",
+    )
+
+    poller_enabled: bool = Field(
+        default=False,
+        title="后台轮询设备状态",
+        description="在后台按设备类型和活跃度自适应轮询在线设备状态，使状态查询无需等待云端",
+    )
+
+    poller_concurrency: int = Field(
+        default=2,
+        title="后台轮询并发数",
+        description="后台轮询同时进行的最大状态请求数",
+    )
+
+    control_coalesce_window: float = Field(
+        default=0.0,
+        title="控制命令合并窗口(秒)",
+        description="该时间内对同一设备的多次控制按顺序合并为一次请求，设为 0 关闭合并",
+    )
+
+    batch_control_concurrency: int = Field(
+        default=4,
+        title="批量控制并发数",
+        description="批量控制多个设备时同时进行的最大请求数",
+    )
+
+    rate_limit_per_second: float = Field(
+        default=10.0,
+        title="账号请求速率上限(次/秒)",
+        description="单个美的账号访问云端的平均请求速率上限，控制命令优先于状态和列表请求，设为 0 关闭限流",
+    )
+
+    rate_limit_burst: int = Field(
+        default=20,
+        title="账号突发请求数",
+        description="单个美的账号允许的瞬时突发请求数",
+    )
+
+    breaker_failure_threshold: int = Field(
+        default=3,
+        title="设备熔断失败次数",
+        description="设备连续控制失败达到该次数后暂停向其发送请求，直接返回离线",
+    )
+
+    breaker_base_backoff: float = Field(
+        default=30.0,
+        title="设备熔断初始退避(秒)",
+        description="设备熔断后首次暂停的时长，之后每次探测失败翻倍",
+    )
+
+    breaker_max_backoff: float = Field(
+        default=600.0,
+        title="设备熔断最大退避(秒)",
+        description="设备熔断暂停时长的上限",
+    )
+
+    network_retry_count: int = Field(
+        default=2,
+        title="网络错误重试次数",
+        description="控制命令遇到网络错误或响应解析失败时的重试次数（指数退避）",
+    )
+
+    http_connect_timeout: float = Field(
+        default=5.0,
+        title="连接超时(秒)",
+        description="与美的云建立连接的超时时间",
+    )
+
+    http_read_timeout_min: float = Field(
+        default=3.0,
+        title="最小读超时(秒)",
+        description="按接口历史延迟自适应计算读超时的下限",
+    )
+
+    http_read_timeout_max: float = Field(
+        default=30.0,
+        title="最大读超时(秒)",
+        description="按接口历史延迟自适应计算读超时的上限，样本不足时使用该值",
+    )
+
+    control_deadline: float = Field(
+        default=15.0,
+        title="控制命令截止时间(秒)",
+        description="一次设备控制（含凭证刷新与重试）的总耗时上限，超时返回 error:timeout，设为 0 不限制",
+    )
+
+    status_deadline: float = Field(
+        default=10.0,
+        title="状态查询截止时间(秒)",
+        description="一次设备状态查询等待美的云的总耗时上限，超时返回查询超时（请求仍在后台完成并写入缓存），设为 0 不限制",
+    )
+
+    skip_redundant_commands: bool = Field(
+        default=False,
+        title="跳过重复控制命令",
+        description="与新鲜期内的缓存状态比较，去掉已满足的控制参数；全部满足时不请求云端直接返回 ok",
+    )
+
+    lan_enabled: bool = Field(
+        default=False,
+        title="启用局域网控制",
+        description="对已知地址的设备优先通过局域网 (V3 协议) 查询和控制，失败时自动回退云端；目前仅支持空调",
+    )
+
+    lan_devices: str = Field(
+        default="",
+        title="局域网设备地址",
+        description="设备ID=IP[:端口]，多个用逗号分隔，端口默认 6444",
+    )
+
+    lan_timeout: float = Field(
+        default=3.0,
+        title="局域网超时(秒)",
+        description="局域网连接、握手和单次请求的超时时间",
+    )
+
+    lan_retry_after: float = Field(
+        default=300.0,
+        title="局域网失败后回退时长(秒)",
+        description="设备局域网通信失败后，在此时长内直接走云端",
+    )
+
+    lan_discovery_interval: float = Field(
+        default=1800.0,
+        title="局域网发现间隔(秒)",
+        description="启用局域网控制时后台扫描设备地址的间隔，设为 0 关闭自动发现（仅使用手动配置的地址）",
+    )
+
+    lan_broadcast_address: str = Field(
+        default="255.255.255.255",
+        title="局域网广播地址",
+        description="设备发现使用的广播地址，如 192.168.1.255",
+    )
+
+    trace_enabled: bool = Field(
+        default=False,
+        title="启用调用追踪",
+        description="记录沙箱调用各阶段（权限检查、签名、HTTP、刷新、重试等）的耗时，可在 /api/traces 查看",
+    )
+
+    trace_buffer_size: int = Field(
+        default=200,
+        title="追踪记录保留条数",
+        description="内存中保留的最近调用追踪数量",
+    )
+
 
 # 获取配置实例
 config: MideaPluginConfig = plugin.get_config(MideaPluginConfig)
 
+# 按配置初始化共享连接池
+shared_transport.configure(
+    max_connections=config.http_max_connections,
+    max_keepalive_connections=config.http_max_keepalive_connections,
+    keepalive_expiry=config.http_keepalive_expiry,
+    http2=config.http2_enabled,
+)
+
+# 按配置初始化账号级限流
+rate_limiters.configure(rate=config.rate_limit_per_second, burst=config.rate_limit_burst)
+
+# 按配置初始化自适应超时
+adaptive_timeouts.configure(
+    connect=config.http_connect_timeout,
+    read_min=config.http_read_timeout_min,
+    read_max=config.http_read_timeout_max,
+)
+
+# 按配置初始化调用追踪
+tracer.configure(enabled=config.trace_enabled, capacity=config.trace_buffer_size)
+
 
 @plugin.mount_prompt_inject_method(
     name="midea_usage_hint",
@@ -45,14 +284,37 @@ async def inject_midea_hint(_ctx: AgentCtx) -> str:
 调用美的设备控制方法后，根据返回值用自然语言回复用户：
 - ok: 操作成功
 - error:device_offline: 设备离线
+- error:cloud:错误码:信息: 美的云拒绝了请求（如参数不被设备支持），可根据信息调整参数
 - error:not_logged_in: 未登录美的账号
+- error:timeout: 美的云响应超时，可稍后重试
 - error:invalid_xxx: 参数错误
+- error:device_not_found:xxx / error:ambiguous_device:候选列表: 设备名称无法唯一确定，请用候选中的设备ID重试
+设备参数 device_id 可直接使用设备名称或"房间+类型"（如 "客厅空调"），无需先查询设备列表。
 """
 
 
+@plugin.mount_init_method()
+async def init_plugin():
+    """启动插件后台任务"""
+    from .services import token_renewer, status_poller, lan_discovery, inventory_snapshot
+    # 先加载快照，使启动后的首个请求即可命中缓存
+    await inventory_snapshot.load()
+    inventory_snapshot.start()
+    token_renewer.start()
+    status_poller.start()
+    lan_discovery.start()
+
+
 @plugin.mount_cleanup_method()
 async def clean_up():
     """清理插件资源"""
+    from .services import token_renewer, status_poller, lan_control, lan_discovery, inventory_snapshot
+    await lan_discovery.stop()
+    await status_poller.stop()
+    await inventory_snapshot.stop()
+    await token_renewer.stop()
+    await lan_control.close()
+    await shared_transport.aclose()
     print("美的插件资源已清理")
 
 
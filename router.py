@@ -3,16 +3,16 @@
 """
 
 import os
-import json
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from pydantic import BaseModel
 
 from nekro_agent.api.core import logger
 
-from .plugin import plugin
-from .constants import STORE_KEY_CREDENTIALS, get_device_type_name
-from .midea import MeijuCloud
+from .constants import get_device_type_name
+from .midea import MeijuCloud, metrics, rate_limiters, tracer
+from .midea.metrics import summary as metrics_summary
+from .services import cloud_session, inventory_cache, status_cache, scene_store, lan_control, inventory_snapshot
 
 router = APIRouter()
 
@@ -23,6 +23,12 @@ class LoginRequest(BaseModel):
     password: str
 
 
+class SceneRequest(BaseModel):
+    """场景保存请求模型"""
+    name: str
+    actions: list[dict]
+
+
 # ==================== 静态文件 ====================
 
 @router.get("/")
@@ -55,17 +61,13 @@ async def webui_script():
 async def check_status():
     """检查登录状态"""
     try:
-        creds_json = await plugin.store.get(store_key=STORE_KEY_CREDENTIALS)
-        if not creds_json:
-            return {"logged_in": False}
-        
-        creds = json.loads(creds_json)
-        if not creds.get("access_token"):
+        cloud = await cloud_session.get_client()
+        if not cloud:
             return {"logged_in": False}
         
         return {
             "logged_in": True,
-            "account": creds.get("account", "")
+            "account": cloud_session.account
         }
     except Exception as e:
         logger.error(f"检查登录状态失败: {e}")
@@ -80,12 +82,11 @@ async def login(req: LoginRequest):
         success, message = await cloud.login()
         
         if success:
-            # 保存凭证到 KV 存储
-            creds = cloud.get_credentials()
-            await plugin.store.set(
-                store_key=STORE_KEY_CREDENTIALS,
-                value=json.dumps(creds)
-            )
+            # 保存凭证到 KV 存储，并替换当前会话
+            await cloud_session.save(cloud)
+            inventory_cache.invalidate()
+            status_cache.invalidate()
+            lan_control.invalidate()
             logger.info(f"美的账号 {req.account} 登录成功")
             return {"success": True, "message": "登录成功"}
         else:
@@ -99,7 +100,11 @@ async def login(req: LoginRequest):
 async def logout():
     """退出登录"""
     try:
-        await plugin.store.delete(store_key=STORE_KEY_CREDENTIALS)
+        await cloud_session.logout()
+        await inventory_snapshot.clear()
+        inventory_cache.invalidate()
+        status_cache.invalidate()
+        lan_control.invalidate()
         logger.info("美的账号已退出登录")
         return {"success": True, "message": "已退出登录"}
     except Exception as e:
@@ -107,79 +112,24 @@ async def logout():
         raise HTTPException(status_code=500, detail=f"退出登录失败: {str(e)}")
 
 
-async def _get_cloud_client() -> MeijuCloud | None:
-    """获取已登录的云客户端，支持加载密码用于自动刷新"""
-    creds_json = await plugin.store.get(store_key=STORE_KEY_CREDENTIALS)
-    if not creds_json:
-        return None
-    
-    creds = json.loads(creds_json)
-    if not creds.get("access_token"):
-        return None
-    
-    cloud = MeijuCloud(
-        account=creds.get("account", ""), 
-        password=creds.get("password", "")  # 加载密码用于自动刷新
-    )
-    cloud.load_credentials(creds)
-    return cloud
-
-
-async def _refresh_credentials(cloud: MeijuCloud) -> bool:
-    """刷新凭证
-    
-    当检测到登录状态失效时，使用保存的账号密码重新登录
-    
-    Returns:
-        刷新成功返回 True，失败返回 False
-    """
-    # 检查是否有密码
-    if not cloud._password:
-        logger.warning("无法自动刷新凭证：未保存密码")
-        return False
-    
-    logger.info(f"正在自动刷新美的账号 {cloud._account} 的凭证...")
-    success, message = await cloud.login()
-    
-    if success:
-        # 保存新凭证
-        creds = cloud.get_credentials()
-        await plugin.store.set(
-            store_key=STORE_KEY_CREDENTIALS,
-            value=json.dumps(creds)
-        )
-        logger.info("凭证刷新成功")
-        return True
-    else:
-        logger.error(f"凭证刷新失败: {message}")
-        return False
-
-
 @router.get("/api/homes")
 async def get_homes():
     """获取家庭列表"""
-    cloud = await _get_cloud_client()
+    cloud = await cloud_session.get_client()
     if not cloud:
         raise HTTPException(status_code=401, detail="未登录")
     
     try:
-        result = await cloud.list_home()
+        result = await inventory_cache.get_homes(cloud)
         logger.debug(f"list_home 结果: success={result.success}, error_code={result.error_code}, is_token_error={result.is_token_error}")
         
-        # 如果是 token 错误，尝试刷新凭证后重试
-        if result.is_token_error:
-            logger.info(f"检测到 token 错误 (code={result.error_code})，尝试刷新凭证...")
-            if await _refresh_credentials(cloud):
-                result = await cloud.list_home()
-                logger.debug(f"刷新后 list_home 结果: success={result.success}, error_code={result.error_code}")
-        
         if not result.success or not result.data:
             error_detail = f"获取家庭列表失败 (code={result.error_code}, msg={result.error_message})"
             logger.error(error_detail)
             raise HTTPException(status_code=500, detail=error_detail)
         
         # 转换为列表格式
-        home_list = [{"id": k, "name": v} for k, v in result.data.items()]
+        home_list = [home.to_dict() for home in result.data.values()]
         return {"homes": home_list}
     except HTTPException:
         raise
@@ -191,17 +141,12 @@ async def get_homes():
 @router.get("/api/devices/{home_id}")
 async def get_devices(home_id: int):
     """获取设备列表"""
-    cloud = await _get_cloud_client()
+    cloud = await cloud_session.get_client()
     if not cloud:
         raise HTTPException(status_code=401, detail="未登录")
     
     try:
-        result = await cloud.list_appliances(home_id)
-        
-        # 如果是 token 错误，尝试刷新凭证后重试
-        if result.is_token_error:
-            if await _refresh_credentials(cloud):
-                result = await cloud.list_appliances(home_id)
+        result = await inventory_cache.get_appliances(cloud, home_id)
         
         if not result.success or not result.data:
             raise HTTPException(status_code=500, detail="获取设备列表失败")
@@ -209,16 +154,7 @@ async def get_devices(home_id: int):
         # 转换为列表格式，添加设备类型名称
         device_list = []
         for device_id, info in result.data.items():
-            device_list.append({
-                "id": device_id,
-                "name": info["name"],
-                "type": info["type"],
-                "type_hex": info["type_hex"],
-                "type_name": get_device_type_name(info["type"]),
-                "model": info["model"],
-                "online": info["online"],
-                "room": info["room"],
-            })
+            device_list.append({**info.to_dict(), "type_name": get_device_type_name(info.type)})
         
         return {"devices": device_list}
     except HTTPException:
@@ -226,3 +162,74 @@ async def get_devices(home_id: int):
     except Exception as e:
         logger.error(f"获取设备列表失败: {e}")
         raise HTTPException(status_code=500, detail=f"获取设备列表失败: {str(e)}")
+
+
+@router.post("/api/refresh")
+async def refresh_inventory():
+    """手动刷新家庭和设备列表缓存"""
+    cloud = await cloud_session.get_client()
+    if not cloud:
+        raise HTTPException(status_code=401, detail="未登录")
+    
+    inventory_cache.invalidate(cloud._account)
+    logger.info("美的设备清单缓存已刷新")
+    return {"success": True, "message": "设备列表已刷新"}
+
+
+@router.get("/api/scenes")
+async def get_scenes():
+    """获取场景列表"""
+    scenes = await scene_store.list_scenes()
+    return {"scenes": [scene.to_dict() for scene in scenes]}
+
+
+@router.post("/api/scenes")
+async def save_scene(req: SceneRequest):
+    """新建或覆盖场景"""
+    try:
+        scene = await scene_store.save(req.name, req.actions)
+        logger.info(f"美的场景 {scene.name} 已保存")
+        return {"success": True, "scene": scene.to_dict()}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"保存场景失败: {e}")
+        raise HTTPException(status_code=500, detail=f"保存场景失败: {str(e)}")
+
+
+@router.delete("/api/scenes/{name}")
+async def delete_scene(name: str):
+    """删除场景"""
+    if not await scene_store.delete(name):
+        raise HTTPException(status_code=404, detail="场景不存在")
+    logger.info(f"美的场景 {name} 已删除")
+    return {"success": True, "message": "场景已删除"}
+
+
+@router.get("/api/ratelimit")
+async def get_rate_limit_stats():
+    """获取各账号的限流排队统计"""
+    return {"accounts": rate_limiters.stats()}
+
+
+@router.get("/api/metrics")
+async def get_metrics():
+    """Prometheus 文本格式的运行指标"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/api/metrics/summary")
+async def get_metrics_summary():
+    """Web 面板使用的指标摘要"""
+    return metrics_summary()
+
+
+@router.get("/api/traces")
+async def get_traces(limit: int = 50, chat_key: str | None = None, device_id: int | None = None):
+    """最近的调用追踪（需在配置中启用追踪）"""
+    traces = tracer.recent(tracer.capacity if chat_key or device_id else limit)
+    if chat_key:
+        traces = [t for t in traces if t.get("chat_key") == chat_key]
+    if device_id:
+        traces = [t for t in traces if t.get("device_id") == device_id]
+    return {"enabled": tracer.enabled, "traces": traces[:limit]}
@@ -0,0 +1,46 @@
+"""
+插件服务模块 - 会话、缓存等进程内共享状态
+"""
+
+from .session import CloudSession, cloud_session
+from .renewal import TokenRenewer, token_renewer
+from .inventory import InventoryCache, inventory_cache
+from .status_cache import StatusCache, StatusEntry, status_cache
+from .poller import StatusPoller, status_poller
+from .coalescer import ControlCoalescer, control_coalescer
+from .scenes import Scene, SceneStore, build_scene, scene_store
+from .breaker import DeviceCircuitBreaker, device_breaker
+from .lan import LanControl, lan_control
+from .discovery import LanDiscovery, lan_discovery
+from .resolver import DeviceResolver, device_resolver
+from .snapshot import InventorySnapshot, inventory_snapshot
+
+__all__ = [
+    "CloudSession",
+    "cloud_session",
+    "TokenRenewer",
+    "token_renewer",
+    "InventoryCache",
+    "inventory_cache",
+    "StatusCache",
+    "StatusEntry",
+    "status_cache",
+    "StatusPoller",
+    "status_poller",
+    "ControlCoalescer",
+    "control_coalescer",
+    "Scene",
+    "SceneStore",
+    "build_scene",
+    "scene_store",
+    "DeviceCircuitBreaker",
+    "device_breaker",
+    "LanControl",
+    "lan_control",
+    "LanDiscovery",
+    "lan_discovery",
+    "DeviceResolver",
+    "device_resolver",
+    "InventorySnapshot",
+    "inventory_snapshot",
+]
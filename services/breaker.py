@@ -0,0 +1,97 @@
+"""
+设备熔断器 - 离线设备快速失败并指数退避
+"""
+
+import random
+import time
+from dataclasses import dataclass
+
+from ..midea.metrics import BREAKER_EVENTS
+from ..plugin import config
+
+# 退避时间随机抖动比例
+BACKOFF_JITTER = 0.2
+# 半开状态探测请求的最长占用时间（秒），超时后允许新的探测
+PROBE_TIMEOUT = 60.0
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+@dataclass
+class _DeviceState:
+    """单个设备的熔断状态"""
+    state: str = STATE_CLOSED
+    failures: int = 0
+    trips: int = 0  # 连续熔断次数，用于指数退避
+    open_until: float = 0.0
+    probe_started: float | None = None
+
+
+class DeviceCircuitBreaker:
+    """按设备的熔断器
+
+    设备连续失败达到阈值后熔断，在退避期内直接返回失败而不请求云端；
+    退避期结束后进入半开状态，只放行一个探测请求：
+    成功则恢复，失败则以加倍（带抖动）的退避时间再次熔断。
+    """
+
+    def __init__(self):
+        self._devices: dict[int, _DeviceState] = {}
+
+    def allow(self, device_id: int) -> bool:
+        """是否允许向该设备发送请求"""
+        state = self._devices.get(int(device_id))
+        if state is None or state.state == STATE_CLOSED:
+            return True
+        now = time.monotonic()
+        if state.state == STATE_OPEN:
+            if now < state.open_until:
+                BREAKER_EVENTS.inc("rejected")
+                return False
+            state.state = STATE_HALF_OPEN
+            state.probe_started = None
+        # 半开状态只放行一个探测请求
+        if state.probe_started is not None and now - state.probe_started < PROBE_TIMEOUT:
+            BREAKER_EVENTS.inc("rejected")
+            return False
+        state.probe_started = now
+        BREAKER_EVENTS.inc("probe")
+        return True
+
+    def record_success(self, device_id: int):
+        """请求成功，恢复为闭合状态"""
+        state = self._devices.pop(int(device_id), None)
+        if state is not None and state.state != STATE_CLOSED:
+            BREAKER_EVENTS.inc("closed")
+
+    def release(self, device_id: int):
+        """请求因与设备无关的原因（token、超时、参数错误等）失败，释放探测名额但不改变计数"""
+        state = self._devices.get(int(device_id))
+        if state is not None:
+            state.probe_started = None
+
+    def record_failure(self, device_id: int):
+        """请求失败，达到阈值或探测失败时熔断"""
+        state = self._devices.setdefault(int(device_id), _DeviceState())
+        state.failures += 1
+        if state.state == STATE_HALF_OPEN or state.failures >= config.breaker_failure_threshold:
+            backoff = min(config.breaker_base_backoff * (2 ** state.trips), config.breaker_max_backoff)
+            backoff *= 1 + random.uniform(-BACKOFF_JITTER, BACKOFF_JITTER)
+            state.state = STATE_OPEN
+            state.open_until = time.monotonic() + backoff
+            state.trips += 1
+            state.probe_started = None
+            BREAKER_EVENTS.inc("opened")
+
+    def retry_after(self, device_id: int) -> float:
+        """距离允许探测还需等待的秒数"""
+        state = self._devices.get(int(device_id))
+        if state is None or state.state != STATE_OPEN:
+            return 0.0
+        return max(0.0, state.open_until - time.monotonic())
+
+
+# 全局设备熔断器实例
+device_breaker = DeviceCircuitBreaker()
@@ -0,0 +1,97 @@
+"""
+设备控制命令合并 - 短时间窗口内同一设备的命令合并为一次请求
+"""
+
+import asyncio
+import contextvars
+from typing import Awaitable, Callable
+
+from ..plugin import config
+
+
+class _PendingBatch:
+    """等待发送的合并命令"""
+
+    def __init__(self, send: Callable[[dict, float | None], Awaitable]):
+        self.send = send
+        self.control: dict = {}
+        self.expires_at: float | None = None
+        self._unbounded = False
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def extend_deadline(self, expires_at: float | None):
+        """合并调用方的截止时间，取最晚者（任一调用方不限时则不限时）"""
+        if self._unbounded:
+            return
+        if expires_at is None:
+            self._unbounded = True
+            self.expires_at = None
+        elif self.expires_at is None or expires_at > self.expires_at:
+            self.expires_at = expires_at
+
+
+class ControlCoalescer:
+    """按设备合并控制命令
+
+    在配置的时间窗口内，同一设备收到的控制字典按到达顺序合并
+    （后到的同名参数覆盖先到的），窗口结束后只发送一次请求，
+    所有调用方获得同一个结果。窗口为 0 时直接发送。
+    合并后的命令使用所有调用方中最晚的截止时间，并在独立的上下文中发送，
+    不继承首个调用方的追踪与截止时间。
+    """
+
+    def __init__(self):
+        self._pending: dict[int, _PendingBatch] = {}
+
+    async def submit(
+        self,
+        device_id: int,
+        control: dict,
+        send: Callable[[dict, float | None], Awaitable],
+        expires_at: float | None = None,
+    ):
+        """提交控制命令
+
+        Args:
+            device_id: 设备 ID
+            control: 控制命令字典
+            send: 实际发送函数，参数为合并后的控制字典与截止时间（time.monotonic()）
+            expires_at: 调用方的截止时间，None 表示不限时
+
+        Returns:
+            send 的返回值（合并批次内所有调用方共享）
+        """
+        window = config.control_coalesce_window
+        if window <= 0:
+            return await send(control, expires_at)
+
+        device_id = int(device_id)
+        batch = self._pending.get(device_id)
+        if batch is None:
+            batch = _PendingBatch(send)
+            self._pending[device_id] = batch
+            asyncio.get_running_loop().call_later(
+                window, self._flush, device_id, batch, context=contextvars.Context()
+            )
+        batch.control.update(control)
+        batch.extend_deadline(expires_at)
+        return await asyncio.shield(batch.future)
+
+    def _flush(self, device_id: int, batch: _PendingBatch):
+        """窗口结束，发送合并后的命令"""
+        if self._pending.get(device_id) is batch:
+            del self._pending[device_id]
+        asyncio.ensure_future(self._send(batch))
+
+    @staticmethod
+    async def _send(batch: _PendingBatch):
+        try:
+            result = await batch.send(batch.control, batch.expires_at)
+        except Exception as e:
+            batch.future.set_exception(e)
+        else:
+            batch.future.set_result(result)
+
+
+# 全局命令合并实例
+control_coalescer = ControlCoalescer()
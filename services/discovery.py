@@ -0,0 +1,160 @@
+"""
+局域网设备发现 - 后台 UDP 扫描并维护持久化的设备地址表
+"""
+
+import asyncio
+import json
+
+from nekro_agent.api.core import logger
+
+from ..constants import STORE_KEY_LAN_ADDRESSES
+from ..midea import Appliance, background_requests
+from ..midea.discovery import DISCOVERY_PORTS, discover
+from ..plugin import plugin, config
+from .inventory import inventory_cache
+from .lan import lan_control, parse_address_list
+from .session import cloud_session
+
+
+class LanDiscovery:
+    """后台局域网发现
+
+    周期性广播发现请求（同时向已知地址单播，兼容屏蔽广播的网络），
+    按设备 ID 或序列号将响应匹配到设备清单，只更新地址有变化的设备并写回 KV 存储。
+    未响应的设备保留上次的地址。扫描只在后台进行，不阻塞设备控制。
+    地址表以设备 ID 为键，只保存 IP 与端口，不保存序列号。
+    """
+
+    def __init__(self, ports: tuple[int, ...] = DISCOVERY_PORTS):
+        self._ports = ports
+        self._task: asyncio.Task | None = None
+        self._addresses: dict[int, dict] | None = None
+
+    @property
+    def running(self) -> bool:
+        """任务是否正在运行"""
+        return self._task is not None and not self._task.done()
+
+    @property
+    def addresses(self) -> dict[int, dict]:
+        """已发现的设备地址 {设备ID: {"host", "port"}}"""
+        return dict(self._addresses or {})
+
+    def start(self):
+        """启动发现任务（重复调用无副作用）"""
+        if not config.lan_enabled or config.lan_discovery_interval <= 0 or self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止发现任务"""
+        task, self._task = self._task, None
+        if task is None or task.done():
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def load(self):
+        """从 KV 存储加载地址表并应用到局域网控制"""
+        if self._addresses is not None:
+            return
+        addresses = {}
+        legacy = False
+        try:
+            raw = await plugin.store.get(store_key=STORE_KEY_LAN_ADDRESSES)
+            for device_id, entry in (json.loads(raw) if raw else {}).items():
+                addresses[int(device_id)] = {"host": entry["host"], "port": entry["port"]}
+                legacy = legacy or len(entry) > 2
+        except Exception as e:
+            logger.warning(f"加载局域网设备地址失败: {e}")
+        self._addresses = addresses
+        self._apply(addresses)
+        if legacy:
+            # 旧版本地址表中含明文序列号，重写为只含地址的格式
+            try:
+                await self._persist()
+            except Exception as e:
+                logger.warning(f"重写局域网设备地址失败: {e}")
+
+    def _apply(self, addresses: dict[int, dict]):
+        """将地址写入局域网控制（手动配置的地址优先）"""
+        configured = parse_address_list(config.lan_devices)
+        for device_id, entry in addresses.items():
+            if device_id not in configured:
+                lan_control.set_address(device_id, entry["host"], entry["port"])
+
+    async def _persist(self):
+        await plugin.store.set(
+            store_key=STORE_KEY_LAN_ADDRESSES,
+            value=json.dumps({str(k): v for k, v in self._addresses.items()}),
+        )
+
+    async def _inventory(self) -> dict[int, Appliance]:
+        """当前账号的设备清单 {设备ID: 设备信息}"""
+        cloud = await cloud_session.get_client()
+        if cloud is None:
+            return {}
+        with background_requests():
+            homes = await inventory_cache.get_homes(cloud)
+            if not homes.success or not homes.data:
+                return {}
+            app_results = await inventory_cache.get_all_appliances(cloud, homes.data.keys())
+        devices = {}
+        for result in app_results:
+            if result.success and result.data:
+                devices.update(result.data)
+        return devices
+
+    async def rescan(self, targets: list[str] | None = None) -> int:
+        """执行一次扫描
+
+        Args:
+            targets: 发现请求的目标地址，默认为配置的广播地址加上已知设备地址
+
+        Returns:
+            地址发生变化的设备数量
+        """
+        await self.load()
+        inventory = await self._inventory()
+        if not inventory:
+            return 0
+        by_sn = {info.sn: device_id for device_id, info in inventory.items() if info.sn}
+
+        if targets is None:
+            targets = [config.lan_broadcast_address]
+            targets += sorted({entry["host"] for entry in self._addresses.values()} - set(targets))
+        found = await discover(targets, self._ports, timeout=config.lan_timeout)
+
+        changed = {}
+        for device in found.values():
+            device_id = device.device_id if device.device_id in inventory else by_sn.get(device.sn)
+            if device_id is None:
+                continue
+            entry = {"host": device.host, "port": device.port}
+            if self._addresses.get(device_id) != entry:
+                changed[device_id] = entry
+
+        if changed:
+            self._addresses.update(changed)
+            self._apply(changed)
+            await self._persist()
+            logger.info(f"局域网发现: {len(changed)} 个设备地址已更新")
+        return len(changed)
+
+    async def _run(self):
+        """发现循环"""
+        while True:
+            try:
+                await self.rescan()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"局域网发现失败: {e}")
+            await asyncio.sleep(config.lan_discovery_interval)
+
+
+# 全局局域网发现实例
+lan_discovery = LanDiscovery()
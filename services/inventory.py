@@ -0,0 +1,214 @@
+"""
+家庭与设备清单缓存
+"""
+
+import asyncio
+import time
+
+from nekro_agent.api.core import logger
+
+from ..midea import MeijuCloud, ApiResult, Appliance, Home, background_requests, tracer
+from ..midea.metrics import CACHE_LOOKUPS
+from ..plugin import config
+from .session import cloud_session
+
+
+class InventoryCache:
+    """家庭/设备清单 TTL 缓存
+
+    按账号缓存家庭列表，按 (账号, 家庭ID) 缓存设备列表。
+    设备序列号由 SerialBatch 在首次读取时整批解密，之后命中缓存时直接复用结果。
+    登录、退出登录或手动刷新时显式失效。
+
+    从启动快照恢复的条目在首次成功刷新前视为陈旧：读取时立即返回，
+    同时在后台向云端刷新；刷新失败时丢弃该条目，下次读取同步请求云端。
+    """
+
+    def __init__(self):
+        self._homes: dict[str, tuple[float, dict]] = {}
+        self._appliances: dict[tuple[str, int], tuple[float, dict]] = {}
+        self._restored: set[tuple] = set()
+        self._revalidating: dict[tuple, asyncio.Future] = {}
+        # 内容变化计数，供快照判断是否需要重新保存
+        self.revision = 0
+
+    @staticmethod
+    def _fresh(entry: tuple[float, dict] | None) -> bool:
+        """缓存项是否仍在有效期内"""
+        return entry is not None and time.monotonic() - entry[0] < config.inventory_cache_ttl
+
+    async def get_homes(self, cloud: MeijuCloud, force: bool = False) -> ApiResult:
+        """获取家庭列表（带缓存）
+
+        Returns:
+            ApiResult: 成功时 data 包含 {home_id: Home} 字典
+        """
+        entry = self._homes.get(cloud._account)
+        if not force and entry is not None:
+            restored_key = ("homes", cloud._account)
+            if restored_key in self._restored:
+                CACHE_LOOKUPS.inc("homes", "stale")
+                self._revalidate(restored_key, lambda: self.get_homes(cloud, force=True))
+                return ApiResult(success=True, data=entry[1], stale=True)
+            if self._fresh(entry):
+                CACHE_LOOKUPS.inc("homes", "hit")
+                return ApiResult(success=True, data=entry[1])
+
+        CACHE_LOOKUPS.inc("homes", "miss")
+        result = await cloud_session.call_with_refresh(cloud, cloud.list_home)
+        if result.success and result.data:
+            self._homes[cloud._account] = (time.monotonic(), result.data)
+            self._restored.discard(("homes", cloud._account))
+            self.revision += 1
+        return result
+
+    async def get_appliances(self, cloud: MeijuCloud, home_id: int, force: bool = False) -> ApiResult:
+        """获取家庭设备列表（带缓存）
+
+        Returns:
+            ApiResult: 成功时 data 包含设备字典 {device_id: Appliance}
+        """
+        key = (cloud._account, int(home_id))
+        entry = self._appliances.get(key)
+        if not force and entry is not None:
+            if key in self._restored:
+                CACHE_LOOKUPS.inc("appliances", "stale")
+                self._revalidate(key, lambda: self.get_appliances(cloud, home_id, force=True))
+                return ApiResult(success=True, data=entry[1], stale=True)
+            if self._fresh(entry):
+                CACHE_LOOKUPS.inc("appliances", "hit")
+                return ApiResult(success=True, data=entry[1])
+
+        CACHE_LOOKUPS.inc("appliances", "miss")
+        result = await cloud_session.call_with_refresh(cloud, cloud.list_appliances, home_id)
+        if result.success and result.data:
+            self._appliances[key] = (time.monotonic(), result.data)
+            self._restored.discard(key)
+            self.revision += 1
+        return result
+
+    def _revalidate(self, key: tuple, refresh):
+        """在后台刷新陈旧条目（同一条目只保留一个刷新任务）"""
+        if key in self._revalidating:
+            return
+
+        async def run():
+            try:
+                with background_requests():
+                    result = await refresh()
+                ok = result.success and result.data
+            except Exception as e:
+                logger.warning(f"后台刷新设备清单失败: {e}")
+                ok = False
+            finally:
+                self._revalidating.pop(key, None)
+            if not ok:
+                self._discard_restored(key)
+
+        with tracer.detached():
+            self._revalidating[key] = asyncio.ensure_future(run())
+
+    async def get_all_appliances(self, cloud: MeijuCloud, home_ids, force: bool = False) -> list[ApiResult]:
+        """并发获取多个家庭的设备列表
+
+        以配置的并发上限同时请求各家庭，返回结果顺序与 home_ids 一致。
+        每个家庭独立处理 token 错误与异常，单个家庭失败不影响其他家庭。
+        """
+        semaphore = asyncio.Semaphore(max(1, config.inventory_concurrency))
+
+        async def fetch(home_id) -> ApiResult:
+            async with semaphore:
+                try:
+                    return await self.get_appliances(cloud, home_id, force)
+                except Exception as e:
+                    return ApiResult(success=False, error_code=-1, error_message=str(e))
+
+        return await asyncio.gather(*(fetch(home_id) for home_id in home_ids))
+
+    def find_device(self, account: str, device_id: int) -> Appliance | None:
+        """在已缓存的设备列表中查找设备信息（忽略有效期，不发起请求）"""
+        device_id = int(device_id)
+        for (cached_account, _), (_, appliances) in self._appliances.items():
+            if cached_account == account and device_id in appliances:
+                return appliances[device_id]
+        return None
+
+    def _discard_restored(self, key: tuple):
+        """刷新失败时丢弃快照恢复的条目"""
+        if key not in self._restored:
+            return
+        self._restored.discard(key)
+        if key[0] == "homes":
+            self._homes.pop(key[1], None)
+        else:
+            self._appliances.pop(key, None)
+        self.revision += 1
+
+    def dump(self, account: str) -> dict:
+        """导出账号的清单快照（紧凑的可 JSON 序列化结构，不含 SN）"""
+        entry = self._homes.get(account)
+        if entry is None:
+            return {}
+        appliances = {}
+        for (cached_account, home_id), (_, devices) in self._appliances.items():
+            if cached_account != account:
+                continue
+            appliances[str(home_id)] = [
+                [d.device_id, d.name, d.type_hex, d.sn8, d.model, d.online, d.room]
+                for d in devices.values()
+            ]
+        return {
+            "homes": {str(home_id): home.name for home_id, home in entry[1].items()},
+            "appliances": appliances,
+        }
+
+    def restore(self, account: str, snapshot: dict):
+        """从快照恢复账号的清单，恢复的条目标记为陈旧
+
+        已存在的条目（本次启动后已从云端获取）不会被覆盖。
+        """
+        now = time.monotonic()
+        homes = {int(home_id): Home(int(home_id), name) for home_id, name in snapshot.get("homes", {}).items()}
+        if homes and account not in self._homes:
+            self._homes[account] = (now, homes)
+            self._restored.add(("homes", account))
+        for home_id, rows in snapshot.get("appliances", {}).items():
+            key = (account, int(home_id))
+            if key in self._appliances:
+                continue
+            devices = {}
+            for device_id, name, type_hex, sn8, model, online, room in rows:
+                devices[device_id] = Appliance(
+                    device_id=device_id,
+                    name=name,
+                    type=int(type_hex, 16),
+                    type_hex=type_hex,
+                    sn8=sn8,
+                    model=model,
+                    online=online,
+                    room=room,
+                )
+            self._appliances[key] = (now, devices)
+            self._restored.add(key)
+
+    def invalidate(self, account: str | None = None):
+        """失效缓存
+
+        Args:
+            account: 仅失效指定账号的缓存，None 表示全部失效
+        """
+        self.revision += 1
+        if account is None:
+            self._homes.clear()
+            self._appliances.clear()
+            self._restored.clear()
+            return
+        self._homes.pop(account, None)
+        self._restored.discard(("homes", account))
+        for key in [k for k in self._appliances if k[0] == account]:
+            del self._appliances[key]
+            self._restored.discard(key)
+
+
+# 全局清单缓存实例
+inventory_cache = InventoryCache()
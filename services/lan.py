@@ -0,0 +1,154 @@
+"""
+局域网控制 - 本地优先，失败时按设备回退云端
+"""
+
+import asyncio
+import time
+
+from nekro_agent.api.core import logger
+
+from ..midea import MeijuCloud, ApiResult
+from ..midea.lan import LAN_PORT, LanDevice, LanError
+from ..midea.lan_codec import LAN_CODECS, LanCodec, LanUnsupported
+from ..plugin import config
+from .inventory import inventory_cache
+from .session import cloud_session
+
+
+def parse_address_list(text: str) -> dict[int, tuple[str, int]]:
+    """解析 "设备ID=IP[:端口]" 逗号分隔列表"""
+    addresses = {}
+    for item in (text or "").split(","):
+        device_id, sep, address = item.strip().partition("=")
+        if not sep:
+            continue
+        host, _, port = address.strip().partition(":")
+        try:
+            addresses[int(device_id)] = (host, int(port) if port else LAN_PORT)
+        except ValueError:
+            logger.warning(f"忽略无效的局域网设备地址: {item}")
+    return addresses
+
+
+class LanControl:
+    """局域网控制路由
+
+    提供与 MeijuCloud.send_device_control / get_device_status 相同的接口：
+    已知地址且设备类型有编解码器时先走局域网 V3 协议，
+    本地失败时该设备在一段时间内直接走云端。
+    """
+
+    def __init__(self):
+        self._addresses: dict[int, tuple[str, int]] | None = None
+        self._keys: dict[int, tuple[bytes, bytes]] = {}
+        self._devices: dict[int, LanDevice] = {}
+        self._codecs: dict[int, LanCodec] = {}
+        self._disabled_until: dict[int, float] = {}
+
+    @property
+    def addresses(self) -> dict[int, tuple[str, int]]:
+        """设备地址表 {设备ID: (IP, 端口)}"""
+        if self._addresses is None:
+            self._addresses = parse_address_list(config.lan_devices)
+        return self._addresses
+
+    def set_address(self, device_id: int, host: str, port: int = LAN_PORT):
+        """设置设备地址，地址变化时丢弃旧连接"""
+        device_id = int(device_id)
+        if self.addresses.get(device_id) == (host, port):
+            return
+        self.addresses[device_id] = (host, port)
+        device = self._devices.pop(device_id, None)
+        if device is not None:
+            asyncio.ensure_future(device.close())
+        self._disabled_until.pop(device_id, None)
+
+    def _fallback(self, device_id: int, reason: Exception):
+        """本地失败，暂时改走云端"""
+        logger.info(f"设备 {device_id} 局域网控制失败，{config.lan_retry_after:.0f} 秒内改用云端: {reason}")
+        self._disabled_until[device_id] = time.monotonic() + config.lan_retry_after
+
+    async def _prepare(self, cloud: MeijuCloud, device_id: int) -> tuple[LanDevice, LanCodec] | None:
+        """获取设备的局域网连接与编解码器，不满足本地条件时返回 None"""
+        if not config.lan_enabled:
+            return None
+        device_id = int(device_id)
+        address = self.addresses.get(device_id)
+        if address is None or time.monotonic() < self._disabled_until.get(device_id, 0.0):
+            return None
+        info = inventory_cache.find_device(cloud._account, device_id)
+        codec_cls = LAN_CODECS.get(info.type) if info else None
+        if codec_cls is None:
+            return None
+
+        device = self._devices.get(device_id)
+        if device is None:
+            keys = self._keys.get(device_id)
+            if keys is None:
+                result = await cloud_session.call_with_refresh(cloud, cloud.get_lan_keys, device_id)
+                if not result.success:
+                    self._fallback(device_id, LanError(result.error_message))
+                    return None
+                keys = self._keys[device_id] = (result.data["token"], result.data["key"])
+            host, port = address
+            device = self._devices[device_id] = LanDevice(
+                device_id, host, token=keys[0], key=keys[1], port=port, timeout=config.lan_timeout
+            )
+        codec = self._codecs.get(device_id)
+        if codec is None:
+            codec = self._codecs[device_id] = codec_cls()
+        return device, codec
+
+    async def _query(self, device: LanDevice, codec: LanCodec) -> dict:
+        frame, body_type = codec.query_frame()
+        return codec.decode_status(await device.request(frame, body_type))
+
+    async def get_device_status(self, cloud: MeijuCloud, appliance_code: int, query: dict) -> ApiResult:
+        """获取设备状态（本地优先）"""
+        prepared = await self._prepare(cloud, appliance_code)
+        if prepared is not None:
+            try:
+                status = await self._query(*prepared)
+                if query:
+                    status = {k: v for k, v in status.items() if k in query}
+                if status:
+                    return ApiResult(success=True, data=status)
+            except (LanError, ValueError) as e:
+                self._fallback(int(appliance_code), e)
+        return await cloud.get_device_status(appliance_code, query)
+
+    async def send_device_control(self, cloud: MeijuCloud, appliance_code: int, control: dict) -> ApiResult:
+        """发送设备控制命令（本地优先）"""
+        prepared = await self._prepare(cloud, appliance_code)
+        if prepared is not None:
+            device, codec = prepared
+            try:
+                # 局域网设置消息为全量状态，先查询当前状态再覆盖
+                status = await self._query(device, codec)
+                frame, body_type = codec.control_frame(control, status)
+                new_status = codec.decode_status(await device.request(frame, body_type))
+                return ApiResult(success=True, data={"status": new_status})
+            except LanUnsupported:
+                pass
+            except (LanError, ValueError) as e:
+                self._fallback(int(appliance_code), e)
+        return await cloud.send_device_control(appliance_code, control)
+
+    async def close(self):
+        """关闭所有局域网连接"""
+        devices, self._devices = list(self._devices.values()), {}
+        for device in devices:
+            await device.close()
+
+    def invalidate(self):
+        """丢弃密钥与连接（账号变化时）"""
+        self._keys.clear()
+        self._codecs.clear()
+        self._disabled_until.clear()
+        for device in self._devices.values():
+            asyncio.ensure_future(device.close())
+        self._devices.clear()
+
+
+# 全局局域网控制实例
+lan_control = LanControl()
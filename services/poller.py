@@ -0,0 +1,139 @@
+"""
+设备状态后台轮询 - 保持状态缓存常热
+"""
+
+import asyncio
+import time
+
+from nekro_agent.api.core import logger
+
+from ..midea import background_requests
+from ..plugin import config
+from .inventory import inventory_cache
+from .session import cloud_session
+from .status_cache import status_cache
+
+# 调度循环间隔（秒）
+POLL_TICK = 5.0
+# 最近被控制过的设备视为活跃的时长（秒）
+ACTIVE_WINDOW = 300.0
+
+# 各设备类型的默认轮询间隔（秒）
+POLL_INTERVALS = {
+    0xAC: 60.0,   # 空调
+    0x40: 600.0,  # 热水器
+}
+DEFAULT_POLL_INTERVAL = 180.0
+# 活跃空调的轮询间隔
+ACTIVE_AC_POLL_INTERVAL = 15.0
+# 已关机设备的轮询间隔
+POWER_OFF_POLL_INTERVAL = 600.0
+
+
+def _is_power_off(data: dict) -> bool:
+    """根据状态快照判断设备是否关机"""
+    status = data.get("status", data)
+    return isinstance(status, dict) and status.get("power") in ("off", 0)
+
+
+class StatusPoller:
+    """自适应后台状态轮询
+
+    遍历设备清单，按设备类型与活跃度决定轮询间隔：
+    最近控制过的空调高频轮询，热水器及已关机设备低频轮询，
+    离线设备暂停轮询。结果写入与 get_midea_ac_status 相同的状态缓存。
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+        self._last_polled: dict[int, float] = {}
+        self._last_active: dict[int, float] = {}
+
+    @property
+    def running(self) -> bool:
+        """任务是否正在运行"""
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """启动轮询任务（重复调用无副作用）"""
+        if not config.poller_enabled or self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止轮询任务"""
+        task, self._task = self._task, None
+        if task is None or task.done():
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def mark_active(self, device_id: int):
+        """标记设备刚被控制，提高其轮询频率"""
+        self._last_active[int(device_id)] = time.monotonic()
+
+    def _interval(self, device_id: int, device_type: int, now: float) -> float:
+        """计算设备当前的轮询间隔"""
+        active = now - self._last_active.get(device_id, float("-inf")) < ACTIVE_WINDOW
+        if active and device_type == 0xAC:
+            return ACTIVE_AC_POLL_INTERVAL
+        entry = status_cache.peek(device_id)
+        if entry is not None and _is_power_off(entry.data):
+            return POWER_OFF_POLL_INTERVAL
+        return POLL_INTERVALS.get(device_type, DEFAULT_POLL_INTERVAL)
+
+    async def _poll_once(self):
+        """执行一轮调度：轮询所有已到期的在线设备"""
+        cloud = await cloud_session.get_client()
+        if cloud is None:
+            return
+
+        with background_requests():
+            homes = await inventory_cache.get_homes(cloud)
+            if not homes.success or not homes.data:
+                return
+            app_results = await inventory_cache.get_all_appliances(cloud, homes.data.keys())
+
+        now = time.monotonic()
+        due = []
+        for app_result in app_results:
+            if not app_result.success or not app_result.data:
+                continue
+            for device_id, info in app_result.data.items():
+                # 离线设备暂停轮询
+                if not info.online:
+                    continue
+                interval = self._interval(device_id, info.type, now)
+                if now - self._last_polled.get(device_id, float("-inf")) >= interval:
+                    due.append((device_id, interval))
+
+        semaphore = asyncio.Semaphore(max(1, config.poller_concurrency))
+
+        async def poll(device_id: int, interval: float):
+            async with semaphore:
+                self._last_polled[device_id] = time.monotonic()
+                # 轮询写入的快照在下次轮询前都可直接使用；轮询请求让位于交互请求
+                with background_requests():
+                    await status_cache.refresh(
+                        cloud, device_id, max_stale=max(interval + 2 * POLL_TICK, config.status_cache_max_stale)
+                    )
+
+        await asyncio.gather(*(poll(device_id, interval) for device_id, interval in due))
+
+    async def _run(self):
+        """轮询循环"""
+        while True:
+            try:
+                await self._poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"设备状态轮询失败: {e}")
+            await asyncio.sleep(POLL_TICK)
+
+
+# 全局轮询任务实例
+status_poller = StatusPoller()
@@ -0,0 +1,82 @@
+"""
+凭证后台续期 - 在 token 过期前主动重新登录
+"""
+
+import asyncio
+import random
+
+from nekro_agent.api.core import logger
+
+from ..plugin import config
+from .session import cloud_session
+
+# 未登录或刚续期后的检查间隔（秒）
+CHECK_INTERVAL = 300.0
+# 续期时间随机抖动比例，避免多实例同时登录
+RENEW_JITTER = 0.1
+
+
+class TokenRenewer:
+    """后台 token 续期任务
+
+    根据 token 签发时间，在达到配置的续期时长（带随机抖动）时
+    通过会话的单飞刷新重新登录并写回 KV 存储，
+    使请求不会因为 token 过期而先失败一次。
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+        self._jitter = random.uniform(-RENEW_JITTER, RENEW_JITTER)
+
+    @property
+    def running(self) -> bool:
+        """任务是否正在运行"""
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """启动续期任务（重复调用无副作用）"""
+        if not config.token_renew_enabled or self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止续期任务"""
+        task, self._task = self._task, None
+        if task is None or task.done():
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def _next_delay(self, token_age: float) -> float:
+        """计算距离下次续期的等待秒数"""
+        renew_after = config.token_renew_hours * 3600 * (1 + self._jitter)
+        return max(0.0, min(renew_after - token_age, CHECK_INTERVAL))
+
+    async def _run(self):
+        """续期循环"""
+        while True:
+            try:
+                cloud = await cloud_session.get_client()
+                if cloud is None:
+                    delay = CHECK_INTERVAL
+                else:
+                    delay = self._next_delay(cloud.token_age)
+                    if delay <= 0:
+                        logger.info("美的凭证即将过期，正在后台续期...")
+                        await cloud_session.refresh_credentials(cloud)
+                        # 每个新 token 使用新的抖动值
+                        self._jitter = random.uniform(-RENEW_JITTER, RENEW_JITTER)
+                        delay = CHECK_INTERVAL
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"凭证后台续期失败: {e}")
+                delay = CHECK_INTERVAL
+            await asyncio.sleep(delay)
+
+
+# 全局续期任务实例
+token_renewer = TokenRenewer()
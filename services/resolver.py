@@ -0,0 +1,184 @@
+"""
+设备解析 - 按名称、房间、类型定位设备 ID
+"""
+
+import difflib
+import re
+import unicodedata
+
+from ..constants import DEVICE_TYPE_NAMES
+from ..midea import MeijuCloud, Appliance, tracer
+from .inventory import inventory_cache
+
+try:
+    from pypinyin import Style, lazy_pinyin
+except ImportError:  # pragma: no cover - 可选依赖
+    lazy_pinyin = None
+
+# 模糊匹配的最低相似度
+FUZZY_CUTOFF = 0.6
+
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def normalize(text: str) -> str:
+    """归一化选择器：全半角统一、小写、去除空白与标点"""
+    return _SEPARATORS.sub("", unicodedata.normalize("NFKC", str(text)).lower())
+
+
+def _spellings(text: str) -> set[str]:
+    """归一化文本及其全拼（安装 pypinyin 时）"""
+    text = normalize(text)
+    spellings = {text}
+    if lazy_pinyin is not None:
+        spellings.add("".join(lazy_pinyin(text)))
+    spellings.discard("")
+    return spellings
+
+
+def _initials(text: str) -> str:
+    """拼音首字母缩写，未安装 pypinyin 时为空"""
+    if lazy_pinyin is None:
+        return ""
+    return "".join(lazy_pinyin(normalize(text), style=Style.FIRST_LETTER))
+
+
+# 类型名称及其全拼，按长度降序以优先去除 "中央空调" 而非 "空调"
+_TYPE_TERMS = sorted(
+    {s for name in DEVICE_TYPE_NAMES.values() for s in _spellings(name)}, key=len, reverse=True
+)
+
+
+def _aliases(info: Appliance) -> tuple[set[str], set[str]]:
+    """设备的别名（已归一化）
+
+    Returns:
+        (全部别名, 可用于子串/相似度匹配的别名)。
+        单独的类型名与拼音首字母只参与精确匹配，否则 "书房空调" 会因包含 "空调"
+        而匹配到家中唯一的空调。
+    """
+    type_name = DEVICE_TYPE_NAMES.get(info.type, "")
+    names = {info.name or "", info.room + type_name}
+    if info.name and info.room not in info.name:
+        names.add(info.room + info.name)
+    specific = {s for n in names for s in _spellings(n)} - set(_TYPE_TERMS)
+    aliases = specific | _spellings(type_name) | {_initials(n) for n in names | {type_name}}
+    aliases.discard("")
+    return aliases, specific
+
+
+def _qualifier(key: str) -> str:
+    """去掉选择器中的类型名，得到房间/名称部分（如 "书房空调" 中的 "书房"）"""
+    for term in _TYPE_TERMS:
+        if term in key:
+            return key.replace(term, "", 1)
+    return key
+
+
+class DeviceResolver:
+    """设备选择器索引
+
+    由设备清单缓存构建 {别名: 设备ID集合} 索引，别名包括设备名、房间+设备名、
+    房间+类型名、类型名及其拼音（安装 pypinyin 时）。设备清单未变化时复用索引，
+    精确匹配为一次字典查找；未命中时依次尝试子串匹配和相似度匹配，
+    且选择器中的房间/名称部分必须与候选设备相符。
+    """
+
+    def __init__(self):
+        self._signature: tuple | None = None
+        self._index: dict[str, set[int]] = {}
+        self._specific: dict[str, set[int]] = {}
+        self._devices: dict[int, Appliance] = {}
+        self._parts: dict[int, set[str]] = {}
+
+    async def _refresh(self, cloud: MeijuCloud):
+        """设备清单变化时重建索引"""
+        homes = await inventory_cache.get_homes(cloud)
+        if not homes.success or not homes.data:
+            return
+        app_results = await inventory_cache.get_all_appliances(cloud, homes.data.keys())
+        # 设备清单每次变化都会使 revision 递增
+        signature = (cloud._account, inventory_cache.revision)
+        if signature == self._signature:
+            return
+
+        index: dict[str, set[int]] = {}
+        specific_index: dict[str, set[int]] = {}
+        devices: dict[int, Appliance] = {}
+        parts: dict[int, set[str]] = {}
+        for result in app_results:
+            if not result.success or not result.data:
+                continue
+            for device_id, info in result.data.items():
+                devices[device_id] = info
+                parts[device_id] = (_spellings(info.room) | _spellings(info.name or "")) - set(_TYPE_TERMS)
+                aliases, specific = _aliases(info)
+                for alias in aliases:
+                    index.setdefault(alias, set()).add(device_id)
+                for alias in specific:
+                    specific_index.setdefault(alias, set()).add(device_id)
+        self._index, self._specific, self._devices, self._parts = index, specific_index, devices, parts
+        self._signature = signature
+
+    def _match(self, key: str) -> set[int]:
+        """按别名查找候选设备"""
+        ids = self._index.get(key)
+        if ids:
+            return ids
+        # 子串匹配，如 "客厅的空调"
+        ids = set()
+        for alias, alias_ids in self._specific.items():
+            if key in alias or alias in key:
+                ids |= alias_ids
+        if not ids:
+            for alias in difflib.get_close_matches(key, self._specific.keys(), n=3, cutoff=FUZZY_CUTOFF):
+                ids |= self._specific[alias]
+        # 房间/名称部分必须与设备相符，"书房空调" 不能落到客厅的空调上
+        qualifier = _qualifier(key)
+        if qualifier:
+            ids = {i for i in ids if any(qualifier in part or part in qualifier for part in self._parts[i])}
+        return ids
+
+    async def resolve(
+        self, cloud: MeijuCloud, selector: int | str, device_type: int | None = None
+    ) -> tuple[int | None, str]:
+        """解析设备选择器
+
+        Args:
+            cloud: 美的云客户端
+            selector: 设备 ID，或设备名称/房间+类型（如 "客厅空调"）
+            device_type: 期望的设备类型，候选不唯一时用于缩小范围
+
+        Returns:
+            (设备ID, "") 或 (None, 错误码)
+        """
+        if isinstance(selector, int):
+            tracer.annotate(device_id=selector)
+            return selector, ""
+        text = str(selector).strip()
+        if text.isdigit():
+            tracer.annotate(device_id=int(text))
+            return int(text), ""
+
+        key = normalize(text)
+        if not key:
+            return None, "error:invalid_device_id"
+        with tracer.span("resolve_device", selector=text):
+            await self._refresh(cloud)
+            ids = self._match(key)
+        if device_type is not None and len(ids) > 1:
+            typed = {i for i in ids if self._devices[i].type == device_type}
+            ids = typed or ids
+
+        if not ids:
+            return None, f"error:device_not_found:{text}"
+        if len(ids) > 1:
+            candidates = ",".join(f"{self._devices[i].room}{self._devices[i].name}({i})" for i in sorted(ids))
+            return None, f"error:ambiguous_device:{candidates}"
+        device_id = next(iter(ids))
+        tracer.annotate(device_id=device_id)
+        return device_id, ""
+
+
+# 全局设备解析实例
+device_resolver = DeviceResolver()
@@ -0,0 +1,131 @@
+"""
+场景管理 - 持久化的多设备控制组合
+"""
+
+import asyncio
+import json
+from dataclasses import dataclass
+
+from ..constants import STORE_KEY_SCENES
+from ..plugin import plugin
+
+# 场景名称最大长度
+MAX_SCENE_NAME_LENGTH = 32
+
+
+@dataclass(frozen=True)
+class Scene:
+    """场景：按设备合并后的控制命令"""
+    name: str
+    controls: dict[int, dict]
+
+    def to_dict(self) -> dict:
+        """转换为可 JSON 序列化的字典"""
+        return {
+            "name": self.name,
+            "actions": [{"device_id": d, "control": c} for d, c in self.controls.items()],
+        }
+
+
+def build_scene(name: str, actions: list) -> Scene:
+    """校验并构建场景
+
+    同一设备的多条动作按顺序合并，执行时无需再做任何处理。
+
+    Args:
+        name: 场景名称
+        actions: [{"device_id": 设备ID, "control": {控制参数}}, ...]
+
+    Raises:
+        ValueError: 参数无效
+    """
+    name = (name or "").strip()
+    if not name or len(name) > MAX_SCENE_NAME_LENGTH:
+        raise ValueError(f"场景名称不能为空且不超过 {MAX_SCENE_NAME_LENGTH} 个字符")
+    if not actions or not isinstance(actions, list):
+        raise ValueError("场景至少需要一个设备动作")
+
+    controls: dict[int, dict] = {}
+    for action in actions:
+        if not isinstance(action, dict):
+            raise ValueError("设备动作格式错误")
+        try:
+            device_id = int(action.get("device_id"))
+        except (TypeError, ValueError):
+            raise ValueError(f"设备ID无效: {action.get('device_id')}")
+        control = action.get("control")
+        if not control or not isinstance(control, dict):
+            raise ValueError(f"设备 {device_id} 的控制参数必须是非空的JSON对象")
+        controls.setdefault(device_id, {}).update(control)
+    return Scene(name=name, controls=controls)
+
+
+class SceneStore:
+    """场景存储
+
+    场景保存在 KV 存储中，首次使用时加载到内存，之后的读取不访问存储。
+    修改时先写入存储，成功后才替换内存中的场景表，两者始终一致。
+    """
+
+    def __init__(self):
+        self._scenes: dict[str, Scene] | None = None
+        self._lock = asyncio.Lock()
+
+    async def _load(self) -> dict[str, Scene]:
+        if self._scenes is None:
+            async with self._lock:
+                if self._scenes is None:
+                    raw = await plugin.store.get(store_key=STORE_KEY_SCENES)
+                    scenes = {}
+                    for item in json.loads(raw) if raw else []:
+                        try:
+                            scene = build_scene(item.get("name"), item.get("actions"))
+                        except ValueError:
+                            continue
+                        scenes[scene.name] = scene
+                    self._scenes = scenes
+        return self._scenes
+
+    @staticmethod
+    async def _persist(scenes: dict[str, Scene]):
+        await plugin.store.set(
+            store_key=STORE_KEY_SCENES,
+            value=json.dumps([s.to_dict() for s in scenes.values()], ensure_ascii=False)
+        )
+
+    async def list_scenes(self) -> list[Scene]:
+        """获取所有场景"""
+        return list((await self._load()).values())
+
+    async def get(self, name: str) -> Scene | None:
+        """按名称获取场景"""
+        return (await self._load()).get(name)
+
+    async def save(self, name: str, actions: list) -> Scene:
+        """新建或覆盖场景
+
+        Raises:
+            ValueError: 参数无效
+        """
+        scene = build_scene(name, actions)
+        await self._load()
+        async with self._lock:
+            scenes = {**self._scenes, scene.name: scene}
+            await self._persist(scenes)
+            self._scenes = scenes
+        return scene
+
+    async def delete(self, name: str) -> bool:
+        """删除场景，不存在时返回 False"""
+        await self._load()
+        async with self._lock:
+            if name not in self._scenes:
+                return False
+            scenes = {k: v for k, v in self._scenes.items() if k != name}
+            await self._persist(scenes)
+            self._scenes = scenes
+        return True
+
+
+# 全局场景存储实例
+scene_store = SceneStore()
@@ -0,0 +1,209 @@
+"""
+美的云会话管理 - 进程内共享的已登录客户端
+"""
+
+import asyncio
+import json
+import time
+
+from nekro_agent.api.core import logger
+
+from ..constants import STORE_KEY_CREDENTIALS
+from ..midea import MeijuCloud, ApiResult, deadline_remaining, foreground_requests, request_deadline, tracer
+from ..midea.metrics import TOKEN_REFRESHES
+from ..plugin import plugin
+
+# 刷新结果缓存时长（秒）：短时间内重复触发的刷新直接复用上次结果
+REFRESH_SUCCESS_TTL = 5.0
+REFRESH_FAILURE_TTL = 30.0
+
+
+class CloudSession:
+    """进程内共享的美的云会话
+
+    沙箱方法与 Web 路由共用同一个已登录的 MeijuCloud 实例。
+    凭证只在首次使用时从 KV 存储读取一次，之后常驻内存；
+    登录、退出登录时显式更新或失效。
+
+    每次登录、退出登录或失效都会开始新的会话代；
+    跨越会话代完成的凭证刷新结果会被丢弃，不会覆盖新的会话。
+    """
+
+    def __init__(self):
+        self._cloud: MeijuCloud | None = None
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._refresh_task: asyncio.Future | None = None
+        self._last_refresh_ok: bool | None = None
+        self._last_refresh_at = 0.0
+        self._generation = 0
+
+    @property
+    def account(self) -> str:
+        """当前登录账号，未登录返回空字符串"""
+        return self._cloud._account if self._cloud else ""
+
+    async def get_client(self) -> MeijuCloud | None:
+        """获取已登录的云客户端
+
+        热路径直接返回内存中的实例，不访问 KV 存储。
+        """
+        if self._loaded:
+            return self._cloud
+        async with self._load_lock:
+            if not self._loaded:
+                creds_json = await plugin.store.get(store_key=STORE_KEY_CREDENTIALS)
+                self._cloud = self._build_client(json.loads(creds_json) if creds_json else None)
+                self._loaded = True
+        return self._cloud
+
+    @staticmethod
+    def _build_client(creds: dict | None) -> MeijuCloud | None:
+        """根据存储的凭证构建客户端"""
+        if not creds or not creds.get("access_token"):
+            return None
+        cloud = MeijuCloud(
+            account=creds.get("account", ""),
+            password=creds.get("password", ""),  # 加载密码用于自动刷新
+        )
+        cloud.load_credentials(creds)
+        return cloud
+
+    def _new_generation(self):
+        """开始新的会话代，丢弃进行中的刷新与缓存的刷新结果"""
+        self._generation += 1
+        self._refresh_task = None
+        self._last_refresh_ok = None
+
+    async def save(self, cloud: MeijuCloud):
+        """持久化客户端当前凭证并设为活动会话"""
+        self._new_generation()
+        await self._persist(cloud)
+
+    async def _persist(self, cloud: MeijuCloud, generation: int | None = None) -> bool:
+        """写入凭证并设为活动会话
+
+        Args:
+            generation: 发起写入时的会话代，写入期间会话已变更时不再替换活动会话
+        """
+        creds = cloud.get_credentials()
+        await plugin.store.set(
+            store_key=STORE_KEY_CREDENTIALS,
+            value=json.dumps(creds)
+        )
+        if generation is not None and self._generation != generation:
+            return False
+        self._cloud = cloud
+        self._loaded = True
+        return True
+
+    async def logout(self):
+        """删除存储的凭证并清空会话"""
+        self._new_generation()
+        await plugin.store.delete(store_key=STORE_KEY_CREDENTIALS)
+        self._cloud = None
+        self._loaded = True
+
+    def invalidate(self):
+        """丢弃内存中的会话，下次使用时重新从存储加载"""
+        self._new_generation()
+        self._cloud = None
+        self._loaded = False
+
+    async def refresh_credentials(self, cloud: MeijuCloud, stale_token: str | None = None) -> bool:
+        """刷新凭证（单飞）
+
+        当检测到登录状态失效时，使用保存的账号密码重新登录。
+        并发调用方共享同一次登录：若 token 已被其他调用方刷新，
+        直接返回 True 让调用方用新 token 重试；成功与失败结果都会短暂缓存。
+
+        Args:
+            cloud: 美的云客户端
+            stale_token: 调用方请求时使用的 token，用于判断是否已被刷新
+
+        Returns:
+            刷新成功返回 True，失败返回 False
+        """
+        if stale_token is not None and cloud.access_token != stale_token:
+            return True
+
+        if self._refresh_task is None:
+            if self._last_refresh_ok is not None:
+                ttl = REFRESH_SUCCESS_TTL if self._last_refresh_ok else REFRESH_FAILURE_TTL
+                if time.monotonic() - self._last_refresh_at < ttl:
+                    return self._last_refresh_ok
+            # 刷新由多个调用方共享：不归属发起者的追踪，
+            # 也不继承后台优先级（前台控制命令可能正在等待这次登录）
+            with tracer.detached(), foreground_requests():
+                self._refresh_task = asyncio.ensure_future(self._do_refresh(cloud, self._generation))
+
+        # shield: 单个调用方被取消或超出截止时间时不影响其他等待者
+        with tracer.span("refresh") as span:
+            try:
+                success = await asyncio.wait_for(asyncio.shield(self._refresh_task), deadline_remaining())
+            except asyncio.TimeoutError:
+                success = False
+            span.set(success=success)
+            return success
+
+    async def call_with_refresh(self, cloud: MeijuCloud, func, *args, **kwargs) -> ApiResult:
+        """调用云接口，遇到 token 错误时刷新凭证后重试一次
+
+        Args:
+            cloud: 美的云客户端
+            func: cloud 上的接口方法，如 cloud.list_home
+        """
+        token = cloud.access_token
+        result = await func(*args, **kwargs)
+        if result.is_token_error:
+            logger.debug(f"检测到 token 错误 (code={result.error_code})，尝试刷新凭证...")
+            if await self.refresh_credentials(cloud, token):
+                result = await func(*args, **kwargs)
+        return result
+
+    async def _do_refresh(self, cloud: MeijuCloud, generation: int) -> bool:
+        """执行一次重新登录并持久化凭证"""
+        try:
+            # 登录由多个调用方共享，不受发起者的调用截止时间约束
+            with request_deadline(None):
+                success = await self._login_and_save(cloud, generation)
+        except Exception as e:
+            logger.error(f"凭证刷新异常: {e}")
+            success = False
+        finally:
+            if self._generation == generation:
+                self._refresh_task = None
+
+        if self._generation != generation:
+            # 刷新期间会话已变更（重新登录或退出登录），结果作废
+            TOKEN_REFRESHES.inc("discarded")
+            return False
+        self._last_refresh_ok = success
+        self._last_refresh_at = time.monotonic()
+        TOKEN_REFRESHES.inc("ok" if success else "failed")
+        return success
+
+    async def _login_and_save(self, cloud: MeijuCloud, generation: int) -> bool:
+        """重新登录，成功后保存凭证"""
+        # 检查是否有密码
+        if not cloud._password:
+            logger.warning("无法自动刷新凭证：未保存密码")
+            return False
+
+        logger.info(f"正在自动刷新美的账号 {cloud._account} 的凭证...")
+        success, message = await cloud.login()
+        if success:
+            if self._generation != generation:
+                logger.info("会话已变更，丢弃过期的凭证刷新结果")
+                return False
+            # 保存新凭证
+            if not await self._persist(cloud, generation):
+                return False
+            logger.info("凭证刷新成功")
+            return True
+        logger.error(f"凭证刷新失败: {message}")
+        return False
+
+
+# 全局会话实例
+cloud_session = CloudSession()
@@ -0,0 +1,146 @@
+"""
+启动快照 - 持久化设备清单与最近状态，重启后立即可用
+"""
+
+import asyncio
+import time
+
+from nekro_agent.api.core import logger
+
+from ..constants import STORE_KEY_SNAPSHOT
+from ..midea import json_codec
+from ..plugin import plugin, config
+from .inventory import inventory_cache
+from .session import cloud_session
+from .status_cache import status_cache
+
+# 快照格式版本，格式不兼容时递增
+SNAPSHOT_VERSION = 1
+# 检查缓存变化并保存快照的间隔（秒）
+SAVE_INTERVAL = 60.0
+
+
+class InventorySnapshot:
+    """设备清单与状态快照
+
+    启动时从 KV 存储加载快照并恢复到清单缓存和状态缓存，恢复的数据标记为陈旧：
+    首次读取时立即返回，同时在后台从云端刷新。运行期间定期检查缓存是否变化，
+    有变化时重新保存；插件清理时保存最后一次。
+    快照只对保存时登录的账号生效，且不包含设备 SN。
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+        self._saved_revision: tuple[int, int] | None = None
+
+    @property
+    def running(self) -> bool:
+        """任务是否正在运行"""
+        return self._task is not None and not self._task.done()
+
+    def _revision(self) -> tuple[int, int]:
+        return inventory_cache.revision, status_cache.revision
+
+    async def load(self) -> bool:
+        """加载快照并恢复缓存，在后台开始刷新恢复的清单
+
+        Returns:
+            是否恢复了快照
+        """
+        if not config.snapshot_enabled:
+            return False
+        try:
+            raw = await plugin.store.get(store_key=STORE_KEY_SNAPSHOT)
+            snapshot = json_codec.loads(raw) if raw else None
+            if not snapshot or snapshot.get("version") != SNAPSHOT_VERSION:
+                return False
+            elapsed = max(0.0, time.time() - snapshot.get("saved_at", 0))
+            if elapsed > config.snapshot_max_age:
+                return False
+            cloud = await cloud_session.get_client()
+            if cloud is None or cloud._account != snapshot.get("account"):
+                return False
+            inventory = snapshot.get("inventory", {})
+            inventory_cache.restore(cloud._account, inventory)
+            status_cache.restore(snapshot.get("status", []), elapsed)
+            self._saved_revision = self._revision()
+
+            # 读取恢复的条目会立即返回并触发后台刷新
+            await inventory_cache.get_homes(cloud)
+            for home_id in inventory.get("appliances", {}):
+                await inventory_cache.get_appliances(cloud, int(home_id))
+        except Exception as e:
+            logger.warning(f"加载设备快照失败: {e}")
+            return False
+        logger.info(f"已加载设备快照（{elapsed:.0f} 秒前保存）")
+        return True
+
+    async def save(self) -> bool:
+        """缓存有变化时保存快照
+
+        Returns:
+            是否写入了快照
+        """
+        if not config.snapshot_enabled:
+            return False
+        revision = self._revision()
+        if revision == self._saved_revision:
+            return False
+        cloud = await cloud_session.get_client()
+        if cloud is None:
+            return False
+        inventory = inventory_cache.dump(cloud._account)
+        if not inventory:
+            return False
+        await plugin.store.set(
+            store_key=STORE_KEY_SNAPSHOT,
+            value=json_codec.dumps({
+                "version": SNAPSHOT_VERSION,
+                "account": cloud._account,
+                "saved_at": time.time(),
+                "inventory": inventory,
+                "status": status_cache.dump(),
+            }),
+        )
+        self._saved_revision = revision
+        return True
+
+    async def clear(self):
+        """删除已保存的快照（退出登录时使用）"""
+        self._saved_revision = None
+        await plugin.store.delete(store_key=STORE_KEY_SNAPSHOT)
+
+    def start(self):
+        """启动定期保存任务（重复调用无副作用）"""
+        if not config.snapshot_enabled or self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止定期保存任务并保存最后一次快照"""
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await self.save()
+        except Exception as e:
+            logger.error(f"保存设备快照失败: {e}")
+
+    async def _run(self):
+        """定期保存循环"""
+        while True:
+            await asyncio.sleep(SAVE_INTERVAL)
+            try:
+                await self.save()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"保存设备快照失败: {e}")
+
+
+# 全局设备快照实例
+inventory_snapshot = InventorySnapshot()
@@ -0,0 +1,212 @@
+"""
+设备状态缓存 - 过期后先返回旧数据并在后台刷新
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+
+from nekro_agent.api.core import logger
+
+from ..midea import (
+    MeijuCloud,
+    ApiResult,
+    ERROR_CODE_DEADLINE_EXCEEDED,
+    background_requests,
+    deadline_remaining,
+    request_deadline,
+    tracer,
+)
+from ..midea.metrics import CACHE_LOOKUPS
+from ..plugin import config
+from .session import cloud_session
+from .lan import lan_control
+
+
+@dataclass
+class StatusEntry:
+    """缓存的设备状态快照"""
+    data: dict
+    fetched_at: float  # time.monotonic()
+    max_stale: float | None = None  # 覆盖全局最大陈旧时长（后台轮询写入时使用）
+    restored: bool = False  # 从启动快照恢复，尚未从设备刷新
+
+    @property
+    def age(self) -> float:
+        """数据已存在的秒数"""
+        return time.monotonic() - self.fetched_at
+
+
+class StatusCache:
+    """按 (设备ID, 查询参数) 缓存设备状态
+
+    - 新鲜期内：直接返回缓存
+    - 超过新鲜期但未超过最大陈旧时长：返回旧数据，同时在后台刷新
+    - 超过最大陈旧时长或无缓存：同步请求云端
+    - 从启动快照恢复的状态：未超过快照最长有效期时先返回，同时在后台刷新；
+      刷新失败后丢弃，下次读取同步请求
+    同一键的并发请求共享一次云端请求；后台刷新以后台优先级排队，不抢占控制命令。
+    status_cache_fresh <= 0 时不使用缓存，每次直接请求。
+    """
+
+    def __init__(self):
+        self._entries: dict[tuple[int, str], StatusEntry] = {}
+        self._inflight: dict[tuple[int, str], asyncio.Future] = {}
+        # 内容变化计数，供快照判断是否需要重新保存
+        self.revision = 0
+
+    @staticmethod
+    def _key(device_id: int, query: dict | None) -> tuple[int, str]:
+        return int(device_id), json.dumps(query or {}, sort_keys=True)
+
+    def peek(self, device_id: int, query: dict | None = None) -> StatusEntry | None:
+        """读取缓存项，不触发任何请求"""
+        return self._entries.get(self._key(device_id, query))
+
+    def put(self, device_id: int, data: dict, query: dict | None = None):
+        """写入状态快照"""
+        self._entries[self._key(device_id, query)] = StatusEntry(data=data, fetched_at=time.monotonic())
+        self.revision += 1
+
+    def invalidate(self, device_id: int | None = None):
+        """失效缓存
+
+        Args:
+            device_id: 仅失效该设备的缓存，None 表示全部失效
+        """
+        self.revision += 1
+        if device_id is None:
+            self._entries.clear()
+            return
+        device_id = int(device_id)
+        for key in [k for k in self._entries if k[0] == device_id]:
+            del self._entries[key]
+
+    def dump(self) -> list:
+        """导出状态快照 [[设备ID, 查询参数, 状态, 已存在秒数], ...]"""
+        return [
+            [device_id, query_key, entry.data, round(entry.age, 1)]
+            for (device_id, query_key), entry in self._entries.items()
+        ]
+
+    def restore(self, rows: list, elapsed: float = 0.0):
+        """从快照恢复状态，恢复的条目标记为陈旧
+
+        Args:
+            rows: dump() 导出的数据
+            elapsed: 快照保存至今经过的秒数，计入数据已存在的时长
+        """
+        now = time.monotonic()
+        for device_id, query_key, data, age in rows:
+            key = (int(device_id), query_key)
+            if key in self._entries:
+                continue
+            self._entries[key] = StatusEntry(data=data, fetched_at=now - age - elapsed, restored=True)
+
+    async def get(self, cloud: MeijuCloud, device_id: int, query: dict | None = None) -> tuple[ApiResult, float]:
+        """获取设备状态
+
+        需要等待云端时受当前调用截止时间约束；超时的请求继续在后台完成并写入缓存。
+
+        Returns:
+            (ApiResult, 数据已存在的秒数)
+        """
+        key = self._key(device_id, query)
+        entry = self._entries.get(key) if config.status_cache_fresh > 0 else None
+        if entry is not None:
+            age = entry.age
+            if age < config.status_cache_fresh and not entry.restored:
+                CACHE_LOOKUPS.inc("status", "hit")
+                return ApiResult(success=True, data=entry.data), age
+            if entry.restored:
+                max_stale = config.snapshot_max_age
+            else:
+                max_stale = entry.max_stale or config.status_cache_max_stale
+            if age < max_stale:
+                CACHE_LOOKUPS.inc("status", "stale")
+                self._fetch(cloud, key, background=True)
+                return ApiResult(success=True, data=entry.data, stale=True), age
+
+        CACHE_LOOKUPS.inc("status", "miss")
+        with tracer.span("status_fetch", device_id=key[0]):
+            try:
+                result = await asyncio.wait_for(asyncio.shield(self._fetch(cloud, key)), deadline_remaining())
+            except asyncio.TimeoutError:
+                result = ApiResult(
+                    success=False,
+                    error_code=ERROR_CODE_DEADLINE_EXCEEDED,
+                    error_message="请求超出调用截止时间",
+                )
+        return result, 0.0
+
+    async def refresh(
+        self,
+        cloud: MeijuCloud,
+        device_id: int,
+        query: dict | None = None,
+        max_stale: float | None = None,
+    ) -> ApiResult:
+        """强制从云端刷新设备状态并写入缓存
+
+        Args:
+            max_stale: 该快照允许的最大陈旧时长，None 使用全局配置
+        """
+        return await asyncio.shield(self._fetch(cloud, self._key(device_id, query), max_stale))
+
+    def _fetch(
+        self,
+        cloud: MeijuCloud,
+        key: tuple[int, str],
+        max_stale: float | None = None,
+        background: bool = False,
+    ) -> asyncio.Future:
+        """发起（或复用进行中的）云端状态请求
+
+        Args:
+            background: 以后台流量优先级发起（过期数据的后台刷新）
+        """
+        future = self._inflight.get(key)
+        if future is None:
+            # 任务创建时复制当前上下文：请求由多个调用方共享，不归属发起者的追踪，
+            # 也不受发起者的截止时间限制；后台刷新在此处标记即可作用于整个请求
+            with tracer.detached(), request_deadline(None):
+                if background:
+                    with background_requests():
+                        future = asyncio.ensure_future(self._do_fetch(cloud, key, max_stale))
+                else:
+                    future = asyncio.ensure_future(self._do_fetch(cloud, key, max_stale))
+            self._inflight[key] = future
+        return future
+
+    async def _do_fetch(self, cloud: MeijuCloud, key: tuple[int, str], max_stale: float | None = None) -> ApiResult:
+        device_id, query_key = key
+        try:
+            result = await cloud_session.call_with_refresh(
+                cloud, lan_control.get_device_status, cloud, device_id, json.loads(query_key)
+            )
+            if result.success and result.data:
+                self._entries[key] = StatusEntry(
+                    data=result.data, fetched_at=time.monotonic(), max_stale=max_stale
+                )
+                self.revision += 1
+            else:
+                self._discard_restored(key)
+            return result
+        except Exception as e:
+            logger.error(f"获取设备 {device_id} 状态失败: {e}")
+            self._discard_restored(key)
+            return ApiResult(success=False, error_code=-1, error_message=str(e))
+        finally:
+            self._inflight.pop(key, None)
+
+    def _discard_restored(self, key: tuple[int, str]):
+        """刷新失败时丢弃快照恢复的状态，不再当作当前状态返回"""
+        entry = self._entries.get(key)
+        if entry is not None and entry.restored:
+            del self._entries[key]
+            self.revision += 1
+
+
+# 全局状态缓存实例
+status_cache = StatusCache()
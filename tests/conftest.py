@@ -0,0 +1,17 @@
+"""
+测试配置 - 将仓库目录注册为 nekro_midea_plugin 包
+
+只注册包路径而不执行插件入口（入口依赖 nekro_agent 运行环境），
+因此 midea/ 下的模块可以独立测试；依赖插件运行环境的测试自行 importorskip。
+"""
+
+import sys
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+if "nekro_midea_plugin" not in sys.modules:
+    package = types.ModuleType("nekro_midea_plugin")
+    package.__path__ = [str(ROOT)]
+    sys.modules["nekro_midea_plugin"] = package
@@ -0,0 +1,109 @@
+"""
+模拟局域网设备 - 本地 asyncio TCP 服务，实现 V3 (8370) 握手与空调查询/设置
+"""
+
+import asyncio
+import os
+
+from nekro_midea_plugin.midea.lan import (
+    MSGTYPE_ENCRYPTED_RESPONSE,
+    MSGTYPE_HANDSHAKE_REQUEST,
+    MSGTYPE_HANDSHAKE_RESPONSE,
+    LanSecurity,
+    build_frame,
+    build_packet,
+    parse_frame,
+    parse_packet,
+)
+from nekro_midea_plugin.midea.lan_codec import _crc8
+
+AC_QUERY_BODY_TYPE = 0x41
+AC_SET_BODY_TYPE = 0x40
+AC_STATUS_BODY_TYPE = 0xC0
+
+
+class FakeAirConditioner:
+    """模拟空调
+
+    按 V3 协议完成握手（token 不匹配时返回 ERROR），
+    对查询消息返回当前状态，对设置消息更新状态后返回新状态。
+    """
+
+    def __init__(self, device_id: int, token: bytes | None = None, key: bytes | None = None):
+        self.device_id = device_id
+        self.token = token or os.urandom(64)
+        self.key = key or os.urandom(32)
+        self.requests: list[int] = []  # 收到的消息体类型
+        self.handshakes = 0
+        # 制冷 24℃，自动风速，室内 25℃
+        self.power = True
+        self.mode = 2
+        self.temperature = 24
+        self.wind_speed = 102
+        self._server: asyncio.AbstractServer | None = None
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self) -> "FakeAirConditioner":
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    def status_body(self) -> bytes:
+        body = bytearray(24)
+        body[0] = AC_STATUS_BODY_TYPE
+        body[1] = 0x01 if self.power else 0
+        body[2] = ((self.mode << 5) & 0xE0) | ((self.temperature - 16) & 0x0F)
+        body[3] = self.wind_speed
+        body[11] = 50 + 2 * 25
+        body[12] = 0xFF
+        body[22] = 1  # 消息序号
+        body[23] = _crc8(body[:23])
+        return bytes(body)
+
+    def _apply(self, body: bytes):
+        self.power = bool(body[1] & 0x01)
+        self.mode = (body[2] & 0xE0) >> 5
+        self.temperature = (body[2] & 0x0F) + 16
+        self.wind_speed = body[3] & 0x7F
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        security = LanSecurity()
+        buffer = b""
+        try:
+            while data := await reader.read(4096):
+                messages, buffer = security.decode_8370(buffer + data)
+                for msgtype, payload in messages:
+                    if msgtype == MSGTYPE_HANDSHAKE_REQUEST:
+                        self.handshakes += 1
+                        if payload != self.token:
+                            writer.write(b"ERROR")
+                            continue
+                        tcp_key = os.urandom(32)
+                        writer.write(security.encode_8370(
+                            LanSecurity.handshake_response(self.key, tcp_key), MSGTYPE_HANDSHAKE_RESPONSE
+                        ))
+                        security.tcp_key = tcp_key
+                        continue
+                    _, message_type, body = parse_frame(parse_packet(payload))
+                    self.requests.append(body[0])
+                    if body[0] == AC_SET_BODY_TYPE:
+                        self._apply(body)
+                    frame = build_frame(0xAC, message_type, self.status_body())
+                    writer.write(security.encode_8370(
+                        build_packet(self.device_id, frame), MSGTYPE_ENCRYPTED_RESPONSE
+                    ))
+                await writer.drain()
+        finally:
+            writer.close()
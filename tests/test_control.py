@@ -0,0 +1,69 @@
+"""
+设备控制错误分类测试（依赖插件运行环境）
+"""
+
+import asyncio
+
+import pytest
+
+from nekro_midea_plugin.midea import ApiResult, Appliance
+
+DEVICE_ID = 42
+
+
+class FakeCloud:
+    _account = "account"
+    access_token = "token"
+
+
+class FakeLan:
+    """返回预设结果的控制通道"""
+
+    def __init__(self, result: ApiResult):
+        self.result = result
+
+    async def send_device_control(self, cloud, device_id, control):
+        return self.result
+
+
+@pytest.fixture
+def control(monkeypatch):
+    pytest.importorskip("nekro_agent")
+    from nekro_midea_plugin.controllers import base
+    from nekro_midea_plugin.plugin import config
+    from nekro_midea_plugin.services.breaker import DeviceCircuitBreaker
+
+    breaker = DeviceCircuitBreaker()
+    monkeypatch.setattr(base, "device_breaker", breaker)
+    monkeypatch.setattr(config, "skip_redundant_commands", False)
+    monkeypatch.setattr(config, "network_retry_count", 0)
+    monkeypatch.setattr(base.inventory_cache, "find_device", lambda account, device_id: None)
+
+    def send(result: ApiResult):
+        monkeypatch.setattr(base, "lan_control", FakeLan(result))
+        return asyncio.run(base._send_device_control_once(FakeCloud(), DEVICE_ID, {"power": "on"}))
+
+    return base, breaker, send
+
+
+def test_cloud_validation_error_not_counted(control):
+    _, breaker, send = control
+    result = ApiResult(success=False, error_code=1001, error_message="参数错误")
+    assert send(result) == (False, "error:cloud:1001:参数错误")
+    assert DEVICE_ID not in breaker._devices
+
+
+def test_offline_and_transport_failures_counted(control):
+    base, breaker, send = control
+    assert send(ApiResult(success=False, error_code=1307, error_message="设备不在线")) == (False, "error:device_offline")
+    assert breaker._devices[DEVICE_ID].failures == 1
+    assert send(ApiResult(success=False, error_code=-1, error_message="timeout"))[1].startswith("error:network:")
+    assert breaker._devices[DEVICE_ID].failures == 2
+
+
+def test_inventory_offline_flag_counted(control, monkeypatch):
+    base, breaker, send = control
+    appliance = Appliance(DEVICE_ID, "空调", 0xAC, "0xAC", "", "", False, "客厅")
+    monkeypatch.setattr(base.inventory_cache, "find_device", lambda account, device_id: appliance)
+    assert send(ApiResult(success=False, error_code=1001, error_message="失败")) == (False, "error:device_offline")
+    assert breaker._devices[DEVICE_ID].failures == 1
@@ -0,0 +1,159 @@
+"""
+局域网发现测试 - 使用 127.0.0.1 上的 UDP 应答端模拟设备
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from nekro_midea_plugin.midea.discovery import DISCOVERY_MSG, build_discovery_response, discover
+
+
+class FakeResponder(asyncio.DatagramProtocol):
+    """收到发现请求时按 devices 逐个应答"""
+
+    def __init__(self):
+        # [(设备ID, 序列号, 设备类型, 端口, 协议版本)]
+        self.devices: list[tuple[int, str, int, int, int]] = []
+        self.requests = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if data != DISCOVERY_MSG:
+            return
+        self.requests += 1
+        for device_id, sn, device_type, port, protocol in self.devices:
+            response = build_discovery_response(device_id, "127.0.0.1", sn, device_type, port, protocol)
+            self.transport.sendto(response, addr)
+
+
+async def start_responder() -> tuple[asyncio.DatagramTransport, FakeResponder]:
+    loop = asyncio.get_running_loop()
+    return await loop.create_datagram_endpoint(FakeResponder, local_addr=("127.0.0.1", 0))
+
+
+def test_discover_parses_v2_and_v3_responses():
+    async def run():
+        transport, responder = await start_responder()
+        responder.devices = [(42, "SN42", 0xAC, 6444, 3), (7, "SN7", 0xFA, 6445, 2)]
+        port = transport.get_extra_info("sockname")[1]
+        try:
+            return await discover(["127.0.0.1"], (port,), timeout=0.3)
+        finally:
+            transport.close()
+
+    found = asyncio.run(run())
+    assert set(found) == {42, 7}
+    assert (found[42].host, found[42].port, found[42].sn) == ("127.0.0.1", 6444, "SN42")
+    assert (found[42].device_type, found[42].protocol) == (0xAC, 3)
+    assert (found[7].port, found[7].device_type, found[7].protocol) == (6445, 0xFA, 2)
+
+
+# ---------- LanDiscovery（依赖插件运行环境） ----------
+
+class MemoryStore:
+    """内存 KV 存储"""
+
+    def __init__(self):
+        self.data: dict[str, str] = {}
+        self.writes = 0
+
+    async def get(self, store_key: str):
+        return self.data.get(store_key)
+
+    async def set(self, store_key: str, value: str):
+        self.writes += 1
+        self.data[store_key] = value
+
+    async def delete(self, store_key: str):
+        self.data.pop(store_key, None)
+
+
+@pytest.fixture
+def discovery(monkeypatch):
+    pytest.importorskip("nekro_agent")
+    from nekro_midea_plugin.plugin import config, plugin
+    from nekro_midea_plugin.services import discovery as discovery_module
+    from nekro_midea_plugin.services.lan import LanControl
+
+    monkeypatch.setattr(plugin, "store", MemoryStore())
+    monkeypatch.setattr(config, "lan_devices", "")
+    monkeypatch.setattr(config, "lan_timeout", 0.3)
+    monkeypatch.setattr(config, "lan_broadcast_address", "127.0.0.1")
+    monkeypatch.setattr(discovery_module, "lan_control", LanControl())
+    return discovery_module
+
+
+def make_scanner(discovery_module, port: int, inventory: dict):
+    scanner = discovery_module.LanDiscovery(ports=(port,))
+
+    async def fake_inventory():
+        return inventory
+
+    scanner._inventory = fake_inventory
+    return scanner
+
+
+def test_rescan_matches_by_id_and_sn_and_updates_incrementally(discovery):
+    from nekro_midea_plugin.constants import STORE_KEY_LAN_ADDRESSES
+    from nekro_midea_plugin.plugin import plugin
+
+    inventory = {
+        42: SimpleNamespace(sn="SN42", type=0xAC),
+        # 响应中的设备 ID 与清单不同，只能按序列号匹配
+        8: SimpleNamespace(sn="SN-EIGHT", type=0xFA),
+    }
+
+    async def run():
+        transport, responder = await start_responder()
+        port = transport.get_extra_info("sockname")[1]
+        responder.devices = [
+            (42, "SN42", 0xAC, 6444, 3),
+            (9999, "SN-EIGHT", 0xFA, 6444, 2),
+            (555, "SN-UNKNOWN", 0xAC, 6444, 3),  # 不在清单中，忽略
+        ]
+        scanner = make_scanner(discovery, port, inventory)
+        try:
+            first = await scanner.rescan()
+            writes = plugin.store.writes
+            unchanged = await scanner.rescan()
+            writes_after_unchanged = plugin.store.writes
+            responder.devices[0] = (42, "SN42", 0xAC, 7000, 3)
+            moved = await scanner.rescan()
+        finally:
+            transport.close()
+        return scanner, first, writes, unchanged, writes_after_unchanged, moved
+
+    scanner, first, writes, unchanged, writes_after_unchanged, moved = asyncio.run(run())
+    assert first == 2
+    assert unchanged == 0 and writes_after_unchanged == writes
+    assert moved == 1
+    assert scanner.addresses == {
+        42: {"host": "127.0.0.1", "port": 7000},
+        8: {"host": "127.0.0.1", "port": 6444},
+    }
+    assert discovery.lan_control.addresses == {42: ("127.0.0.1", 7000), 8: ("127.0.0.1", 6444)}
+
+    # 持久化的地址表以设备 ID 为键，不含序列号
+    stored = json.loads(plugin.store.data[STORE_KEY_LAN_ADDRESSES])
+    assert stored == {"42": {"host": "127.0.0.1", "port": 7000}, "8": {"host": "127.0.0.1", "port": 6444}}
+    assert "SN" not in plugin.store.data[STORE_KEY_LAN_ADDRESSES]
+
+
+def test_load_strips_serial_numbers_from_legacy_store(discovery):
+    from nekro_midea_plugin.constants import STORE_KEY_LAN_ADDRESSES
+    from nekro_midea_plugin.plugin import plugin
+
+    plugin.store.data[STORE_KEY_LAN_ADDRESSES] = json.dumps(
+        {"42": {"host": "10.0.0.9", "port": 6444, "sn": "SN42"}}
+    )
+    scanner = make_scanner(discovery, 0, {})
+    asyncio.run(scanner.load())
+
+    assert scanner.addresses == {42: {"host": "10.0.0.9", "port": 6444}}
+    assert discovery.lan_control.addresses == {42: ("10.0.0.9", 6444)}
+    assert "SN42" not in plugin.store.data[STORE_KEY_LAN_ADDRESSES]
@@ -0,0 +1,164 @@
+"""
+局域网控制测试 - 针对模拟设备验证握手、查询、设置与云端回退
+"""
+
+import asyncio
+
+import pytest
+
+from nekro_midea_plugin.midea import ApiResult, Appliance
+from nekro_midea_plugin.midea.lan import LanDevice, LanError
+from nekro_midea_plugin.midea.lan_codec import ACCodec
+
+from fake_appliance import AC_QUERY_BODY_TYPE, AC_SET_BODY_TYPE, FakeAirConditioner
+
+DEVICE_ID = 42
+
+
+def test_lan_device_handshake_and_query():
+    async def run():
+        async with FakeAirConditioner(DEVICE_ID) as fake:
+            device = LanDevice(DEVICE_ID, "127.0.0.1", fake.token, fake.key, port=fake.port, timeout=1.0)
+            codec = ACCodec()
+            frame, body_type = codec.query_frame()
+            status = codec.decode_status(await device.request(frame, body_type))
+            # 同一连接上的第二次请求不再握手
+            await device.request(frame, body_type)
+            await device.close()
+            return fake, status
+
+    fake, status = asyncio.run(run())
+    assert fake.handshakes == 1
+    assert fake.requests == [AC_QUERY_BODY_TYPE, AC_QUERY_BODY_TYPE]
+    assert status["power"] == "on"
+    assert status["mode"] == "cool"
+    assert status["temperature"] == 24
+    assert status["indoor_temperature"] == 25
+
+
+def test_lan_device_rejected_token():
+    async def run():
+        async with FakeAirConditioner(DEVICE_ID) as fake:
+            device = LanDevice(DEVICE_ID, "127.0.0.1", b"\0" * 64, fake.key, port=fake.port, timeout=1.0)
+            frame, body_type = ACCodec().query_frame()
+            with pytest.raises(LanError):
+                await device.request(frame, body_type)
+            assert not device.connected
+
+    asyncio.run(run())
+
+
+# ---------- LanControl（依赖插件运行环境） ----------
+
+class FakeCloud:
+    """记录云端调用的客户端"""
+
+    _account = "account"
+    access_token = "token"
+
+    def __init__(self, token: bytes, key: bytes):
+        self._keys = {"token": token, "key": key}
+        self.calls: list[tuple[str, dict]] = []
+
+    async def get_lan_keys(self, device_id):
+        return ApiResult(success=True, data=self._keys)
+
+    async def get_device_status(self, device_id, query):
+        self.calls.append(("status", query))
+        return ApiResult(success=True, data={"source": "cloud"})
+
+    async def send_device_control(self, device_id, control):
+        self.calls.append(("control", control))
+        return ApiResult(success=True, data={"source": "cloud"})
+
+
+@pytest.fixture
+def lan(monkeypatch):
+    pytest.importorskip("nekro_agent")
+    from nekro_midea_plugin.plugin import config
+    from nekro_midea_plugin.services import inventory_cache
+    from nekro_midea_plugin.services.lan import LanControl
+
+    monkeypatch.setattr(config, "lan_enabled", True)
+    monkeypatch.setattr(config, "lan_devices", "")
+    monkeypatch.setattr(config, "lan_timeout", 1.0)
+    monkeypatch.setattr(config, "lan_retry_after", 300.0)
+    appliance = Appliance(DEVICE_ID, "空调", 0xAC, "0xAC", "", "", True, "客厅")
+    monkeypatch.setattr(
+        inventory_cache, "find_device",
+        lambda account, device_id: appliance if device_id == DEVICE_ID else None,
+    )
+    return LanControl()
+
+
+def test_lan_control_query_and_set(lan):
+    async def run():
+        async with FakeAirConditioner(DEVICE_ID) as fake:
+            cloud = FakeCloud(fake.token, fake.key)
+            lan.set_address(DEVICE_ID, "127.0.0.1", fake.port)
+            status = await lan.get_device_status(cloud, DEVICE_ID, {"mode": {}, "temperature": {}})
+            control = await lan.send_device_control(cloud, DEVICE_ID, {"mode": "heat", "temperature": 28})
+            await lan.close()
+            return fake, cloud, status, control
+
+    fake, cloud, status, control = asyncio.run(run())
+    assert status.success and status.data == {"mode": "cool", "temperature": 24}
+    assert control.success
+    assert control.data["status"]["mode"] == "heat"
+    assert control.data["status"]["temperature"] == 28
+    assert (fake.mode, fake.temperature) == (ACCodec.MODES["heat"], 28)
+    # 设置前先查询当前状态以补全全量设置消息
+    assert fake.requests == [AC_QUERY_BODY_TYPE, AC_QUERY_BODY_TYPE, AC_SET_BODY_TYPE]
+    assert cloud.calls == []
+
+
+def test_lan_control_unsupported_key_uses_cloud(lan):
+    async def run():
+        async with FakeAirConditioner(DEVICE_ID) as fake:
+            cloud = FakeCloud(fake.token, fake.key)
+            lan.set_address(DEVICE_ID, "127.0.0.1", fake.port)
+            result = await lan.send_device_control(cloud, DEVICE_ID, {"prevent_straight_wind": 1})
+            # 不支持的参数不影响之后的本地请求
+            status = await lan.get_device_status(cloud, DEVICE_ID, {})
+            await lan.close()
+            return cloud, result, status
+
+    cloud, result, status = asyncio.run(run())
+    assert result.data == {"source": "cloud"}
+    assert cloud.calls == [("control", {"prevent_straight_wind": 1})]
+    assert status.data["mode"] == "cool"
+
+
+def test_lan_control_unreachable_device_falls_back(lan):
+    async def run():
+        fake = await FakeAirConditioner(DEVICE_ID).start()
+        port = fake.port
+        await fake.stop()
+        cloud = FakeCloud(fake.token, fake.key)
+        lan.set_address(DEVICE_ID, "127.0.0.1", port)
+        first = await lan.get_device_status(cloud, DEVICE_ID, {})
+        second = await lan.send_device_control(cloud, DEVICE_ID, {"power": "off"})
+        return cloud, first, second
+
+    cloud, first, second = asyncio.run(run())
+    assert first.data == {"source": "cloud"}
+    assert second.data == {"source": "cloud"}
+    # 失败后在 lan_retry_after 内直接走云端
+    assert cloud.calls == [("status", {}), ("control", {"power": "off"})]
+    assert DEVICE_ID in lan._disabled_until
+
+
+def test_lan_control_rejected_handshake_falls_back(lan):
+    async def run():
+        async with FakeAirConditioner(DEVICE_ID) as fake:
+            # 云端下发的 token 与设备不一致
+            cloud = FakeCloud(b"\1" * 64, fake.key)
+            lan.set_address(DEVICE_ID, "127.0.0.1", fake.port)
+            result = await lan.get_device_status(cloud, DEVICE_ID, {})
+            await lan.close()
+            return fake, cloud, result
+
+    fake, cloud, result = asyncio.run(run())
+    assert fake.handshakes == 1
+    assert result.data == {"source": "cloud"}
+    assert cloud.calls == [("status", {})]
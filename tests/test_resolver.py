@@ -0,0 +1,70 @@
+"""
+设备解析测试（依赖插件运行环境）
+"""
+
+import asyncio
+import importlib
+
+import pytest
+
+from nekro_midea_plugin.midea import ApiResult, Appliance
+
+
+class FakeCloud:
+    _account = "account"
+
+
+DEVICES = {
+    1: Appliance(1, "空调", 0xAC, "0xAC", "", "", True, "客厅"),
+    2: Appliance(2, "落地扇", 0xFA, "0xFA", "", "", True, "卧室"),
+    3: Appliance(3, "风扇", 0xFA, "0xFA", "", "", True, "书房"),
+}
+
+
+@pytest.fixture
+def resolver(monkeypatch):
+    pytest.importorskip("nekro_agent")
+    resolver_module = importlib.import_module("nekro_midea_plugin.services.resolver")
+    inventory = resolver_module.inventory_cache
+
+    async def get_homes(cloud, force=False):
+        return ApiResult(success=True, data={100: "家"})
+
+    async def get_all_appliances(cloud, home_ids, force=False):
+        # 每次返回新的字典，索引只应随 revision 重建
+        return [ApiResult(success=True, data=dict(DEVICES))]
+
+    monkeypatch.setattr(inventory, "get_homes", get_homes)
+    monkeypatch.setattr(inventory, "get_all_appliances", get_all_appliances)
+    return resolver_module.DeviceResolver(), inventory
+
+
+def resolve(resolver, selector, device_type=None):
+    return asyncio.run(resolver.resolve(FakeCloud(), selector, device_type))
+
+
+def test_exact_and_substring_match(resolver):
+    resolver, _ = resolver
+    assert resolve(resolver, "客厅空调") == (1, "")
+    assert resolve(resolver, "空调") == (1, "")
+    assert resolve(resolver, "客厅的空调") == (1, "")
+    assert resolve(resolver, "卧室落地扇") == (2, "")
+
+
+def test_room_must_match(resolver):
+    resolver, _ = resolver
+    # 家中唯一的空调在客厅，不能因类型名相同而解析到它
+    assert resolve(resolver, "书房空调") == (None, "error:device_not_found:书房空调")
+    assert resolve(resolver, "厨房的风扇") == (None, "error:device_not_found:厨房的风扇")
+    assert resolve(resolver, "风扇")[1].startswith("error:ambiguous_device:")
+
+
+def test_index_rebuilt_only_when_revision_changes(resolver):
+    resolver, inventory = resolver
+    resolve(resolver, "客厅空调")
+    signature = resolver._signature
+    resolve(resolver, "客厅空调")
+    assert resolver._signature == signature
+    inventory.revision += 1
+    resolve(resolver, "客厅空调")
+    assert resolver._signature != signature
@@ -0,0 +1,84 @@
+"""
+云会话测试（依赖插件运行环境）
+"""
+
+import asyncio
+
+import pytest
+
+from nekro_midea_plugin.midea import background_requests
+from nekro_midea_plugin.midea.ratelimit import _background
+
+
+class FakeCloud:
+    _account = "account"
+    _password = "password"
+    access_token = "old"
+
+    def __init__(self):
+        self.login_background: list[bool] = []
+
+    async def login(self):
+        self.login_background.append(_background.get())
+        self.access_token = "new"
+        return True, ""
+
+    def get_credentials(self):
+        return {"account": self._account, "access_token": self.access_token}
+
+
+class MemoryStore:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, store_key):
+        return self.data.get(store_key)
+
+    async def set(self, store_key, value):
+        self.data[store_key] = value
+
+    async def delete(self, store_key):
+        self.data.pop(store_key, None)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    pytest.importorskip("nekro_agent")
+    from nekro_midea_plugin.plugin import plugin
+    from nekro_midea_plugin.services.session import CloudSession
+
+    monkeypatch.setattr(plugin, "store", MemoryStore())
+    return CloudSession()
+
+
+def test_refresh_from_background_runs_at_foreground_priority(session):
+    cloud = FakeCloud()
+
+    async def run():
+        with background_requests():
+            return await session.refresh_credentials(cloud)
+
+    assert asyncio.run(run())
+    assert cloud.login_background == [False]
+
+
+def test_refresh_finishing_after_logout_is_discarded(session):
+    cloud = FakeCloud()
+
+    async def slow_login():
+        await asyncio.sleep(0.05)
+        cloud.access_token = "new"
+        return True, ""
+
+    cloud.login = slow_login
+
+    async def run():
+        await session.save(cloud)
+        refresh = asyncio.ensure_future(session.refresh_credentials(cloud))
+        await asyncio.sleep(0)
+        await session.logout()
+        return await refresh, await session.get_client()
+
+    refreshed, client = asyncio.run(run())
+    assert refreshed is False
+    assert client is None
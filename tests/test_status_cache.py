@@ -0,0 +1,107 @@
+"""
+设备状态缓存测试（依赖插件运行环境）
+"""
+
+import asyncio
+import importlib
+
+import pytest
+
+from nekro_midea_plugin.midea import ApiResult
+
+DEVICE_ID = 42
+
+
+@pytest.fixture
+def status_env(monkeypatch):
+    pytest.importorskip("nekro_agent")
+    from nekro_midea_plugin.plugin import config
+    status_cache_module = importlib.import_module("nekro_midea_plugin.services.status_cache")
+
+    monkeypatch.setattr(config, "status_cache_fresh", 10.0)
+    monkeypatch.setattr(config, "status_cache_max_stale", 60.0)
+    monkeypatch.setattr(config, "snapshot_max_age", 86400.0)
+
+    responses: list[ApiResult] = []
+    calls: list[dict] = []
+
+    async def get_device_status(cloud, device_id, query):
+        calls.append(query)
+        return responses.pop(0) if responses else ApiResult(success=True, data={"power": "on"})
+
+    async def call_with_refresh(cloud, func, *args):
+        return await func(*args)
+
+    monkeypatch.setattr(status_cache_module.lan_control, "get_device_status", get_device_status)
+    monkeypatch.setattr(status_cache_module.cloud_session, "call_with_refresh", call_with_refresh)
+    return status_cache_module.StatusCache(), config, responses, calls
+
+
+def test_fresh_zero_disables_cache(status_env):
+    cache, config, _, calls = status_env
+    config.status_cache_fresh = 0
+
+    async def run():
+        first, _ = await cache.get(None, DEVICE_ID)
+        second, _ = await cache.get(None, DEVICE_ID)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert len(calls) == 2
+    assert not first.stale and not second.stale
+
+
+def test_restored_entry_served_then_dropped_after_failed_refresh(status_env):
+    cache, _, responses, calls = status_env
+    cache.restore([[DEVICE_ID, "{}", {"power": "off"}, 3600.0]])
+    responses.append(ApiResult(success=False, error_code=-1, error_message="offline"))
+
+    async def run():
+        restored, age = await cache.get(None, DEVICE_ID)
+        await asyncio.sleep(0)  # 等待后台刷新完成
+        await asyncio.sleep(0)
+        after_failure, after_age = await cache.get(None, DEVICE_ID)
+        return restored, age, after_failure, after_age
+
+    restored, age, after_failure, after_age = asyncio.run(run())
+    assert restored.stale and restored.data == {"power": "off"} and age >= 3600
+    # 刷新失败后不再返回快照数据，改为同步请求
+    assert not after_failure.stale and after_failure.data == {"power": "on"} and after_age == 0.0
+    assert len(calls) == 2
+
+
+def test_restored_entry_older_than_snapshot_limit_is_not_served(status_env):
+    cache, config, _, calls = status_env
+    config.snapshot_max_age = 600.0
+    cache.restore([[DEVICE_ID, "{}", {"power": "off"}, 3600.0]])
+
+    result, age = asyncio.run(cache.get(None, DEVICE_ID))
+    assert not result.stale and result.data == {"power": "on"} and age == 0.0
+    assert len(calls) == 1
+
+
+def test_deadline_returns_early_and_fetch_fills_cache(status_env, monkeypatch):
+    cache, _, _, _ = status_env
+    status_cache_module = importlib.import_module("nekro_midea_plugin.services.status_cache")
+    from nekro_midea_plugin.midea import ERROR_CODE_DEADLINE_EXCEEDED, request_deadline
+    deadlines: list[float | None] = []
+
+    async def slow_status(cloud, device_id, query):
+        deadlines.append(status_cache_module.deadline_remaining())
+        await asyncio.sleep(0.1)
+        return ApiResult(success=True, data={"power": "on"})
+
+    monkeypatch.setattr(status_cache_module.lan_control, "get_device_status", slow_status)
+
+    async def run():
+        with request_deadline(0.01):
+            timed_out, _ = await cache.get(None, DEVICE_ID)
+        await asyncio.sleep(0.2)
+        cached, _ = await cache.get(None, DEVICE_ID)
+        return timed_out, cached
+
+    timed_out, cached = asyncio.run(run())
+    assert timed_out.error_code == ERROR_CODE_DEADLINE_EXCEEDED
+    # 共享请求不继承调用方的截止时间，完成后写入缓存
+    assert deadlines == [None]
+    assert cached.success and cached.data == {"power": "on"} and not cached.stale
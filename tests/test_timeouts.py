@@ -0,0 +1,93 @@
+"""
+自适应超时测试
+"""
+
+import asyncio
+
+import httpx
+
+from nekro_midea_plugin.midea import MeijuCloud
+from nekro_midea_plugin.midea.timeouts import MIN_SAMPLES, AdaptiveTimeouts
+
+ENDPOINT = "/mjl/v1/device/status/lua/get"
+
+
+def test_read_timeout_tracks_fast_endpoint():
+    timeouts = AdaptiveTimeouts(read_min=3.0, read_max=30.0)
+    assert timeouts.read_timeout(ENDPOINT) == 30.0
+    for _ in range(MIN_SAMPLES):
+        timeouts.observe(ENDPOINT, 0.2)
+    assert timeouts.read_timeout(ENDPOINT) == 3.0
+
+
+def test_read_timeout_recovers_after_latency_spike():
+    timeouts = AdaptiveTimeouts(read_min=3.0, read_max=30.0)
+    for _ in range(200):
+        timeouts.observe(ENDPOINT, 0.2)
+    assert timeouts.read_timeout(ENDPOINT) == 3.0
+
+    # 云端延迟升至 5 秒：每次请求都在当前读超时处超时
+    latency = 5.0
+    attempts = 0
+    while (read := timeouts.read_timeout(ENDPOINT)) < latency:
+        timeouts.observe_timeout(ENDPOINT, read)
+        attempts += 1
+        assert attempts < 10, "读超时未随超时放宽"
+    assert read <= 30.0
+
+    # 请求恢复成功后读超时仍能覆盖新的延迟
+    timeouts.observe(ENDPOINT, latency)
+    assert timeouts.read_timeout(ENDPOINT) >= latency
+
+
+def test_consecutive_timeouts_capped_at_read_max():
+    timeouts = AdaptiveTimeouts(read_min=3.0, read_max=30.0)
+    for _ in range(MIN_SAMPLES):
+        timeouts.observe(ENDPOINT, 0.2)
+    for _ in range(10):
+        timeouts.observe_timeout(ENDPOINT, timeouts.read_timeout(ENDPOINT))
+    assert timeouts.read_timeout(ENDPOINT) == 30.0
+
+
+def test_success_resets_widening():
+    timeouts = AdaptiveTimeouts(read_min=3.0, read_max=30.0)
+    for _ in range(200):
+        timeouts.observe(ENDPOINT, 0.2)
+    timeouts.observe_timeout(ENDPOINT, 3.0)
+    assert timeouts.read_timeout(ENDPOINT) == 6.0
+    timeouts.observe(ENDPOINT, 0.2)
+    assert timeouts.read_timeout(ENDPOINT) == 3.0
+
+
+class _MockTransport:
+    """返回使用 httpx.MockTransport 的客户端"""
+
+    def __init__(self, error: Exception):
+        def handler(request):
+            raise error
+
+        self._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    def get_client(self):
+        return self._client
+
+
+def _send_with_error(error: Exception) -> AdaptiveTimeouts:
+    timeouts = AdaptiveTimeouts(read_min=3.0, read_max=30.0)
+    for _ in range(MIN_SAMPLES):
+        timeouts.observe(ENDPOINT, 0.2)
+    cloud = MeijuCloud("account", "password", transport=_MockTransport(error), timeouts=timeouts)
+    result = asyncio.run(cloud._send_request(ENDPOINT, {}))
+    assert result.error_code == -1
+    return timeouts
+
+
+def test_read_timeout_widens():
+    timeouts = _send_with_error(httpx.ReadTimeout("read"))
+    assert timeouts.read_timeout(ENDPOINT) > 3.0
+
+
+def test_connect_and_pool_timeouts_ignored():
+    for error in (httpx.ConnectTimeout("connect"), httpx.PoolTimeout("pool")):
+        timeouts = _send_with_error(error)
+        assert timeouts.read_timeout(ENDPOINT) == 3.0
@@ -0,0 +1,41 @@
+"""
+调用追踪测试
+"""
+
+import asyncio
+
+from nekro_midea_plugin.midea.tracing import Tracer, _NOOP
+
+
+def test_disabled_tracer_returns_noop():
+    tracer = Tracer(enabled=False)
+    with tracer.trace("call") as trace:
+        assert trace is _NOOP
+        assert tracer.span("http") is _NOOP
+    assert tracer.recent() == []
+
+
+def test_background_task_does_not_touch_finished_trace():
+    tracer = Tracer(enabled=True)
+
+    async def background():
+        await asyncio.sleep(0.02)
+        with tracer.span("late"):
+            pass
+
+    async def run():
+        with tracer.trace("call", chat_key="c1"):
+            with tracer.span("http"):
+                pass
+            leaked = asyncio.ensure_future(background())
+            with tracer.detached():
+                detached = asyncio.ensure_future(background())
+        recorded = tracer.recent()[0]
+        await asyncio.gather(leaked, detached)
+        return recorded
+
+    recorded = asyncio.run(run())
+    current = tracer.recent()[0]
+    assert [s["name"] for s in current["spans"]] == ["http"]
+    assert current["duration_ms"] == recorded["duration_ms"]
+    assert current["chat_key"] == "c1"
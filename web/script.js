@@ -14,8 +14,16 @@ const loginMessage = document.getElementById('loginMessage');
 
 const userAccount = document.getElementById('userAccount');
 const logoutBtn = document.getElementById('logoutBtn');
+const refreshBtn = document.getElementById('refreshBtn');
 const homeList = document.getElementById('homeList');
 const deviceList = document.getElementById('deviceList');
+const sceneList = document.getElementById('sceneList');
+const sceneNameInput = document.getElementById('sceneName');
+const sceneActionsInput = document.getElementById('sceneActions');
+const saveSceneBtn = document.getElementById('saveSceneBtn');
+const sceneMessage = document.getElementById('sceneMessage');
+const metricsBtn = document.getElementById('metricsBtn');
+const metricsPanel = document.getElementById('metricsPanel');
 
 // 当前选中的家庭 ID
 let currentHomeId = null;
@@ -77,6 +85,14 @@ async function logout() {
     return await response.json();
 }
 
+async function refreshInventory() {
+    const response = await fetch('api/refresh', { method: 'POST' });
+    if (!response.ok) {
+        throw new Error('刷新设备列表失败');
+    }
+    return await response.json();
+}
+
 async function getHomes() {
     const response = await fetch('api/homes');
     if (!response.ok) {
@@ -93,6 +109,43 @@ async function getDevices(homeId) {
     return await response.json();
 }
 
+async function getScenes() {
+    const response = await fetch('api/scenes');
+    if (!response.ok) {
+        throw new Error('获取场景列表失败');
+    }
+    return await response.json();
+}
+
+async function saveScene(name, actions) {
+    const response = await fetch('api/scenes', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ name, actions })
+    });
+    const data = await response.json();
+    if (!response.ok) {
+        throw new Error(data.detail || '保存场景失败');
+    }
+    return data;
+}
+
+async function deleteScene(name) {
+    const response = await fetch(`api/scenes/${encodeURIComponent(name)}`, { method: 'DELETE' });
+    if (!response.ok) {
+        throw new Error('删除场景失败');
+    }
+    return await response.json();
+}
+
+async function getMetricsSummary() {
+    const response = await fetch('api/metrics/summary');
+    if (!response.ok) {
+        throw new Error('获取运行指标失败');
+    }
+    return await response.json();
+}
+
 // ==================== UI 渲染 ====================
 
 function renderHomes(homes) {
@@ -141,6 +194,90 @@ function renderDevices(devices) {
     });
 }
 
+function renderScenes(scenes) {
+    sceneList.innerHTML = '';
+
+    if (!scenes || scenes.length === 0) {
+        sceneList.innerHTML = '<p class="hint">暂无场景</p>';
+        return;
+    }
+
+    scenes.forEach(scene => {
+        const item = document.createElement('div');
+        item.className = 'scene-item';
+
+        const info = document.createElement('div');
+        const name = document.createElement('span');
+        name.className = 'scene-name';
+        name.textContent = scene.name;
+        const count = document.createElement('span');
+        count.className = 'scene-count';
+        count.textContent = `${scene.actions.length} 个设备`;
+        info.appendChild(name);
+        info.appendChild(count);
+
+        const actions = document.createElement('div');
+        actions.className = 'scene-actions';
+        const editBtn = document.createElement('button');
+        editBtn.className = 'refresh-btn';
+        editBtn.innerHTML = '<i class="fas fa-edit"></i> 编辑';
+        editBtn.onclick = () => {
+            sceneNameInput.value = scene.name;
+            sceneActionsInput.value = JSON.stringify(scene.actions, null, 2);
+        };
+        const deleteBtn = document.createElement('button');
+        deleteBtn.className = 'logout-btn';
+        deleteBtn.innerHTML = '<i class="fas fa-trash"></i> 删除';
+        deleteBtn.onclick = () => handleDeleteScene(scene.name);
+        actions.appendChild(editBtn);
+        actions.appendChild(deleteBtn);
+
+        item.appendChild(info);
+        item.appendChild(actions);
+        sceneList.appendChild(item);
+    });
+}
+
+function formatSeconds(seconds) {
+    return seconds >= 1 ? `${seconds.toFixed(2)}s` : `${Math.round(seconds * 1000)}ms`;
+}
+
+function renderMetrics(summary) {
+    const rows = summary.endpoints.map(item => `
+        <tr>
+            <td>${item.endpoint}</td>
+            <td>${item.requests}</td>
+            <td>${item.errors}</td>
+            <td>${formatSeconds(item.avg)}</td>
+            <td>${formatSeconds(item.p95)}</td>
+        </tr>
+    `).join('');
+
+    const caches = Object.entries(summary.caches).map(([name, item]) =>
+        `<span class="metric-chip">${name} 命中率 ${(item.hit_ratio * 100).toFixed(0)}%</span>`
+    ).join('');
+
+    const control = summary.control;
+    const retries = Object.entries(control.retries).map(([k, v]) => `${k}:${v}`).join(' ') || '0';
+    const breaker = Object.entries(summary.breaker).map(([k, v]) => `${k}:${v}`).join(' ') || '0';
+
+    metricsPanel.innerHTML = `
+        <div class="metric-chips">
+            <span class="metric-chip">控制 ${control.ok}/${control.total} 成功</span>
+            <span class="metric-chip">控制耗时 平均 ${formatSeconds(control.avg)} / p95 ${formatSeconds(control.p95)}</span>
+            <span class="metric-chip">重试 ${retries}</span>
+            <span class="metric-chip">熔断 ${breaker}</span>
+            <span class="metric-chip">凭证刷新 ${summary.token_refresh.ok} 成功 / ${summary.token_refresh.failed} 失败</span>
+            ${caches}
+        </div>
+        ${rows ? `
+        <table class="metrics-table">
+            <thead><tr><th>接口</th><th>请求</th><th>失败</th><th>平均</th><th>p95</th></tr></thead>
+            <tbody>${rows}</tbody>
+        </table>` : '<p class="hint">暂无请求</p>'}
+    `;
+}
+
 // ==================== 事件处理 ====================
 
 async function handleLogin() {
@@ -192,6 +329,70 @@ async function handleLogout() {
     }
 }
 
+async function handleRefresh() {
+    showLoading();
+    try {
+        await refreshInventory();
+    } catch (error) {
+        console.error('刷新设备列表失败:', error);
+    } finally {
+        hideLoading();
+    }
+    initMainView(userAccount.textContent.replace('账号: ', ''));
+}
+
+async function loadScenes() {
+    try {
+        const data = await getScenes();
+        renderScenes(data.scenes);
+    } catch (error) {
+        sceneList.innerHTML = `<p class="hint">加载场景失败: ${error.message}</p>`;
+    }
+}
+
+async function handleSaveScene() {
+    const name = sceneNameInput.value.trim();
+    let actions;
+
+    try {
+        actions = JSON.parse(sceneActionsInput.value);
+    } catch (error) {
+        showMessage(sceneMessage, '设备动作不是有效的 JSON', true);
+        return;
+    }
+
+    saveSceneBtn.disabled = true;
+    try {
+        await saveScene(name, actions);
+        showMessage(sceneMessage, '场景已保存', false);
+        await loadScenes();
+    } catch (error) {
+        showMessage(sceneMessage, error.message, true);
+    } finally {
+        saveSceneBtn.disabled = false;
+    }
+}
+
+async function loadMetrics() {
+    try {
+        renderMetrics(await getMetricsSummary());
+    } catch (error) {
+        metricsPanel.innerHTML = `<p class="hint">加载指标失败: ${error.message}</p>`;
+    }
+}
+
+async function handleDeleteScene(name) {
+    if (!confirm(`确定删除场景「${name}」吗？`)) {
+        return;
+    }
+    try {
+        await deleteScene(name);
+        await loadScenes();
+    } catch (error) {
+        showMessage(sceneMessage, error.message, true);
+    }
+}
+
 async function selectHome(homeId) {
     currentHomeId = homeId;
 
@@ -217,6 +418,9 @@ async function initMainView(account) {
     showMainView();
     userAccount.textContent = `账号: ${account}`;
 
+    loadScenes();
+    loadMetrics();
+
     // 加载家庭列表
     showLoading();
     try {
@@ -244,6 +448,9 @@ async function init() {
     // 绑定事件
     loginBtn.onclick = handleLogin;
     logoutBtn.onclick = handleLogout;
+    refreshBtn.onclick = handleRefresh;
+    saveSceneBtn.onclick = handleSaveScene;
+    metricsBtn.onclick = loadMetrics;
 
     // 回车登录
     passwordInput.onkeypress = (e) => {